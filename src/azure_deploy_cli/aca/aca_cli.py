@@ -2,27 +2,48 @@ import argparse
 import json
 import os
 import sys
+import time
+from dataclasses import asdict
 from pathlib import Path
 from typing import Any
 
 from azure.mgmt.appcontainers import ContainerAppsAPIClient
-from azure.mgmt.appcontainers.models import IpSecurityRestrictionRule
+from azure.mgmt.appcontainers.models import IpSecurityRestrictionRule, ManagedEnvironment
 
 from ..identity.managed_identity import create_or_get_user_identity
+from ..identity.models import ManagedIdentity
 from ..identity.role import assign_role_by_files
+from ..utils import docker
 from ..utils.azure_cli import get_credential, get_subscription_and_tenant
+from ..utils.env import preload_env_vars_files
 from ..utils.key_vault import get_key_vault_client
-from ..utils.logging import get_logger
+from ..utils.logging import elapsed_ms, get_logger
+from .certificate import bind_aca_managed_certificate
 from .deploy_aca import (
     SecretKeyVaultConfig,
-    bind_aca_managed_certificate,
+    build_ip_rules,
     create_container_app_env,
     deploy_revision,
     generate_revision_suffix,
     update_traffic_weights,
     validate_revision_suffix_and_throw,
 )
-from .yaml_loader import ContainerAppConfig, load_app_config_yaml
+from .fleet import FleetDeploySession, deploy_fleet
+from .image_gc import DEFAULT_KEEP_LAST, DEFAULT_MAX_PARALLEL_DELETES, gc_images
+from .journal import DEFAULT_JOURNAL_DIR, STEP_IDENTITY, STEP_ROLES, DeployJournal
+from .model import AppSettings, RevisionDeploymentResult
+from .plan import (
+    DEFAULT_ENVELOPE_CACHE_DIR,
+    PLAN_ERROR,
+    PLAN_UNCHANGED,
+    EnvelopeCache,
+    envelope_hash,
+    plan_container_app_envelope,
+    plan_fleet,
+)
+from .rollout import rollout_traffic
+from .snapshot import ResourceSnapshot
+from .yaml_loader import ContainerAppConfig, load_app_config_yaml, load_fleet_manifest_yaml
 
 logger = get_logger(__name__)
 
@@ -92,6 +113,106 @@ def _validate_cli_deploy(args: Any):
         raise ValueError("Role env vars files provided without role config")
 
 
+def _resolve_revision_suffix(args: Any) -> str:
+    if args.revision_suffix:
+        return str(args.revision_suffix)
+    if args.resume:
+        revision_suffix = DeployJournal.find_latest_incomplete(
+            args.journal_dir, args.container_app, args.stage
+        )
+        if not revision_suffix:
+            raise ValueError(
+                f"No unfinished deploy of '{args.container_app}' for stage '{args.stage}' "
+                f"found in '{args.journal_dir}' to resume"
+            )
+        return revision_suffix
+    return generate_revision_suffix(stage=args.stage)
+
+
+def _get_or_create_snapshot_env(
+    client: ContainerAppsAPIClient, args: Any, snapshot: ResourceSnapshot
+) -> ManagedEnvironment:
+    env = snapshot.managed_environment
+    if env is None:
+        # The snapshot already looked it up, so create it without another GET
+        env = create_container_app_env(
+            client,
+            resource_group=args.resource_group,
+            container_app_env_name=args.container_app_env,
+            location=args.location,
+            logs_workspace_id=args.logs_workspace_id,
+            known_missing=True,
+        )
+        snapshot.set_managed_environment(env)
+    return env
+
+
+def _resolve_cli_app_settings(args: Any, app_config: ContainerAppConfig) -> AppSettings:
+    return AppSettings.resolve(
+        app_config,
+        target_port=args.target_port,
+        min_replicas=args.min_replicas,
+        max_replicas=args.max_replicas,
+        ingress_external=args.ingress_external,
+        ingress_transport=args.ingress_transport,
+        allowed_ips=dict(args.allowed_ips) if args.allowed_ips is not None else None,
+    )
+
+
+def _plan_cli_envelope(
+    args: Any,
+    app_config: ContainerAppConfig,
+    settings: AppSettings,
+    registry_user: str,
+    images: list[str] | None = None,
+) -> dict[str, Any]:
+    return plan_container_app_envelope(
+        app_config,
+        settings,
+        location=args.location,
+        container_app_env=args.container_app_env,
+        user_assigned_identity_name=args.user_assigned_identity_name,
+        registry_server=args.registry_server,
+        registry_user=registry_user,
+        registry_pass_env_name=REGISTRY_PASS_SECRET_ENV_NAME,
+        keyvault_name=args.keyvault_name,
+        secret_names=args.env_var_secrets or [],
+        images=images,
+    )
+
+
+def _setup_identity_and_roles(
+    args: Any, journal: DeployJournal, subscription_id: str
+) -> ManagedIdentity:
+    recorded_identity = journal.get(STEP_IDENTITY)
+    if recorded_identity:
+        logger.info("Managed identity already resolved in this deploy. Skipping.")
+        user_identity = ManagedIdentity(**recorded_identity)
+    else:
+        user_identity = create_or_get_user_identity(
+            args.user_assigned_identity_name, args.resource_group, subscription_id
+        )
+        journal.record(STEP_IDENTITY, asdict(user_identity))
+    if args.role_config and args.role_env_vars_files and not journal.is_done(STEP_ROLES):
+        assign_role_by_files(
+            user_identity.principalId,
+            args.role_config,
+            args.role_env_vars_files,
+        )
+        journal.record(STEP_ROLES)
+    return user_identity
+
+
+def _output_revision(result: RevisionDeploymentResult) -> None:
+    output: dict[str, Any] = {
+        "revisionName": result.revision_name,
+        "revisionUrl": result.revision_url,
+    }
+    if result.skipped:
+        output["skipped"] = True
+    logger.stdout(json.dumps(output))
+
+
 def cli_deploy(args: Any) -> None:
     """
     Deploy Azure Container App revision from YAML configuration without updating traffic.
@@ -105,6 +226,9 @@ def cli_deploy(args: Any) -> None:
     6. Verify revision activation and health
     7. Output the revision name for use in traffic management
 
+    Completed steps are recorded in a deploy journal; with --resume, a failed deploy
+    continues with the same revision suffix and skips the steps already done.
+
     Args:
         args: Parsed command line arguments
     """
@@ -114,7 +238,11 @@ def cli_deploy(args: Any) -> None:
         raise ValueError(f"Environment variable {REGISTRY_USER_SECRET_ENV_NAME} is not set")
 
     try:
-        logger.critical("Starting ACA revision deployment process...")
+        start = time.monotonic()
+        app_event = {"app": args.container_app}
+        logger.critical(
+            "Starting ACA revision deployment process...", extra={**app_event, "phase": "start"}
+        )
         subscription_id, _ = get_subscription_and_tenant()
         credential = get_credential(cache=True)
         container_apps_api_client = ContainerAppsAPIClient(credential, subscription_id)
@@ -124,52 +252,56 @@ def cli_deploy(args: Any) -> None:
             key_vault_name=args.keyvault_name,
         )
 
-        revision_suffix = (
-            args.revision_suffix
-            if args.revision_suffix
-            else generate_revision_suffix(stage=args.stage)
+        revision_suffix = _resolve_revision_suffix(args)
+        journal = DeployJournal.open(
+            args.journal_dir, args.container_app, revision_suffix, resume=args.resume
+        )
+        snapshot = ResourceSnapshot(
+            container_apps_api_client,
+            args.resource_group,
+            args.container_app,
+            args.container_app_env,
         )
+        if args.container_app_env_id:
+            snapshot.set_managed_environment(
+                create_container_app_env(
+                    container_apps_api_client,
+                    resource_group=args.resource_group,
+                    container_app_env_name=args.container_app_env,
+                    location=args.location,
+                    logs_workspace_id=args.logs_workspace_id,
+                    container_app_env_id=args.container_app_env_id,
+                )
+            )
+        snapshot.prefetch()
 
-        logger.critical(f"Loading container configuration from '{args.container_config}'...")
-        app_config: ContainerAppConfig = load_app_config_yaml(args.container_config)
+        logger.critical(
+            f"Loading container configuration from '{args.container_config}'...",
+            extra={**app_event, "phase": "load-config"},
+        )
+        app_config: ContainerAppConfig = load_app_config_yaml(
+            args.container_config, stage=args.stage
+        )
         logger.critical(f"Loaded configuration with {len(app_config.containers)} container(s)")
-
-        logger.critical("Setting up managed identity and roles...")
-        user_identity = create_or_get_user_identity(
-            args.user_assigned_identity_name, args.resource_group, subscription_id
+        settings = _resolve_cli_app_settings(args, app_config)
+        planned_envelope = _plan_cli_envelope(args, app_config, settings, registry_user)
+        logger.critical(
+            "Setting up managed identity and roles...", extra={**app_event, "phase": "identity"}
         )
-        if args.role_config and args.role_env_vars_files:
-            assign_role_by_files(
-                user_identity.principalId,
-                args.role_config,
-                args.role_env_vars_files,
-            )
+        user_identity = _setup_identity_and_roles(args, journal, subscription_id)
 
-        logger.critical("Creating or getting Container App Environment...")
-        env = create_container_app_env(
-            container_apps_api_client,
-            resource_group=args.resource_group,
-            container_app_env_name=args.container_app_env,
-            location=args.location,
-            logs_workspace_id=args.logs_workspace_id,
+        logger.critical(
+            "Creating or getting Container App Environment...",
+            extra={**app_event, "phase": "environment"},
         )
-        if not env:
-            raise ValueError("Cannot create container app env")
+        env = _get_or_create_snapshot_env(container_apps_api_client, args, snapshot)
 
         ip_rules: list[IpSecurityRestrictionRule] = []
-        if args.allowed_ips:
-            for name, cidr_ranges in args.allowed_ips:
-                for idx, cidr_range in enumerate(cidr_ranges):
-                    rule = IpSecurityRestrictionRule(
-                        name=f"{name}-{idx + 1}",
-                        action="Allow",
-                        ip_address_range=cidr_range,
-                        description=f"Allowed {name} IP range",
-                    )
-                    ip_rules.append(rule)
+        if settings.allowed_ips:
+            ip_rules = build_ip_rules(list(settings.allowed_ips.items()))
             logger.critical(f"Configured {len(ip_rules)} Allowed IP restriction rules.")
 
-        logger.critical("Deploying new revision...")
+        logger.critical("Deploying new revision...", extra={**app_event, "phase": "deploy"})
         result = deploy_revision(
             client=container_apps_api_client,
             subscription_id=subscription_id,
@@ -184,11 +316,11 @@ def cli_deploy(args: Any) -> None:
             location=args.location,
             stage=args.stage,
             container_configs=app_config.containers,
-            target_port=args.target_port,
-            ingress_external=args.ingress_external,
-            ingress_transport=args.ingress_transport,
-            min_replicas=args.min_replicas,
-            max_replicas=args.max_replicas,
+            target_port=settings.target_port,
+            ingress_external=settings.ingress_external,
+            ingress_transport=settings.ingress_transport,
+            min_replicas=settings.min_replicas,
+            max_replicas=settings.max_replicas,
             secret_key_vault_config=SecretKeyVaultConfig(
                 key_vault_client=key_vault_client,
                 key_vault_name=args.keyvault_name,
@@ -196,35 +328,63 @@ def cli_deploy(args: Any) -> None:
                 user_identity=user_identity,
             ),
             ip_rules=ip_rules,
+            journal=journal,
+            snapshot=snapshot,
+            buildx_builder=args.buildx_builder,
+            hash_envelope=lambda images: envelope_hash(
+                _plan_cli_envelope(args, app_config, settings, registry_user, images=images)
+            ),
+            skip_if_unchanged=args.skip_if_unchanged,
         )
+        if args.buildx_prune_keep_storage:
+            docker.prune_buildx_builder(args.buildx_builder, args.buildx_prune_keep_storage)
+        if result.skipped:
+            logger.success(
+                f"Container app unchanged since revision '{result.revision_name}'. "
+                "Skipping deploy.",
+                extra={
+                    **app_event,
+                    "phase": "skip",
+                    "revision": result.revision_name,
+                    "duration_ms": elapsed_ms(start),
+                },
+            )
+            _output_revision(result)
+            journal.complete()
+            return
 
         if args.custom_domains:
-            logger.critical("Binding SSL certificate to Container App...")
+            logger.critical(
+                "Binding SSL certificate to Container App...",
+                extra={**app_event, "phase": "bind-certificate"},
+            )
             bind_aca_managed_certificate(
+                client=container_apps_api_client,
                 custom_domains=args.custom_domains,
                 container_app_name=args.container_app,
                 container_app_env_name=args.container_app_env,
                 resource_group=args.resource_group,
+                snapshot=snapshot,
             )
 
         logger.success("========== Deployment Complete ==========")
         logger.success(
             f"Deployed revision: {result.revision_name} "
-            f"(active={result.active}, healthy={result.is_healthy})"
+            f"(active={result.active}, healthy={result.is_healthy})",
+            extra={
+                **app_event,
+                "phase": "done",
+                "revision": result.revision_name,
+                "duration_ms": elapsed_ms(start),
+            },
         )
-        logger.stdout(
-            f"""
-                {
-                json.dumps(
-                    {
-                        "revisionName": result.revision_name,
-                        "revisionUrl": result.revision_url,
-                    }
-                )
-            }
-            """
-        )
-        if not result.is_healthy:
+        _output_revision(result)
+        if result.is_healthy:
+            EnvelopeCache(args.envelope_cache_dir).save(
+                args.resource_group, args.container_app, args.stage, planned_envelope
+            )
+            journal.complete()
+        else:
             logger.error(
                 f"Revision '{result.revision_name}' is not healthy: "
                 f"active={result.active}, health={result.health_state}, "
@@ -236,6 +396,125 @@ def cli_deploy(args: Any) -> None:
         sys.exit(1)
 
 
+def cli_deploy_fleet(args: Any) -> None:
+    """
+    Deploy many Azure Container Apps from a single fleet manifest.
+
+    This command:
+    1. Loads the fleet manifest and resolves one shared session (credential, clients)
+    2. Resolves each distinct environment, identity and role assignment once
+    3. Deploys all apps concurrently, limited per container app environment
+    4. Outputs one aggregated JSON result for all apps
+
+    Args:
+        args: Parsed command line arguments
+    """
+    if args.revision_suffix:
+        validate_revision_suffix_and_throw(args.revision_suffix, args.stage)
+    if not os.getenv(REGISTRY_PASS_SECRET_ENV_NAME):
+        raise ValueError(f"Environment variable {REGISTRY_PASS_SECRET_ENV_NAME} is not set")
+    registry_user = os.getenv(REGISTRY_USER_SECRET_ENV_NAME)
+    if not registry_user:
+        raise ValueError(f"Environment variable {REGISTRY_USER_SECRET_ENV_NAME} is not set")
+
+    try:
+        logger.critical(f"Loading fleet manifest from '{args.manifest}'...")
+        manifest = load_fleet_manifest_yaml(args.manifest)
+        logger.critical(f"Loaded fleet manifest with {len(manifest.apps)} app(s)")
+        preload_env_vars_files(app.role_env_vars_files for app in manifest.apps)
+
+        subscription_id, _ = get_subscription_and_tenant()
+        credential = get_credential(cache=True)
+        first_app = manifest.apps[0]
+        session = FleetDeploySession(
+            subscription_id=subscription_id,
+            client=ContainerAppsAPIClient(credential, subscription_id),
+            key_vault_client=get_key_vault_client(
+                subscription_id=subscription_id,
+                resource_group=first_app.resource_group,
+                key_vault_name=first_app.keyvault_name,
+            ),
+            registry_user=registry_user,
+            registry_pass_env_name=REGISTRY_PASS_SECRET_ENV_NAME,
+            buildx_builder=args.buildx_builder,
+            envelope_cache=EnvelopeCache(args.envelope_cache_dir),
+            skip_unchanged=args.skip_unchanged,
+        )
+        revision_suffix = args.revision_suffix or generate_revision_suffix(stage=args.stage)
+
+        results = deploy_fleet(
+            session,
+            manifest,
+            stage=args.stage,
+            revision_suffix=revision_suffix,
+            max_concurrency_per_env=args.max_concurrency_per_env,
+        )
+        if args.buildx_prune_keep_storage:
+            docker.prune_buildx_builder(args.buildx_builder, args.buildx_prune_keep_storage)
+    except Exception:
+        logger.error("Failed to deploy fleet", exc_info=True)
+        sys.exit(1)
+
+    failed = [r for r in results if r.error or not r.is_healthy]
+    logger.stdout(
+        json.dumps(
+            {
+                "revisionSuffix": revision_suffix,
+                "apps": [r.to_dict() for r in results],
+            }
+        )
+    )
+    if failed:
+        logger.error(
+            f"{len(failed)}/{len(results)} app(s) failed: "
+            f"{', '.join(r.container_app for r in failed)}"
+        )
+        sys.exit(1)
+    logger.success(f"========== Fleet Deployment Complete ({len(results)} app(s)) ==========")
+
+
+def cli_plan(args: Any) -> None:
+    """
+    Show which apps of a fleet manifest changed since they were last deployed.
+
+    Computes each app's deploy envelope locally, without Azure or registry calls, and
+    compares it with the envelope recorded by its last successful deploy. Outputs the
+    status of every app and the lists of changed and unchanged apps.
+
+    Args:
+        args: Parsed command line arguments
+    """
+    try:
+        logger.critical(f"Loading fleet manifest from '{args.manifest}'...")
+        manifest = load_fleet_manifest_yaml(args.manifest)
+        results = plan_fleet(
+            manifest,
+            stage=args.stage,
+            registry_user=os.getenv(REGISTRY_USER_SECRET_ENV_NAME, ""),
+            registry_pass_env_name=REGISTRY_PASS_SECRET_ENV_NAME,
+            envelope_cache=EnvelopeCache(args.envelope_cache_dir),
+        )
+    except Exception:
+        logger.error("Failed to plan fleet", exc_info=True)
+        sys.exit(1)
+
+    logger.stdout(
+        json.dumps(
+            {
+                "apps": [r.to_dict() for r in results],
+                "changedApps": [
+                    r.container_app for r in results if r.status not in (PLAN_UNCHANGED, PLAN_ERROR)
+                ],
+                "unchangedApps": [r.container_app for r in results if r.status == PLAN_UNCHANGED],
+            }
+        )
+    )
+    failed = [r.container_app for r in results if r.status == PLAN_ERROR]
+    if failed:
+        logger.error(f"Could not plan {len(failed)} app(s): {', '.join(failed)}")
+        sys.exit(1)
+
+
 def cli_update_traffic(args: Any) -> None:
     """
     Update traffic weights for Azure Container App labels.
@@ -264,6 +543,7 @@ def cli_update_traffic(args: Any) -> None:
             label_traffic_map=label_traffic_map,
             deactivate_old_revisions=not args.no_deactivate,
             should_delete_acr_images=args.delete_acr_images,
+            wait=args.wait,
         )
 
         logger.success("========== Traffic Update Complete ==========")
@@ -272,6 +552,110 @@ def cli_update_traffic(args: Any) -> None:
         sys.exit(1)
 
 
+def cli_rollout(args: Any) -> None:
+    """
+    Progressively shift traffic from one stage label to another.
+
+    This command:
+    1. Steps the target label's traffic weight through the given schedule
+    2. Gates each step on revision health and an optional HTTP check
+    3. Rolls all traffic back to the source label if a step fails
+
+    Args:
+        args: Parsed command line arguments
+    """
+    try:
+        logger.critical("Starting traffic rollout process...")
+        subscription_id, _ = get_subscription_and_tenant()
+        credential = get_credential(cache=True)
+        container_apps_api_client = ContainerAppsAPIClient(credential, subscription_id)
+
+        result = rollout_traffic(
+            client=container_apps_api_client,
+            resource_group=args.resource_group,
+            container_app_name=args.container_app,
+            from_label=args.from_label,
+            to_label=args.to_label,
+            steps=args.steps,
+            step_interval_seconds=args.step_interval,
+            health_check_path=args.health_check_path,
+        )
+
+        logger.success("========== Traffic Rollout Complete ==========")
+        logger.stdout(
+            json.dumps(
+                {
+                    "fromRevisionName": result.from_revision_name,
+                    "toRevisionName": result.to_revision_name,
+                    "toWeight": result.to_weight,
+                }
+            )
+        )
+    except Exception:
+        logger.error("Failed to roll out traffic", exc_info=True)
+        sys.exit(1)
+
+
+def cli_gc_images(args: Any) -> None:
+    """
+    Delete registry images not used by any active revision of the given apps.
+
+    Args:
+        args: Parsed command line arguments
+    """
+    try:
+        logger.critical("Starting registry image garbage collection...")
+        subscription_id, _ = get_subscription_and_tenant()
+        credential = get_credential(cache=True)
+        container_apps_api_client = ContainerAppsAPIClient(credential, subscription_id)
+
+        result = gc_images(
+            client=container_apps_api_client,
+            resource_group=args.resource_group,
+            container_app_names=args.container_apps,
+            registry_server=args.registry_server,
+            repositories=args.repositories,
+            keep_last=args.keep_last,
+            keep_days=args.keep_days,
+            dry_run=args.dry_run,
+            max_parallel=args.max_parallel,
+        )
+
+        logger.success("========== Image Garbage Collection Complete ==========")
+        logger.stdout(json.dumps(result.to_dict()))
+    except Exception:
+        logger.error("Failed to garbage collect images", exc_info=True)
+        sys.exit(1)
+
+
+def _add_buildx_builder_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--buildx-builder",
+        required=False,
+        type=str,
+        default=docker.BUILDX_BUILDER_NAME,
+        help="Persistent buildx builder for image builds, created if missing "
+        f"(default: {docker.BUILDX_BUILDER_NAME}).",
+    )
+    parser.add_argument(
+        "--buildx-prune-keep-storage",
+        required=False,
+        type=str,
+        help="After building, prune the builder cache down to this size (e.g. 10gb).",
+    )
+
+
+def _add_envelope_cache_dir_arg(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--envelope-cache-dir",
+        required=False,
+        type=Path,
+        default=DEFAULT_ENVELOPE_CACHE_DIR,
+        help="Directory for the envelopes recorded by successful deploys and compared by "
+        f"'plan' (default: {DEFAULT_ENVELOPE_CACHE_DIR}).",
+    )
+
+
 def add_commands(subparsers: argparse._SubParsersAction) -> None:
     """
     Register ACA namespace commands under the 'aca' subparser.
@@ -319,6 +703,13 @@ def add_commands(subparsers: argparse._SubParsersAction) -> None:
         type=str,
         help="Name of the container app environment.",
     )
+    deploy_parser.add_argument(
+        "--container-app-env-id",
+        required=False,
+        type=str,
+        help="Resource ID of an existing container app environment. "
+        "If set, the environment is not looked up or created.",
+    )
     deploy_parser.add_argument(
         "--logs-workspace-id",
         required=True,
@@ -360,45 +751,47 @@ def add_commands(subparsers: argparse._SubParsersAction) -> None:
         "--stage",
         required=True,
         type=str,
-        help="Deployment stage label (e.g., staging, prod) used for revision naming.",
+        help="Deployment stage label (e.g., staging, prod) used for revision naming "
+        "and to pick the container config's stage overlay.",
     )
 
     deploy_parser.add_argument(
         "--target-port",
-        required=True,
+        required=False,
         type=int,
-        help="Target port for the container app ingress.",
+        help="Target port for the container app ingress. "
+        "Overrides 'target_port' in the container config.",
     )
 
     deploy_parser.add_argument(
         "--ingress-external",
         required=False,
         type=bool,
-        default=True,
-        help="Whether ingress is external (default: True).",
+        help="Whether ingress is external (default: container config, else True).",
     )
 
     deploy_parser.add_argument(
         "--ingress-transport",
         required=False,
         type=str,
-        default="auto",
         choices=["auto", "http", "http2", "tcp"],
-        help="Ingress transport protocol (default: auto).",
+        help="Ingress transport protocol (default: container config, else auto).",
     )
 
     deploy_parser.add_argument(
         "--min-replicas",
-        required=True,
+        required=False,
         type=int,
-        help="Minimum number of replicas for the container app.",
+        help="Minimum number of replicas for the container app. "
+        "Overrides 'min_replicas' in the container config.",
     )
 
     deploy_parser.add_argument(
         "--max-replicas",
-        required=True,
+        required=False,
         type=int,
-        help="Maximum number of replicas for the container app.",
+        help="Maximum number of replicas for the container app. "
+        "Overrides 'max_replicas' in the container config.",
     )
 
     deploy_parser.add_argument(
@@ -447,6 +840,33 @@ def add_commands(subparsers: argparse._SubParsersAction) -> None:
         "(includes image names, cpu, memory, env_vars, probes, ingress, and scale settings)",
     )
 
+    deploy_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            "Resume a failed deploy, skipping completed steps. Uses --revision-suffix if "
+            "given, otherwise the latest unfinished deploy of this app and stage."
+        ),
+    )
+
+    deploy_parser.add_argument(
+        "--journal-dir",
+        required=False,
+        type=Path,
+        default=DEFAULT_JOURNAL_DIR,
+        help=f"Directory for deploy journals used by --resume (default: {DEFAULT_JOURNAL_DIR}).",
+    )
+    deploy_parser.add_argument(
+        "--skip-if-unchanged",
+        action="store_true",
+        help=(
+            "Once images are built, if the app's latest revision of the stage was deployed "
+            "from the same envelope and is healthy, output it instead of deploying."
+        ),
+    )
+    _add_buildx_builder_args(deploy_parser)
+    _add_envelope_cache_dir_arg(deploy_parser)
+
     def tuple_ip(value: str) -> tuple[str, list[str]]:
         if "=" not in value:
             raise argparse.ArgumentTypeError(
@@ -459,14 +879,99 @@ def add_commands(subparsers: argparse._SubParsersAction) -> None:
     deploy_parser.add_argument(
         "--allowed-ips",
         nargs="*",
-        required=True,
+        required=False,
         type=tuple_ip,
         help="List of allowed IP addresses or CIDR ranges for IP restriction. "
-        + "e.g., Name=1.3.5.7/32,2.3.4.3/24 Name2=3.4.5.6/43",
+        + "e.g., Name=1.3.5.7/32,2.3.4.3/24 Name2=3.4.5.6/43. "
+        + "Overrides 'allowed_ips' in the container config.",
     )
 
     deploy_parser.set_defaults(func=cli_deploy)
 
+    deploy_fleet_parser = aca_subparsers.add_parser(
+        "deploy-fleet",
+        help="Deploy many container apps from a fleet manifest",
+        description=(
+            "Deploy every container app in a fleet manifest concurrently, sharing one "
+            f"session. Required env vars: {REGISTRY_USER_SECRET_ENV_NAME} "
+            f"and {REGISTRY_PASS_SECRET_ENV_NAME}."
+        ),
+        add_help=True,
+    )
+
+    deploy_fleet_parser.add_argument(
+        "--manifest",
+        required=True,
+        type=Path,
+        help="Path to the fleet manifest YAML listing apps and their container configs.",
+    )
+
+    deploy_fleet_parser.add_argument(
+        "--stage",
+        required=True,
+        type=str,
+        help="Deployment stage label (e.g., staging, prod) used for revision naming "
+        "and to pick the container config's stage overlay.",
+    )
+
+    deploy_fleet_parser.add_argument(
+        "--revision-suffix",
+        required=False,
+        type=str,
+        help="Revision suffix shared by all apps (default: generated from the stage).",
+    )
+
+    deploy_fleet_parser.add_argument(
+        "--max-concurrency-per-env",
+        required=False,
+        type=int,
+        default=4,
+        help="Maximum concurrent app deploys per container app environment (default: 4).",
+    )
+
+    deploy_fleet_parser.add_argument(
+        "--skip-unchanged",
+        action="store_true",
+        help=(
+            "Skip apps whose planned envelope matches the one of their last deploy to the "
+            "stage, or whose built images match their stage's latest revision."
+        ),
+    )
+
+    _add_buildx_builder_args(deploy_fleet_parser)
+    _add_envelope_cache_dir_arg(deploy_fleet_parser)
+
+    deploy_fleet_parser.set_defaults(func=cli_deploy_fleet)
+
+    plan_parser = aca_subparsers.add_parser(
+        "plan",
+        help="Show which apps of a fleet manifest changed since their last deploy",
+        description=(
+            "Compute the deploy envelope of every app in a fleet manifest locally and "
+            "compare it with the envelope recorded by its last successful deploy. "
+            "Makes no Azure or registry calls."
+        ),
+        add_help=True,
+    )
+
+    plan_parser.add_argument(
+        "--manifest",
+        required=True,
+        type=Path,
+        help="Path to the fleet manifest YAML listing apps and their container configs.",
+    )
+
+    plan_parser.add_argument(
+        "--stage",
+        required=True,
+        type=str,
+        help="Deployment stage label, used to pick the container configs' stage overlays.",
+    )
+
+    _add_envelope_cache_dir_arg(plan_parser)
+
+    plan_parser.set_defaults(func=cli_plan)
+
     # Add update-traffic command
     update_traffic_parser = aca_subparsers.add_parser(
         "update-traffic",
@@ -516,4 +1021,150 @@ def add_commands(subparsers: argparse._SubParsersAction) -> None:
         help="Disable deletion of unused ACR images when deactivating revisions.",
     )
 
+    update_traffic_parser.add_argument(
+        "--wait",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help=(
+            "Wait for the traffic update to complete (default). With --no-wait, return as "
+            "soon as the update is accepted and skip revision deactivation."
+        ),
+    )
+
     update_traffic_parser.set_defaults(func=cli_update_traffic)
+
+    rollout_parser = aca_subparsers.add_parser(
+        "rollout",
+        help="Progressively shift traffic between stage labels",
+        description=(
+            "Step traffic from one stage label to another on a schedule, gating each step "
+            "on revision health and rolling back automatically on failure."
+        ),
+        add_help=True,
+    )
+
+    rollout_parser.add_argument(
+        "--resource-group",
+        required=True,
+        type=str,
+        help="Azure resource group name",
+    )
+
+    rollout_parser.add_argument(
+        "--container-app",
+        required=True,
+        type=str,
+        help="Name of the container app.",
+    )
+
+    rollout_parser.add_argument(
+        "--from-label",
+        required=True,
+        type=str,
+        help="Stage label currently receiving traffic (e.g., prod).",
+    )
+
+    rollout_parser.add_argument(
+        "--to-label",
+        required=True,
+        type=str,
+        help="Stage label to shift traffic to (e.g., staging).",
+    )
+
+    rollout_parser.add_argument(
+        "--steps",
+        required=False,
+        type=int,
+        nargs="+",
+        default=[5, 25, 50, 100],
+        metavar="WEIGHT",
+        help="Increasing traffic weights for the target label (default: 5 25 50 100).",
+    )
+
+    rollout_parser.add_argument(
+        "--step-interval",
+        required=False,
+        type=int,
+        default=60,
+        help="Seconds to wait after each step before checking health (default: 60).",
+    )
+
+    rollout_parser.add_argument(
+        "--health-check-path",
+        required=False,
+        type=str,
+        help="Optional HTTP path checked on the target revision URL after each step.",
+    )
+
+    rollout_parser.set_defaults(func=cli_rollout)
+
+    gc_images_parser = aca_subparsers.add_parser(
+        "gc-images",
+        help="Delete registry images no active revision uses",
+        description=(
+            "List the tags of registry repositories once and delete the images not used "
+            "by any active revision of the given container apps, subject to retention rules."
+        ),
+        add_help=True,
+    )
+
+    gc_images_parser.add_argument(
+        "--resource-group",
+        required=True,
+        type=str,
+        help="Azure resource group name",
+    )
+
+    gc_images_parser.add_argument(
+        "--container-apps",
+        required=True,
+        type=str,
+        nargs="+",
+        help="Container apps whose active revisions keep their images.",
+    )
+
+    gc_images_parser.add_argument(
+        "--registry-server",
+        required=True,
+        type=str,
+        help="Container registry server.",
+    )
+
+    gc_images_parser.add_argument(
+        "--repositories",
+        required=False,
+        type=str,
+        nargs="+",
+        help="Repositories to clean up (default: the repositories the apps use).",
+    )
+
+    gc_images_parser.add_argument(
+        "--keep-last",
+        required=False,
+        type=int,
+        default=DEFAULT_KEEP_LAST,
+        help=f"Newest deploy tags to keep per stage (default: {DEFAULT_KEEP_LAST}).",
+    )
+
+    gc_images_parser.add_argument(
+        "--keep-days",
+        required=False,
+        type=int,
+        help="Also keep deploy tags pushed within this many days.",
+    )
+
+    gc_images_parser.add_argument(
+        "--max-parallel",
+        required=False,
+        type=int,
+        default=DEFAULT_MAX_PARALLEL_DELETES,
+        help=f"Maximum concurrent deletions (default: {DEFAULT_MAX_PARALLEL_DELETES}).",
+    )
+
+    gc_images_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report the images that would be deleted.",
+    )
+
+    gc_images_parser.set_defaults(func=cli_gc_images)
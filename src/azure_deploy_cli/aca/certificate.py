@@ -0,0 +1,278 @@
+"""Managed certificate provisioning and binding for container app custom domains."""
+
+import re
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from azure.mgmt.appcontainers import ContainerAppsAPIClient
+from azure.mgmt.appcontainers.models import (
+    CustomDomain,
+    ManagedCertificate,
+    ManagedCertificateProperties,
+)
+
+from ..utils.logging import get_logger
+from .deploy_aca import patch_container_app_ingress
+from .snapshot import ResourceSnapshot
+
+logger = get_logger(__name__)
+
+DNS_VERIFICATION_TIMEOUT_SECONDS = 120
+CERTIFICATE_PROVISIONING_TIMEOUT_SECONDS = 600
+POLL_INITIAL_DELAY_SECONDS = 5
+POLL_MAX_DELAY_SECONDS = 30
+
+BINDING_TYPE_DISABLED = "Disabled"
+BINDING_TYPE_SNI_ENABLED = "SniEnabled"
+
+
+def _poll_with_backoff(
+    pending: set[str],
+    check: Callable[[set[str]], set[str]],
+    description: str,
+    timeout_seconds: int,
+) -> None:
+    """
+    Poll until every pending domain passes a check, backing off exponentially.
+
+    All pending domains are checked together on each tick, so many domains share one
+    poll schedule instead of each waiting in turn.
+
+    Args:
+        pending: Domains still waiting
+        check: Returns the subset of the given domains that are done
+        description: What is being waited for, for log messages
+        timeout_seconds: Maximum time to wait
+
+    Raises:
+        RuntimeError: If the timeout is reached
+    """
+    start_time = time.time()
+    delay = POLL_INITIAL_DELAY_SECONDS
+    while True:
+        pending = pending - check(pending)
+        if not pending:
+            return
+        elapsed = int(time.time() - start_time)
+        if elapsed >= timeout_seconds:
+            raise RuntimeError(
+                f"Timeout reached after {elapsed}s waiting for {description}: "
+                f"{', '.join(sorted(pending))}"
+            )
+        logger.info(f"Waiting for {description}: {', '.join(sorted(pending))}. {elapsed}s elapsed.")
+        time.sleep(delay)
+        delay = min(delay * 2, POLL_MAX_DELAY_SECONDS)
+
+
+def _managed_certificate_name(domain: str) -> str:
+    return ("mc-" + re.sub(r"[^a-z0-9-]", "-", domain.lower()))[:60].rstrip("-")
+
+
+def _bound_domains(custom_domains: list[CustomDomain]) -> set[str]:
+    return {
+        d.name
+        for d in custom_domains
+        if d.name and d.certificate_id and d.binding_type == BINDING_TYPE_SNI_ENABLED
+    }
+
+
+def _list_managed_certificates(
+    client: ContainerAppsAPIClient,
+    resource_group: str,
+    container_app_env_name: str,
+) -> dict[str, ManagedCertificate]:
+    certificates: dict[str, ManagedCertificate] = {}
+    for cert in client.managed_certificates.list(
+        resource_group_name=resource_group,
+        environment_name=container_app_env_name,
+    ):
+        if cert.properties and cert.properties.subject_name:
+            certificates[cert.properties.subject_name] = cert
+    return certificates
+
+
+def _verified_domains(
+    client: ContainerAppsAPIClient,
+    resource_group: str,
+    container_app_name: str,
+    domains: set[str],
+) -> set[str]:
+    def _is_verified(domain: str) -> bool:
+        analysis = client.container_apps.list_custom_host_name_analysis(
+            resource_group_name=resource_group,
+            container_app_name=container_app_name,
+            custom_hostname=domain,
+        )
+        return bool(
+            analysis.is_hostname_already_verified
+            or analysis.custom_domain_verification_test == "Passed"
+        )
+
+    ordered = sorted(domains)
+    with ThreadPoolExecutor(max_workers=len(ordered)) as executor:
+        results = list(executor.map(_is_verified, ordered))
+    return {domain for domain, verified in zip(ordered, results, strict=True) if verified}
+
+
+def _create_managed_certificate(
+    client: ContainerAppsAPIClient,
+    resource_group: str,
+    container_app_env_name: str,
+    location: str,
+    domain: str,
+) -> None:
+    logger.info(f"Creating managed certificate for '{domain}'...")
+    # Provisioning is tracked by the shared poller, so don't wait on each operation
+    client.managed_certificates.begin_create_or_update(
+        resource_group_name=resource_group,
+        environment_name=container_app_env_name,
+        managed_certificate_name=_managed_certificate_name(domain),
+        managed_certificate_envelope=ManagedCertificate(
+            location=location,
+            properties=ManagedCertificateProperties(
+                subject_name=domain,
+                domain_control_validation="TXT",
+            ),
+        ),
+        polling=False,
+    )
+
+
+def _patch_custom_domains(
+    client: ContainerAppsAPIClient,
+    resource_group: str,
+    container_app_name: str,
+    custom_domains: list[CustomDomain],
+) -> None:
+    patch_container_app_ingress(
+        client,
+        resource_group,
+        container_app_name,
+        {"customDomains": [d.serialize() for d in custom_domains]},
+    )
+
+
+def _provision_managed_certificates(
+    client: ContainerAppsAPIClient,
+    resource_group: str,
+    container_app_env_name: str,
+    location: str,
+    domains: list[str],
+) -> dict[str, ManagedCertificate]:
+    certificates = _list_managed_certificates(client, resource_group, container_app_env_name)
+    missing_certificates = [d for d in domains if d not in certificates]
+    if missing_certificates:
+        with ThreadPoolExecutor(max_workers=len(missing_certificates)) as executor:
+            list(
+                executor.map(
+                    lambda domain: _create_managed_certificate(
+                        client, resource_group, container_app_env_name, location, domain
+                    ),
+                    missing_certificates,
+                )
+            )
+
+    def _provisioned(pending: set[str]) -> set[str]:
+        certificates.update(
+            _list_managed_certificates(client, resource_group, container_app_env_name)
+        )
+        done: set[str] = set()
+        for domain in pending:
+            cert = certificates.get(domain)
+            state = cert.properties.provisioning_state if cert and cert.properties else None
+            if state == "Succeeded":
+                done.add(domain)
+            elif state in ("Failed", "Canceled"):
+                raise RuntimeError(f"Managed certificate for '{domain}' provisioning {state}")
+        return done
+
+    _poll_with_backoff(
+        set(domains),
+        _provisioned,
+        "managed certificate provisioning",
+        CERTIFICATE_PROVISIONING_TIMEOUT_SECONDS,
+    )
+    return certificates
+
+
+def bind_aca_managed_certificate(
+    client: ContainerAppsAPIClient,
+    custom_domains: list[str],
+    container_app_name: str,
+    container_app_env_name: str,
+    resource_group: str,
+    snapshot: ResourceSnapshot | None = None,
+) -> None:
+    """
+    Provision managed certificates for custom domains and bind them to a container app.
+
+    All domains are handled together: DNS verification and certificate provisioning
+    are polled for every domain on a shared backoff schedule, missing certificates are
+    created concurrently, and hostnames are added and bound with one update each.
+    Domains already bound to a certificate are skipped, so when every domain is bound
+    and the snapshot holds the app, no API call is made.
+
+    Args:
+        client: Azure Container Apps API client
+        custom_domains: Custom domains to bind
+        container_app_name: Container app name
+        container_app_env_name: Container app environment name
+        resource_group: Resource group of the app and its environment
+        snapshot: Optional resource snapshot of the deploy; the app and environment are
+            read from it instead of from Azure
+
+    Raises:
+        RuntimeError: If the app has no ingress, DNS verification or certificate
+            provisioning fails, or a timeout is reached
+    """
+    snapshot = snapshot or ResourceSnapshot(
+        client, resource_group, container_app_name, container_app_env_name
+    )
+    app = snapshot.container_app
+    if not app or not app.configuration or not app.configuration.ingress:
+        raise RuntimeError(f"Container app '{container_app_name}' has no ingress configuration")
+    app_domains: dict[str, CustomDomain] = {
+        d.name: d for d in app.configuration.ingress.custom_domains or [] if d.name
+    }
+    bound = _bound_domains(list(app_domains.values()))
+    domains = [d for d in dict.fromkeys(custom_domains) if d not in bound]
+    if not domains:
+        logger.success("All custom domains already have certificates bound. Skipping.")
+        return
+    env = snapshot.managed_environment
+    if not env:
+        raise RuntimeError(f"Container app environment '{container_app_env_name}' not found")
+
+    logger.info(f"Verifying DNS records for {len(domains)} domain(s)...")
+    _poll_with_backoff(
+        set(domains),
+        lambda pending: _verified_domains(client, resource_group, container_app_name, pending),
+        "DNS verification (asuid TXT record)",
+        DNS_VERIFICATION_TIMEOUT_SECONDS,
+    )
+
+    missing_hostnames = [d for d in domains if d not in app_domains]
+    if missing_hostnames:
+        logger.info(f"Adding hostname(s) to container app: {', '.join(missing_hostnames)}")
+        for domain in missing_hostnames:
+            app_domains[domain] = CustomDomain(name=domain, binding_type=BINDING_TYPE_DISABLED)
+        _patch_custom_domains(
+            client, resource_group, container_app_name, list(app_domains.values())
+        )
+        snapshot.invalidate_container_app()
+
+    certificates = _provision_managed_certificates(
+        client, resource_group, container_app_env_name, env.location, domains
+    )
+
+    logger.info(f"Binding certificate(s) to: {', '.join(domains)}")
+    for domain in domains:
+        app_domains[domain] = CustomDomain(
+            name=domain,
+            binding_type=BINDING_TYPE_SNI_ENABLED,
+            certificate_id=certificates[domain].id,
+        )
+    _patch_custom_domains(client, resource_group, container_app_name, list(app_domains.values()))
+    snapshot.invalidate_container_app()
+    logger.success(f"Bound managed certificates to {len(domains)} domain(s).")
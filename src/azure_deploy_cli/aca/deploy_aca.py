@@ -1,10 +1,15 @@
 import datetime
+import heapq
+import io
+import json
 import os
 import subprocess
-import sys
+import threading
 import time
 from collections import defaultdict
-from pathlib import Path
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, cast
 
 from azure.core.exceptions import (
     ClientAuthenticationError,
@@ -38,27 +43,46 @@ from azure.mgmt.appcontainers.models import (
 from azure.mgmt.keyvault.models import SecretCreateOrUpdateParameters, SecretProperties
 
 from ..identity.models import ManagedIdentity
-from ..utils import docker
+from ..utils import docker, registry
 from ..utils.logging import get_logger
+from .journal import STEP_IMAGES, STEP_REVISION, STEP_SECRETS, DeployJournal
 from .model import ContainerConfig, RevisionDeploymentResult, SecretKeyVaultConfig
+from .snapshot import ResourceSnapshot
 
 logger = get_logger(__name__)
 
+# OData filter for listing only active revisions server-side
+ACTIVE_REVISIONS_FILTER = "properties/active eq true"
+# Revisions kept per label when old revisions are not being deactivated
+MAX_REVISIONS_PER_LABEL = 10
+# App tag holding the hash of the planned envelope of the last deploy
+ENVELOPE_HASH_TAG = "azd-envelope-hash"
+
+
+# Registries already logged in to by this process; the docker credential persists
+_acr_logins: set[str] = set()
+_acr_login_lock = threading.Lock()
+
 
 def _login_to_acr(registry_server: str):
-    login_result = subprocess.run(
-        [
-            "az",
-            "acr",
-            "login",
-            "--name",
-            registry_server.split(".")[0],
-        ],
-        capture_output=True,
-        text=True,
-    )
-    if login_result.returncode != 0:
-        raise RuntimeError(f"Failed to login to ACR: {login_result.stderr}")
+    # Held across the login so concurrent builds don't log in to the same registry twice
+    with _acr_login_lock:
+        if registry_server in _acr_logins:
+            return
+        login_result = subprocess.run(
+            [
+                "az",
+                "acr",
+                "login",
+                "--name",
+                registry_server.split(".")[0],
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if login_result.returncode != 0:
+            raise RuntimeError(f"Failed to login to ACR: {login_result.stderr}")
+        _acr_logins.add(registry_server)
 
 
 def build_acr_image(
@@ -67,46 +91,78 @@ def build_acr_image(
     registry_server: str,
     source_full_image_name: str | None = None,
     build_args: dict[str, str] | None = None,
-) -> None:
+    platforms: list[str] | None = None,
+    buildx_builder: str = docker.BUILDX_BUILDER_NAME,
+) -> str | None:
+    remote_digest = registry.get_remote_image_digest(full_image_name)
+    if remote_digest:
+        logger.info(f"Docker image '{full_image_name}' already in registry. Skipping build.")
+        return remote_digest
+
     logger.info(f"Logging in to ACR '{registry_server}'...")
     _login_to_acr(registry_server)
     logger.info("Logged in successfully.")
 
+    digest = _push_acr_image(
+        dockerfile,
+        full_image_name,
+        source_full_image_name,
+        build_args,
+        platforms,
+        buildx_builder,
+    )
+    registry.remember_image_digest(full_image_name, digest)
+    return digest
+
+
+def _push_acr_image(
+    dockerfile: str,
+    full_image_name: str,
+    source_full_image_name: str | None,
+    build_args: dict[str, str] | None,
+    platforms: list[str] | None,
+    buildx_builder: str,
+) -> str | None:
     if docker.image_exists(full_image_name):
         logger.info(f"Docker image '{full_image_name}' found locally. Pushing to registry...")
-        docker.push_image(full_image_name)
+        digest = docker.push_image(full_image_name)
         logger.success(f"Docker image {full_image_name} pushed to registry successfully.")
-        return
+        return digest
 
     if source_full_image_name:
         logger.info(
             f"Docker image '{full_image_name}' not found locally. "
             f"Retagging from existing image '{source_full_image_name}'..."
         )
-        docker.pull_retag_and_push_image(
+        digest = docker.pull_retag_and_push_image(
             source_full_image_name,
             full_image_name,
         )
         logger.success(f"Docker image '{full_image_name}' pushed to registry successfully.")
-        return
+        return digest
 
     logger.info(f"Building Docker image '{full_image_name}' from Dockerfile '{dockerfile}'...")
-    docker.build_and_push_image(
+    digest = docker.build_and_push_image(
         dockerfile,
         full_image_name,
         build_args=build_args,
+        platforms=platforms,
+        builder=docker.ensure_buildx_builder(buildx_builder),
     )
     logger.success("Docker image built and pushed to registry successfully.")
+    return digest
 
 
-def delete_acr_image(registry_server: str, full_image_name: str) -> None:
+def delete_acr_image(registry_server: str, full_image_name: str) -> bool:
     """
     Delete an image from Azure Container Registry.
 
     Args:
         registry_server: ACR server name (e.g., myregistry.azurecr.io)
-        image_name: Name of the image repository
-        image_tag: Tag of the image to delete
+        full_image_name: Image to delete as 'repository:tag' or 'repository@digest'
+
+    Returns:
+        True if the image was deleted, False if the deletion failed
     """
     registry_name = registry_server.split(".")[0]
 
@@ -133,38 +189,9 @@ def delete_acr_image(registry_server: str, full_image_name: str) -> None:
         logger.warning(
             f"Failed to delete ACR image '{full_image_name}': {delete_result.stderr.strip()}"
         )
-    else:
-        logger.info(f"ACR image '{full_image_name}' deleted successfully")
-
-
-def bind_aca_managed_certificate(
-    custom_domains: list[str],
-    container_app_name: str,
-    container_app_env_name: str,
-    resource_group: str,
-):
-    result = subprocess.run(
-        [
-            "bash",
-            str(Path(__file__).parent / "bash" / "aca-cert" / "create.sh"),
-            "--custom-domains",
-            ",".join(custom_domains),
-            "--container-app-name",
-            container_app_name,
-            "--resource-group",
-            resource_group,
-            "--env-resource-group",
-            resource_group,
-            "--container-app-env-name",
-            container_app_env_name,
-        ],
-        env=os.environ.copy(),
-        stdout=sys.stderr,
-        stderr=sys.stderr,
-    )
-    if result.returncode != 0:
-        logger.error("Failed to bind certificate using aca-cert script.")
-        raise RuntimeError("Certificate binding failed.")
+        return False
+    logger.info(f"ACR image '{full_image_name}' deleted successfully")
+    return True
 
 
 def create_container_app_env(
@@ -173,79 +200,283 @@ def create_container_app_env(
     container_app_env_name: str,
     location: str,
     logs_workspace_id: str,
-) -> ManagedEnvironment | None:
-    logger.info(f"Checking for Container App Environment '{container_app_env_name}'...")
-    try:
-        client.managed_environments.get(resource_group, container_app_env_name)
-        logger.success("Container App Environment already exists.")
-    except ResourceNotFoundError:
-        logger.info("Container App Environment not found. Creating a new one...")
-        env_poller = client.managed_environments.begin_create_or_update(
-            resource_group,
-            container_app_env_name,
-            environment_envelope=ManagedEnvironment(
-                location=location,
-                app_logs_configuration=AppLogsConfiguration(
-                    destination="log-analytics",
-                    log_analytics_configuration=LogAnalyticsConfiguration(
-                        customer_id=logs_workspace_id
-                    ),
+    container_app_env_id: str | None = None,
+    known_missing: bool = False,
+) -> ManagedEnvironment:
+    """
+    Get a container app environment, creating it if it does not exist.
+
+    Args:
+        client: Azure Container Apps API client
+        resource_group: Resource group name
+        container_app_env_name: Container app environment name
+        location: Azure location, used for creation
+        logs_workspace_id: Log Analytics workspace ID, used for creation
+        container_app_env_id: Resource ID of an environment known to exist. If given,
+            no lookup is made and a reference to it is returned.
+        known_missing: Whether the caller already found the environment does not exist.
+            If True, it is created without looking it up first.
+
+    Returns:
+        The existing or created environment
+    """
+    if container_app_env_id:
+        logger.info(f"Using Container App Environment '{container_app_env_id}'.")
+        env = ManagedEnvironment(location=location)
+        env.id = container_app_env_id
+        env.name = container_app_env_name
+        return env
+
+    if known_missing:
+        logger.info(
+            f"Container App Environment '{container_app_env_name}' not found. Creating it..."
+        )
+    else:
+        logger.info(f"Checking for Container App Environment '{container_app_env_name}'...")
+        try:
+            env = client.managed_environments.get(resource_group, container_app_env_name)
+            logger.success("Container App Environment already exists.")
+            return env
+        except ResourceNotFoundError:
+            logger.info("Container App Environment not found. Creating a new one...")
+
+    env_poller = client.managed_environments.begin_create_or_update(
+        resource_group,
+        container_app_env_name,
+        environment_envelope=ManagedEnvironment(
+            location=location,
+            app_logs_configuration=AppLogsConfiguration(
+                destination="log-analytics",
+                log_analytics_configuration=LogAnalyticsConfiguration(
+                    customer_id=logs_workspace_id
                 ),
             ),
-        )
-        env_poller.result()
-        logger.success("Container App Environment created successfully.")
+        ),
+    )
+    env = env_poller.result()
+    logger.success("Container App Environment created successfully.")
+    return env
 
-    try:
-        env = client.managed_environments.get(resource_group, container_app_env_name)
-        return env
-    except ResourceNotFoundError:
-        return None
+
+def build_ip_rules(allowed_ips: list[tuple[str, list[str]]]) -> list[IpSecurityRestrictionRule]:
+    """
+    Build ingress allow rules from named groups of CIDR ranges.
+
+    Args:
+        allowed_ips: List of (name, cidr_ranges) pairs
+
+    Returns:
+        One allow rule per CIDR range, named '<name>-<index>'
+    """
+    ip_rules: list[IpSecurityRestrictionRule] = []
+    for name, cidr_ranges in allowed_ips:
+        for idx, cidr_range in enumerate(cidr_ranges):
+            ip_rules.append(
+                IpSecurityRestrictionRule(
+                    name=f"{name}-{idx + 1}",
+                    action="Allow",
+                    ip_address_range=cidr_range,
+                    description=f"Allowed {name} IP range",
+                )
+            )
+    return ip_rules
+
+
+def _build_container_image(
+    container_config: ContainerConfig,
+    registry_server: str,
+    revision_suffix: str,
+    journal: DeployJournal | None,
+    buildx_builder: str,
+    env_values: Mapping[str, str] | None,
+) -> str:
+    image_tag = revision_suffix
+    target_full_image_name = get_aca_docker_image_name(
+        registry_server, container_config.image_name, image_tag
+    )
+
+    if container_config.existing_image_tag:
+        logger.info(
+            f"Retagging existing image '{container_config.image_name}:"
+            f"{container_config.existing_image_tag}' to '{image_tag}'..."
+        )
+        source_full_image_name = get_aca_docker_image_name(
+            registry_server, container_config.image_name, container_config.existing_image_tag
+        )
+        _login_to_acr(registry_server)
+        digest = docker.pull_retag_and_push_image(
+            source_full_image_name,
+            target_full_image_name,
+            container_config.existing_image_platform,
+        )
+        target_full_image_name = docker.pin_image_digest(target_full_image_name, digest)
+        logger.success(f"Image retagged successfully to '{image_tag}'")
+    elif container_config.dockerfile:
+        logger.info(
+            f"Building image '{container_config.image_name}' from "
+            f"Dockerfile '{container_config.dockerfile}'..."
+        )
+        digest = build_acr_image(
+            dockerfile=container_config.dockerfile,
+            full_image_name=target_full_image_name,
+            registry_server=registry_server,
+            build_args=load_env_vars(container_config.build_args, env_values),
+            platforms=container_config.platforms,
+            buildx_builder=buildx_builder,
+        )
+        target_full_image_name = docker.pin_image_digest(target_full_image_name, digest)
+        logger.success(f"Image '{container_config.image_name}' built successfully")
+    if journal:
+        journal.record_item(STEP_IMAGES, container_config.name, target_full_image_name)
+    return target_full_image_name
 
 
 def build_container_images(
     container_configs: list[ContainerConfig],
     registry_server: str,
     revision_suffix: str,
+    journal: DeployJournal | None = None,
+    buildx_builder: str = docker.BUILDX_BUILDER_NAME,
+    env_values: Mapping[str, str] | None = None,
 ) -> list[str]:
-    image_names = []
+    """
+    Build, retag and push the images of all containers concurrently.
 
-    for container_config in container_configs:
-        image_tag = revision_suffix
-        target_full_image_name = get_aca_docker_image_name(
-            registry_server, container_config.image_name, image_tag
-        )
+    Output of the concurrent builds is logged with each image name as prefix. Build
+    arguments are looked up in ``env_values``, if given, instead of the environment.
 
-        if container_config.existing_image_tag:
-            logger.info(
-                f"Retagging existing image '{container_config.image_name}:"
-                f"{container_config.existing_image_tag}' to '{image_tag}'..."
-            )
-            source_full_image_name = get_aca_docker_image_name(
-                registry_server, container_config.image_name, container_config.existing_image_tag
-            )
-            _login_to_acr(registry_server)
-            docker.pull_retag_and_push_image(
-                source_full_image_name,
-                target_full_image_name,
-                container_config.existing_image_platform,
-            )
-            logger.success(f"Image retagged successfully to '{image_tag}'")
-        elif container_config.dockerfile:
+    Returns:
+        Full image names, pinned to their digests, in container order
+    """
+    built_images: dict[str, str] = (journal.get(STEP_IMAGES) if journal else None) or {}
+
+    def _build(container_config: ContainerConfig) -> str:
+        if container_config.name in built_images:
             logger.info(
-                f"Building image '{container_config.image_name}' from "
-                f"Dockerfile '{container_config.dockerfile}'..."
+                f"Image for container '{container_config.name}' already built in this deploy. "
+                "Skipping."
             )
-            build_acr_image(
-                dockerfile=container_config.dockerfile,
-                full_image_name=target_full_image_name,
-                registry_server=registry_server,
-                build_args=_load_env_vars(container_config.build_args),
-            )
-            logger.success("Image built successfully")
-        image_names.append(target_full_image_name)
+            return built_images[container_config.name]
+        return _build_container_image(
+            container_config, registry_server, revision_suffix, journal, buildx_builder, env_values
+        )
 
-    return image_names
+    with ThreadPoolExecutor(max_workers=len(container_configs) or 1) as executor:
+        return list(executor.map(_build, container_configs))
+
+
+def _begin_container_app_deploy(
+    client: ContainerAppsAPIClient,
+    resource_group: str,
+    container_app_name: str,
+    snapshot: ResourceSnapshot | None,
+    begin_deploy: Callable[[ContainerApp | None, str | None], Any],
+) -> Any:
+    if not snapshot:
+        return begin_deploy(_get_container_app(client, resource_group, container_app_name), None)
+    # The snapshot may have been read long before this PUT (e.g. before image builds),
+    # so the PUT is guarded by its ETag and the app is re-read once if it changed
+    try:
+        return begin_deploy(snapshot.container_app, snapshot.container_app_etag)
+    except HttpResponseError as e:
+        if e.status_code != 412:
+            raise
+    logger.warning(
+        f"Container app '{container_app_name}' changed since it was read. "
+        "Re-reading its traffic before deploying..."
+    )
+    snapshot.invalidate_container_app()
+    return begin_deploy(snapshot.container_app, snapshot.container_app_etag)
+
+
+def build_container_app_envelope(
+    location: str,
+    environment_id: str | None,
+    user_identity_resource_id: str,
+    registry_server: str,
+    registry_user: str,
+    registry_pass_env_name: str,
+    secrets: list[Secret],
+    containers: list[Container],
+    target_port: int,
+    ingress_external: bool,
+    ingress_transport: str,
+    min_replicas: int,
+    max_replicas: int,
+    ip_rules: list[IpSecurityRestrictionRule],
+    revision_suffix: str | None = None,
+    existing_app: ContainerApp | None = None,
+    tags: dict[str, str] | None = None,
+) -> ContainerApp:
+    """
+    Build the ContainerApp envelope deployed for a new revision.
+
+    Building the envelope makes no Azure calls. The traffic weights, custom domains and
+    tags of ``existing_app`` are carried over, so deploying the envelope does not move
+    traffic.
+
+    Args:
+        location: Azure location
+        environment_id: Resource ID of the container app environment
+        user_identity_resource_id: Resource ID of the user-assigned identity
+        registry_server: Container registry server URL
+        registry_user: Registry username
+        registry_pass_env_name: Name of the registry password environment variable
+        secrets: Container app secrets
+        containers: Container definitions
+        target_port: Target port for ingress
+        ingress_external: Whether ingress is external
+        ingress_transport: Ingress transport protocol
+        min_replicas: Minimum number of replicas
+        max_replicas: Maximum number of replicas
+        ip_rules: Ingress IP restriction rules
+        revision_suffix: Revision suffix; None leaves it unset
+        existing_app: Currently deployed app, if any
+        tags: Tags to set on the app, on top of its existing tags
+
+    Returns:
+        The ContainerApp envelope
+    """
+    existing_traffic_weights = None
+    existing_custom_domains = None
+    if existing_app and existing_app.configuration and existing_app.configuration.ingress:
+        existing_traffic_weights = existing_app.configuration.ingress.traffic
+        existing_custom_domains = existing_app.configuration.ingress.custom_domains
+    ingress = Ingress(
+        external=ingress_external,
+        target_port=target_port,
+        transport=ingress_transport,
+        traffic=existing_traffic_weights,  # Preserve existing traffic
+        custom_domains=existing_custom_domains,
+        ip_security_restrictions=ip_rules,
+    )
+    app_tags = {**((existing_app.tags if existing_app else None) or {}), **(tags or {})}
+    return ContainerApp(
+        location=location,
+        tags=app_tags or None,
+        environment_id=environment_id,
+        configuration=ContainerAppConfiguration(
+            ingress=ingress,
+            registries=[
+                RegistryCredentials(
+                    server=registry_server,
+                    username=registry_user,
+                    password_secret_ref=sanitize_secret_name(registry_pass_env_name),
+                )
+            ],
+            secrets=secrets,
+            active_revisions_mode=ActiveRevisionsMode.MULTIPLE,
+        ),
+        template=Template(
+            revision_suffix=revision_suffix,
+            containers=containers,
+            scale=Scale(min_replicas=min_replicas, max_replicas=max_replicas),
+        ),
+        identity=ManagedServiceIdentity(
+            type="UserAssigned",
+            user_assigned_identities={user_identity_resource_id: UserAssignedIdentity()},
+        ),
+    )
 
 
 def deploy_revision(
@@ -269,6 +500,12 @@ def deploy_revision(
     max_replicas: int,
     secret_key_vault_config: SecretKeyVaultConfig,
     ip_rules: list[IpSecurityRestrictionRule],
+    journal: DeployJournal | None = None,
+    snapshot: ResourceSnapshot | None = None,
+    buildx_builder: str = docker.BUILDX_BUILDER_NAME,
+    tags: dict[str, str] | None = None,
+    hash_envelope: Callable[[list[str]], str] | None = None,
+    skip_if_unchanged: bool = False,
 ) -> RevisionDeploymentResult:
     """
     Deploy a new revision with multiple containers without updating traffic weights.
@@ -297,9 +534,21 @@ def deploy_revision(
         min_replicas: Minimum number of replicas
         max_replicas: Maximum number of replicas
         secret_key_vault_config: Key Vault configuration for secrets
+        ip_rules: Ingress IP restriction rules
+        journal: Optional deploy journal; completed steps recorded in it are skipped
+        snapshot: Optional resource snapshot; the existing app is read from it and the
+            deployed app is stored in it
+        buildx_builder: Name of the persistent buildx builder used for image builds
+        tags: Tags to set on the container app
+        hash_envelope: Hashes the app's envelope given the built images, pinned by
+            digest; the hash is stored in the ``ENVELOPE_HASH_TAG`` tag
+        skip_if_unchanged: If True, an app whose latest revision of ``stage`` was
+            deployed from the same envelope hash is not deployed again, once its
+            images are built
 
     Returns:
-        RevisionDeploymentResult with revision name and status information
+        RevisionDeploymentResult with revision name and status information; its
+        ``skipped`` flag is set if an unchanged revision was returned instead
 
     Raises:
         RuntimeError: If the deployment fails or image operations fail
@@ -310,18 +559,36 @@ def deploy_revision(
     logger.info(f"Building and deploying {len(container_configs)} container(s)...")
 
     secret_key_vault_config.secret_names.append(registry_pass_env_name)
-    secrets, env_vars_dict = _prepare_secrets_and_env_vars(
+    env_var_names = [
+        env_var for container_config in container_configs for env_var in container_config.env_vars
+    ]
+    # Every variable is read once up front, so all missing ones are reported together.
+    # Secrets already stored by a resumed deploy are not needed again.
+    recorded_secrets = (journal.get(STEP_SECRETS) if journal else None) or {}
+    secret_names = [
+        name for name in secret_key_vault_config.secret_names if name not in recorded_secrets
+    ]
+    build_arg_names = [
+        name for container_config in container_configs for name in container_config.build_args
+    ]
+    env_values = load_env_vars([*env_var_names, *secret_names, *build_arg_names])
+    secrets, env_table = _prepare_secrets_and_env_vars(
         secret_config=secret_key_vault_config,
         subscription_id=subscription_id,
-        env_var_names=[
-            env_var
-            for container_config in container_configs
-            for env_var in container_config.env_vars
-        ],
+        env_var_names=env_var_names,
+        env_values=env_values,
         resource_group=resource_group,
+        journal=journal,
     )
 
-    full_image_names = build_container_images(container_configs, registry_server, revision_suffix)
+    full_image_names = build_container_images(
+        container_configs,
+        registry_server,
+        revision_suffix,
+        journal=journal,
+        buildx_builder=buildx_builder,
+        env_values=env_values,
+    )
     if len(full_image_names) != len(container_configs):
         raise RuntimeError("Mismatch in number of built images and container configurations.")
 
@@ -330,14 +597,11 @@ def deploy_revision(
     for target_full_image_name, container_config in zip(
         full_image_names, container_configs, strict=True
     ):
-        container_env_vars = [
-            env_var for env_var in env_vars_dict if env_var.name in container_config.env_vars
-        ]
         containers.append(
             Container(
                 image=target_full_image_name,
                 name=container_config.name,
-                env=container_env_vars,
+                env=[env_table[name] for name in dict.fromkeys(container_config.env_vars)],
                 resources=ContainerResources(
                     cpu=container_config.cpu, memory=container_config.memory
                 ),
@@ -345,62 +609,82 @@ def deploy_revision(
             )
         )
 
-    # prepare ingress with existing traffic weights
-    existing_app = _get_container_app(client, resource_group, container_app_name)
-    existing_traffic_weights = None
-    existing_custom_domains = None
-    if existing_app and existing_app.configuration and existing_app.configuration.ingress:
-        existing_traffic_weights = existing_app.configuration.ingress.traffic
-        existing_custom_domains = existing_app.configuration.ingress.custom_domains
-    ingress: Ingress = Ingress(
-        external=ingress_external,
-        target_port=target_port,
-        transport=ingress_transport,
-        traffic=existing_traffic_weights,  # Preserve existing traffic
-        custom_domains=existing_custom_domains,
-        ip_security_restrictions=ip_rules,
-    )
-
     revision_name = generate_revision_name(container_app_name, revision_suffix, stage)
-    logger.info(f"Deploying revision '{revision_name}' with existing traffic preserved")
-    poller = client.container_apps.begin_create_or_update(
-        resource_group_name=resource_group,
-        container_app_name=container_app_name,
-        container_app_envelope=ContainerApp(
-            location=location,
-            environment_id=container_app_env.id,
-            configuration=ContainerAppConfiguration(
-                ingress=ingress,
-                registries=[
-                    RegistryCredentials(
-                        server=registry_server,
-                        username=registry_user,
-                        password_secret_ref=_sanitize_secret_name(registry_pass_env_name),
-                    )
-                ],
-                secrets=secrets,
-                active_revisions_mode=ActiveRevisionsMode.MULTIPLE,
-            ),
-            template=Template(
-                revision_suffix=revision_suffix,
-                containers=containers,
-                scale=Scale(min_replicas=min_replicas, max_replicas=max_replicas),
-            ),
-            identity=ManagedServiceIdentity(
-                type="UserAssigned",
-                user_assigned_identities={user_identity.resourceId: UserAssignedIdentity()},
-            ),
-        ),
-    )
-    logger.info("Waiting for revision deployment to complete...")
-    poller.result()
+    tags = dict(tags or {})
+    if hash_envelope:
+        tags[ENVELOPE_HASH_TAG] = hash_envelope(full_image_names)
+        if skip_if_unchanged and not (journal and journal.is_done(STEP_REVISION)):
+            unchanged = get_unchanged_revision(
+                client,
+                resource_group,
+                container_app_name,
+                snapshot.container_app
+                if snapshot
+                else _get_container_app(client, resource_group, container_app_name),
+                tags[ENVELOPE_HASH_TAG],
+                stage,
+            )
+            if unchanged:
+                return unchanged
+
+    if journal and journal.is_done(STEP_REVISION):
+        logger.info(f"Revision '{revision_name}' already created in this deploy. Skipping.")
+    else:
+
+        def _begin_deploy(existing_app: ContainerApp | None, etag: str | None) -> Any:
+            logger.info(f"Deploying revision '{revision_name}' with existing traffic preserved")
+            return client.container_apps.begin_create_or_update(
+                resource_group_name=resource_group,
+                container_app_name=container_app_name,
+                container_app_envelope=build_container_app_envelope(
+                    location=location,
+                    environment_id=container_app_env.id,
+                    user_identity_resource_id=user_identity.resourceId,
+                    registry_server=registry_server,
+                    registry_user=registry_user,
+                    registry_pass_env_name=registry_pass_env_name,
+                    secrets=secrets,
+                    containers=containers,
+                    target_port=target_port,
+                    ingress_external=ingress_external,
+                    ingress_transport=ingress_transport,
+                    min_replicas=min_replicas,
+                    max_replicas=max_replicas,
+                    ip_rules=ip_rules,
+                    revision_suffix=revision_suffix,
+                    existing_app=existing_app,
+                    tags=tags,
+                ),
+                headers={"If-Match": etag} if etag else {},
+            )
+
+        poller = _begin_container_app_deploy(
+            client, resource_group, container_app_name, snapshot, _begin_deploy
+        )
+        logger.info("Waiting for revision deployment to complete...")
+        deployed_app = poller.result()
+        if snapshot:
+            snapshot.set_container_app(deployed_app)
+        if journal:
+            journal.record(STEP_REVISION, revision_name)
 
     logger.info(f"Fetching revision '{revision_name}' details...")
     revision = _wait_for_revision_activation(
         client, resource_group, container_app_name, revision_name
     )
 
-    result = RevisionDeploymentResult(
+    result = _revision_result(revision, revision_name)
+
+    logger.info(
+        f"Revision deployed: active={result.active}, health={result.health_state}, "
+        f"provisioning={result.provisioning_state}, running={result.running_state}"
+    )
+
+    return result
+
+
+def _revision_result(revision: Revision, revision_name: str) -> RevisionDeploymentResult:
+    return RevisionDeploymentResult(
         revision_name=revision.name or revision_name,
         active=revision.active or False,
         health_state=str(revision.health_state) if revision.health_state else "Unknown",
@@ -411,11 +695,55 @@ def deploy_revision(
         revision_url=revision.fqdn,
     )
 
-    logger.info(
-        f"Revision deployed: active={result.active}, health={result.health_state}, "
-        f"provisioning={result.provisioning_state}, running={result.running_state}"
-    )
 
+def get_unchanged_revision(
+    client: ContainerAppsAPIClient,
+    resource_group: str,
+    container_app_name: str,
+    container_app: ContainerApp | None,
+    envelope_hash: str,
+    stage: str,
+) -> RevisionDeploymentResult | None:
+    """
+    Return the app's latest revision if it was deployed to the stage from the same envelope.
+
+    The envelope hash of each deploy is stored in the ``ENVELOPE_HASH_TAG`` tag of the
+    app, so an unchanged deploy is detected with the app already read and one read of
+    its latest revision. The envelope does not include the stage, so the latest
+    revision must carry the stage's label: a staging revision never stands in for prod.
+
+    Args:
+        client: ContainerAppsAPIClient instance
+        resource_group: Resource group name
+        container_app_name: Name of the container app
+        container_app: The deployed container app, or None if it does not exist
+        envelope_hash: Hash of the envelope about to be deployed
+        stage: Stage label of the deploy
+
+    Returns:
+        The latest revision, flagged as skipped, if it belongs to the stage, its
+        envelope hash matches and it is healthy, else None
+    """
+    if (
+        not container_app
+        or not container_app.latest_revision_name
+        or (container_app.tags or {}).get(ENVELOPE_HASH_TAG) != envelope_hash
+        or _get_label_from_rev_name(container_app.latest_revision_name, container_app_name) != stage
+    ):
+        return None
+    revision = client.container_apps_revisions.get_revision(
+        resource_group_name=resource_group,
+        container_app_name=container_app_name,
+        revision_name=container_app.latest_revision_name,
+    )
+    result = _revision_result(revision, container_app.latest_revision_name)
+    if not result.is_healthy:
+        logger.info(
+            f"Revision '{result.revision_name}' matches but is not healthy. Deploying anew."
+        )
+        return None
+    logger.info(f"Revision '{result.revision_name}' was deployed from the same envelope.")
+    result.skipped = True
     return result
 
 
@@ -474,39 +802,54 @@ def _prepare_secrets_and_env_vars(
     secret_config: SecretKeyVaultConfig,
     subscription_id: str,
     env_var_names: list[str],
+    env_values: Mapping[str, str],
     resource_group: str,
-) -> tuple[list[Secret], list[EnvironmentVar]]:
-    env_vars: dict[str, str] = _load_env_vars(env_var_names)
+    journal: DeployJournal | None = None,
+) -> tuple[list[Secret], dict[str, EnvironmentVar]]:
+    """
+    Store the secrets in Key Vault and build the environment variables of all containers.
+
+    Returns:
+        The container app secrets, and each environment variable by name, referencing
+        its secret if it is one and holding its value otherwise
+    """
+    secret_uris: dict[str, str] = (journal.get(STEP_SECRETS) if journal else None) or {}
 
     logger.info(f"Processing secrets for Key Vault '{secret_config.key_vault_name}'...")
 
     secrets: list[Secret] = []
-    envs: list[EnvironmentVar] = []
-    for secret_name in list(set(secret_config.secret_names)):
-        logger.info(
-            f"Setting secret '{secret_name}' in Key Vault '{secret_config.key_vault_name}'..."
-        )
-        if secret_name not in os.environ:
-            raise ValueError(f"Environment variable '{secret_name}' is not set in the environment.")
-        secret, env_var = _prepare_secret_and_env(
-            secret_name=secret_name,
-            secret_value=os.environ[secret_name],
-            user_identity_resource_id=secret_config.user_identity.resourceId,
-            secret_config=secret_config,
-            resource_group=resource_group,
-        )
+    env_table: dict[str, EnvironmentVar] = {}
+    for secret_name in dict.fromkeys(secret_config.secret_names):
+        if secret_name in secret_uris:
+            logger.info(f"Secret '{secret_name}' already set in this deploy. Skipping.")
+            secret, env_var = _secret_and_env_from_uri(
+                secret_name, secret_uris[secret_name], secret_config.user_identity.resourceId
+            )
+        else:
+            logger.info(
+                f"Setting secret '{secret_name}' in Key Vault '{secret_config.key_vault_name}'..."
+            )
+            secret, env_var = _prepare_secret_and_env(
+                secret_name=secret_name,
+                secret_value=env_values[secret_name],
+                user_identity_resource_id=secret_config.user_identity.resourceId,
+                secret_config=secret_config,
+                resource_group=resource_group,
+            )
+            if journal and secret.key_vault_url:
+                journal.record_item(STEP_SECRETS, secret_name, secret.key_vault_url)
         secrets.append(secret)
-        envs.append(env_var)
-        if secret_name in env_vars:
-            del env_vars[secret_name]  # Remove from plain env vars
+        env_table[secret_name] = env_var
 
-    for key, value in env_vars.items():
-        envs.append(EnvironmentVar(name=key, value=value))
+    for name in env_var_names:
+        if name not in env_table:
+            env_table[name] = EnvironmentVar(name=name, value=env_values[name])
 
-    return secrets, envs
+    return secrets, env_table
 
 
-def _sanitize_secret_name(name: str) -> str:
+def sanitize_secret_name(name: str) -> str:
+    """Turn an environment variable name into a valid container app secret name."""
     return name.replace("_", "-").lower()
 
 
@@ -517,31 +860,55 @@ def _prepare_secret_and_env(
     secret_config: SecretKeyVaultConfig,
     resource_group: str,
 ) -> tuple[Secret, EnvironmentVar]:
-    sanitized_name = _sanitize_secret_name(secret_name)
+    sanitized_name = sanitize_secret_name(secret_name)
     secret_result = secret_config.key_vault_client.secrets.create_or_update(
         resource_group_name=resource_group,
         vault_name=secret_config.key_vault_name,
         secret_name=sanitized_name,
         parameters=SecretCreateOrUpdateParameters(properties=SecretProperties(value=secret_value)),
     )
+    return _secret_and_env_from_uri(
+        secret_name, secret_result.properties.secret_uri, secret_config.user_identity.resourceId
+    )
+
+
+def _secret_and_env_from_uri(
+    secret_name: str,
+    secret_uri: str | None,
+    user_identity_resource_id: str,
+) -> tuple[Secret, EnvironmentVar]:
+    sanitized_name = sanitize_secret_name(secret_name)
     secret = Secret(
         name=sanitized_name,
-        key_vault_url=secret_result.properties.secret_uri,
-        identity=secret_config.user_identity.resourceId,
+        key_vault_url=secret_uri,
+        identity=user_identity_resource_id,
     )
     env_var = EnvironmentVar(name=secret_name, secret_ref=sanitized_name)
     return secret, env_var
 
 
-def _load_env_vars(env_var_names: list[str]) -> dict[str, str]:
-    env_var_dict = {}
-    for var_name in env_var_names:
-        if var_name in os.environ:
-            env_var_dict[var_name] = os.environ[var_name]
-        else:
-            raise ValueError(f"Environment variable '{var_name}' is not set in the environment.")
+def load_env_vars(
+    env_var_names: Iterable[str], env_values: Mapping[str, str] | None = None
+) -> dict[str, str]:
+    """
+    Look up environment variables, reporting every missing one in a single error.
 
-    return env_var_dict
+    Args:
+        env_var_names: Names to look up; duplicates are looked up once
+        env_values: Values to look them up in (default: os.environ)
+
+    Returns:
+        Each name mapped to its value, in first-seen order
+
+    Raises:
+        ValueError: If any of the variables is not set
+    """
+    env_values = os.environ if env_values is None else env_values
+    names = list(dict.fromkeys(env_var_names))
+    missing = [name for name in names if name not in env_values]
+    if missing:
+        raise ValueError(f"Environment variables not set in the environment: {', '.join(missing)}")
+    return {name: env_values[name] for name in names}
 
 
 def _traffic_weight_str(
@@ -551,7 +918,7 @@ def _traffic_weight_str(
     for t in traffic_weight:
         rev_name = t.revision_name
         found_revision = next((rev for rev in selected_revision if rev.name == rev_name), None)
-        is_healthy = _is_revision_healthy(found_revision) if found_revision else False
+        is_healthy = is_revision_healthy(found_revision) if found_revision else False
         parts.append(f"{t.label}:{t.as_dict()}%->{rev_name} (healthy={is_healthy})")
     return " | ".join(parts)
 
@@ -567,39 +934,88 @@ def _get_label_from_rev_name(rev_name: str, container_app_name: str) -> str | No
     return None
 
 
-def _get_active_revisions_by_label_group(
+def iter_active_revisions(
+    client: ContainerAppsAPIClient,
+    resource_group: str,
+    container_app_name: str,
+) -> Iterator[Revision]:
+    """
+    Stream the active revisions of a container app page by page.
+
+    The listing is filtered server-side with an OData ``$filter`` so inactive
+    historical revisions are never paged through. If the API rejects the filter,
+    the listing falls back to an unfiltered one; callers still check ``active``.
+    """
+    try:
+        yield from client.container_apps_revisions.list_revisions(
+            resource_group_name=resource_group,
+            container_app_name=container_app_name,
+            filter=ACTIVE_REVISIONS_FILTER,
+        )
+    except HttpResponseError as e:
+        if e.status_code != 400:
+            raise
+        logger.warning(
+            f"Revision filter '{ACTIVE_REVISIONS_FILTER}' not supported, "
+            "falling back to unfiltered listing"
+        )
+        yield from client.container_apps_revisions.list_revisions(
+            resource_group_name=resource_group,
+            container_app_name=container_app_name,
+        )
+
+
+def get_active_revisions_by_label_group(
     client: ContainerAppsAPIClient,
     resource_group: str,
     container_app_name: str,
     labels: set[str],
+    max_per_label: int | None = None,
 ) -> dict[str, list[Revision]]:
-    revision_results = client.container_apps_revisions.list_revisions(
-        resource_group_name=resource_group,
-        container_app_name=container_app_name,
-    )
+    """
+    Group active revisions by their stage label, sorted oldest to newest.
 
-    all_revisions = list(revision_results)
+    Args:
+        client: Azure Container Apps API client
+        resource_group: Resource group name
+        container_app_name: Container app name
+        labels: Stage labels to collect revisions for
+        max_per_label: If set, keep only the newest N revisions per label
 
-    label_group: dict[str, list] = defaultdict(list)
-    for rev in all_revisions:
+    Returns:
+        Dictionary mapping labels to their revisions, oldest first
+    """
+    # Min-heaps keyed by revision name (names embed a sortable timestamp), so the
+    # oldest entry is evicted first once a label reaches max_per_label.
+    label_heaps: dict[str, list[tuple[str, int, Revision]]] = defaultdict(list)
+    seen: set[str] = set()
+    for idx, rev in enumerate(iter_active_revisions(client, resource_group, container_app_name)):
         if not rev.active:
             continue
-        if not rev.name:
+        if not rev.name or rev.name in seen:
             continue
         label = _get_label_from_rev_name(rev.name, container_app_name)
         if not label:
             continue
         if label not in labels:
             continue
-        label_group[label].append(rev)
+        seen.add(rev.name)
+        heap = label_heaps[label]
+        entry = (rev.name, idx, rev)
+        if max_per_label is None or len(heap) < max_per_label:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
 
-    for label in label_group.keys():
-        label_group[label] = sorted(label_group[label], key=lambda r: r.name or "")
+    label_group: dict[str, list] = defaultdict(list)
+    for label, heap in label_heaps.items():
+        label_group[label] = [rev for _, _, rev in sorted(heap)]
 
     return label_group
 
 
-def _is_revision_healthy(rev: Revision) -> bool:
+def is_revision_healthy(rev: Revision) -> bool:
+    """Whether a revision is active, healthy and provisioned, and not stopped or failing."""
     return (
         (rev.active or False)
         and rev.health_state == "Healthy"
@@ -623,17 +1039,29 @@ def _filter_healthy_revisions(revisions: list[Revision]) -> list[Revision]:
     return healthy_revisions
 
 
-def _get_latest_revision_by_label(
+def get_latest_revision_by_label(
     label_revision_groups: dict[str, list[Revision]],
     label: str,
     require_healthy: bool = False,
 ) -> Revision | None:
+    """
+    Pick the newest healthy revision of a label group.
+
+    Args:
+        label_revision_groups: Active revisions grouped by label, oldest first
+        label: Label to pick a revision of
+        require_healthy: If True, return None instead of falling back to the newest
+            revision when none is healthy
+
+    Returns:
+        The picked revision, or None if the label has none
+    """
     all_revisions_for_label = label_revision_groups.get(label, [])
     if not all_revisions_for_label:
         return None
 
     for rev in reversed(all_revisions_for_label):
-        if _is_revision_healthy(rev):
+        if is_revision_healthy(rev):
             return rev
 
     if require_healthy:
@@ -703,6 +1131,7 @@ def update_traffic_weights(
     label_traffic_map: dict[str, int],
     deactivate_old_revisions: bool = True,
     should_delete_acr_images: bool = True,
+    wait: bool = True,
 ) -> None:
     """
     Update traffic weights for all labels and optionally deactivate old revisions.
@@ -713,6 +1142,7 @@ def update_traffic_weights(
         container_app_name: Container app name
         label_traffic_map: Dictionary mapping labels to traffic weights
         deactivate_old_revisions: If True, deactivate revisions not receiving traffic
+        wait: If False, return once the traffic update is accepted, without deactivating
         registry_server: Optional ACR server name for image cleanup during deactivation
         image_name: Optional image name for image cleanup during deactivation
 
@@ -725,8 +1155,13 @@ def update_traffic_weights(
             "No images will be deleted."
         )
     logger.info(f"Updating traffic weights for container app '{container_app_name}'...")
-    label_revision_groups = _get_active_revisions_by_label_group(
-        client, resource_group, container_app_name, labels=set(label_traffic_map.keys())
+    # Deactivation needs every active revision; traffic selection only the newest few
+    label_revision_groups = get_active_revisions_by_label_group(
+        client,
+        resource_group,
+        container_app_name,
+        labels=set(label_traffic_map.keys()),
+        max_per_label=None if deactivate_old_revisions else MAX_REVISIONS_PER_LABEL,
     )
     logger.info(f"Label revision groups: {__label_revision_group_to_str(label_revision_groups)}")
 
@@ -735,7 +1170,7 @@ def update_traffic_weights(
 
     selected_revisions = []
     for label, weight in label_traffic_map.items():
-        latest_revision = _get_latest_revision_by_label(
+        latest_revision = get_latest_revision_by_label(
             label_revision_groups, label, require_healthy=False
         )
         if not latest_revision or not latest_revision.name:
@@ -757,7 +1192,7 @@ def update_traffic_weights(
     if len(traffic_weights) == 0:
         raise RuntimeError("No valid traffic configuration could be built")
 
-    app = _get_container_app(client, resource_group, container_app_name)
+    app, etag = get_container_app_with_etag(client, resource_group, container_app_name)
     if not app:
         raise RuntimeError(f"Container app '{container_app_name}' not found")
 
@@ -767,14 +1202,22 @@ def update_traffic_weights(
     logger.info(
         f"Applying new traffic weights: {_traffic_weight_str(traffic_weights, selected_revisions)}"
     )
-    app.configuration.ingress.traffic = traffic_weights
-
-    poller = client.container_apps.begin_update(
-        resource_group_name=resource_group,
-        container_app_name=container_app_name,
-        container_app_envelope=app,
+    patch_traffic_weights(
+        client,
+        resource_group,
+        container_app_name,
+        traffic_weights,
+        etag=etag,
+        wait=wait,
     )
-    poller.result()
+    if not wait:
+        logger.success("Traffic weight update accepted")
+        if deactivate_old_revisions:
+            logger.warning(
+                "Not waiting for the traffic update to complete; "
+                "skipping deactivation of unused revisions."
+            )
+        return
     logger.success("Traffic weights updated successfully")
 
     if deactivate_old_revisions:
@@ -788,7 +1231,120 @@ def update_traffic_weights(
         )
 
 
-def _get_revision_container_images(revision: Revision) -> list[str]:
+def get_container_app_with_etag(
+    client: ContainerAppsAPIClient,
+    resource_group: str,
+    container_app_name: str,
+) -> tuple[ContainerApp | None, str | None]:
+    """Get a container app with its ETag, or (None, None) if it does not exist."""
+    try:
+        return cast(
+            tuple[ContainerApp, str | None],
+            client.container_apps.get(
+                resource_group_name=resource_group,
+                container_app_name=container_app_name,
+                cls=lambda pipeline_response, deserialized, _: (
+                    deserialized,
+                    pipeline_response.http_response.headers.get("ETag"),
+                ),
+            ),
+        )
+    except ResourceNotFoundError:
+        return None, None
+
+
+def patch_traffic_weights(
+    client: ContainerAppsAPIClient,
+    resource_group: str,
+    container_app_name: str,
+    traffic_weights: list[TrafficWeight],
+    etag: str | None = None,
+    wait: bool = True,
+) -> str | None:
+    """
+    Send a traffic-only JSON merge patch for a container app.
+
+    Only ``properties.configuration.ingress.traffic`` is sent, so the rest of the app
+    is left untouched server-side. When an ETag is given it is sent as ``If-Match``
+    so a concurrent edit of the app fails the update instead of being overwritten.
+
+    Args:
+        client: Azure Container Apps API client
+        resource_group: Resource group name
+        container_app_name: Container app name
+        traffic_weights: Traffic weights to apply
+        etag: ETag of the app the weights were computed from
+        wait: If False, return as soon as ARM accepts the request
+
+    Returns:
+        The ETag of the updated app, or None if not waiting or not reported
+
+    Raises:
+        RuntimeError: If the app was modified since the ETag was read
+    """
+    return patch_container_app_ingress(
+        client,
+        resource_group,
+        container_app_name,
+        {"traffic": [t.serialize() for t in traffic_weights]},
+        etag=etag,
+        wait=wait,
+    )
+
+
+def patch_container_app_ingress(
+    client: ContainerAppsAPIClient,
+    resource_group: str,
+    container_app_name: str,
+    ingress_patch: dict[str, Any],
+    etag: str | None = None,
+    wait: bool = True,
+) -> str | None:
+    """
+    Send an ingress-only JSON merge patch for a container app.
+
+    See patch_traffic_weights for the ETag handling.
+
+    Args:
+        client: Azure Container Apps API client
+        resource_group: Resource group name
+        container_app_name: Container app name
+        ingress_patch: Ingress properties to merge
+        etag: ETag of the app the patch was computed from
+        wait: If False, return as soon as ARM accepts the request
+
+    Returns:
+        The ETag of the updated app, or None if not waiting or not reported
+
+    Raises:
+        RuntimeError: If the app was modified since the ETag was read
+    """
+    body = {"properties": {"configuration": {"ingress": ingress_patch}}}
+    headers = {"If-Match": etag} if etag else {}
+    try:
+        poller = client.container_apps.begin_update(
+            resource_group_name=resource_group,
+            container_app_name=container_app_name,
+            container_app_envelope=io.BytesIO(json.dumps(body).encode("utf-8")),
+            headers=headers,
+            polling=wait,
+            cls=lambda pipeline_response, deserialized, _: (
+                pipeline_response.http_response.headers.get("ETag")
+            ),
+        )
+    except HttpResponseError as e:
+        if e.status_code == 412:
+            raise RuntimeError(
+                f"Container app '{container_app_name}' was modified concurrently. Retry the update."
+            ) from e
+        raise
+    if not wait:
+        return None
+    return cast(str | None, poller.result())
+
+
+def get_revision_container_images(revision: Revision) -> list[str]:
+    """List the images of a revision's containers."""
     if revision.template and revision.template.containers and len(revision.template.containers) > 0:
         return [c.image for c in revision.template.containers if c.image]
     return []
@@ -846,9 +1402,10 @@ def deactivate_unused_revisions(
                 continue
 
             if revision_suffix:
-                container_images = _get_revision_container_images(name_to_revision[revision_name])
+                container_images = get_revision_container_images(name_to_revision[revision_name])
                 for image in container_images:
-                    registry_server, image_name = image.split("/")
+                    # Images are pinned by digest; delete them by their tagged name
+                    registry_server, image_name = docker.strip_image_digest(image).split("/")
                     logger.info(f"Deleting ACR image '{image}' for revision '{revision_name}'...")
                     delete_acr_image(registry_server, image_name)
             else:
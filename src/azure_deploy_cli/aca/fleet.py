@@ -0,0 +1,297 @@
+"""Deploy many container apps from one manifest with a shared session."""
+
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+from azure.mgmt.appcontainers import ContainerAppsAPIClient
+from azure.mgmt.appcontainers.models import ManagedEnvironment
+from azure.mgmt.keyvault import KeyVaultManagementClient
+
+from ..identity.managed_identity import create_or_get_user_identity
+from ..identity.models import ManagedIdentity
+from ..identity.role import assign_role_by_files
+from ..utils import docker
+from ..utils.logging import elapsed_ms, get_logger
+from .certificate import bind_aca_managed_certificate
+from .deploy_aca import (
+    build_ip_rules,
+    create_container_app_env,
+    deploy_revision,
+)
+from .model import FleetAppConfig, FleetAppResult, FleetManifest, SecretKeyVaultConfig
+from .plan import EnvelopeCache, envelope_hash, plan_fleet_app_envelope
+from .snapshot import ResourceSnapshot
+from .yaml_loader import load_app_config_yaml
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class FleetDeploySession:
+    """
+    Clients and lookups shared by every app in a fleet deploy.
+
+    Environment and identity lookups are resolved once per key, even when many apps
+    ask for the same one concurrently. With an envelope cache, the planned envelope of
+    every healthy deploy to a stage is recorded. With ``skip_unchanged``, apps whose
+    planned envelope matches the recorded one are not deployed, and apps whose built
+    images give the envelope of their stage's latest revision are not deployed again.
+    """
+
+    subscription_id: str
+    client: ContainerAppsAPIClient
+    key_vault_client: KeyVaultManagementClient
+    registry_user: str
+    registry_pass_env_name: str
+    buildx_builder: str = docker.BUILDX_BUILDER_NAME
+    envelope_cache: EnvelopeCache | None = None
+    skip_unchanged: bool = False
+    _cache: dict[tuple[Any, ...], Any] = field(default_factory=dict)
+    _key_locks: dict[tuple[Any, ...], threading.Lock] = field(
+        default_factory=lambda: defaultdict(threading.Lock)
+    )
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def _get_or_create(self, key: tuple[Any, ...], factory: Callable[[], T]) -> T:
+        with self._lock:
+            key_lock = self._key_locks[key]
+        with key_lock:
+            if key not in self._cache:
+                self._cache[key] = factory()
+            value: T = self._cache[key]
+            return value
+
+    def get_container_app_env(self, app: FleetAppConfig) -> ManagedEnvironment:
+        return self._get_or_create(
+            ("env", app.resource_group, app.container_app_env),
+            lambda: create_container_app_env(
+                self.client,
+                resource_group=app.resource_group,
+                container_app_env_name=app.container_app_env,
+                location=app.location,
+                logs_workspace_id=app.logs_workspace_id,
+                container_app_env_id=app.container_app_env_id,
+            ),
+        )
+
+    def get_user_identity(self, app: FleetAppConfig) -> ManagedIdentity:
+        return self._get_or_create(
+            ("identity", app.resource_group, app.user_assigned_identity_name),
+            lambda: create_or_get_user_identity(
+                app.user_assigned_identity_name, app.resource_group, app.location
+            ),
+        )
+
+    def assign_roles(self, app: FleetAppConfig, user_identity: ManagedIdentity) -> None:
+        role_config = app.role_config
+        if not role_config or not app.role_env_vars_files:
+            return
+        self._get_or_create(
+            ("roles", user_identity.principalId, role_config, tuple(app.role_env_vars_files)),
+            lambda: assign_role_by_files(
+                user_identity.principalId,
+                role_config,
+                app.role_env_vars_files,
+                subscription_id=self.subscription_id,
+            ),
+        )
+
+
+def _deploy_fleet_app(
+    session: FleetDeploySession,
+    app: FleetAppConfig,
+    stage: str,
+    revision_suffix: str,
+) -> FleetAppResult:
+    logger.critical(
+        f"[{app.container_app}] Loading container configuration...",
+        extra={"phase": "load-config", "app": app.container_app},
+    )
+    app_config = load_app_config_yaml(app.container_config, stage=stage)
+    settings = app.resolve_settings(app_config)
+    planned_envelope = plan_fleet_app_envelope(
+        app, app_config, session.registry_user, session.registry_pass_env_name
+    )
+    if (
+        session.envelope_cache
+        and session.skip_unchanged
+        and session.envelope_cache.load(app.resource_group, app.container_app, stage)
+        == planned_envelope
+    ):
+        logger.critical(
+            f"[{app.container_app}] Unchanged since last deploy. Skipping.",
+            extra={"phase": "skip", "app": app.container_app},
+        )
+        return FleetAppResult(container_app=app.container_app, is_healthy=True, skipped=True)
+
+    user_identity = session.get_user_identity(app)
+    session.assign_roles(app, user_identity)
+    env = session.get_container_app_env(app)
+    snapshot = ResourceSnapshot(
+        session.client, app.resource_group, app.container_app, app.container_app_env
+    )
+    snapshot.set_managed_environment(env)
+
+    logger.critical(
+        f"[{app.container_app}] Deploying new revision...",
+        extra={"phase": "deploy", "app": app.container_app},
+    )
+    result = deploy_revision(
+        client=session.client,
+        subscription_id=session.subscription_id,
+        resource_group=app.resource_group,
+        container_app_env=env,
+        user_identity=user_identity,
+        container_app_name=app.container_app,
+        registry_server=app.registry_server,
+        registry_user=session.registry_user,
+        registry_pass_env_name=session.registry_pass_env_name,
+        revision_suffix=revision_suffix,
+        location=app.location,
+        stage=stage,
+        container_configs=app_config.containers,
+        target_port=settings.target_port,
+        ingress_external=settings.ingress_external,
+        ingress_transport=settings.ingress_transport,
+        min_replicas=settings.min_replicas,
+        max_replicas=settings.max_replicas,
+        secret_key_vault_config=SecretKeyVaultConfig(
+            key_vault_client=session.key_vault_client,
+            key_vault_name=app.keyvault_name,
+            secret_names=list(app.env_var_secrets),
+            user_identity=user_identity,
+        ),
+        ip_rules=build_ip_rules(list(settings.allowed_ips.items())),
+        snapshot=snapshot,
+        buildx_builder=session.buildx_builder,
+        hash_envelope=lambda images: envelope_hash(
+            plan_fleet_app_envelope(
+                app,
+                app_config,
+                session.registry_user,
+                session.registry_pass_env_name,
+                images=images,
+            )
+        ),
+        skip_if_unchanged=session.skip_unchanged,
+    )
+    if result.skipped:
+        logger.critical(
+            f"[{app.container_app}] Unchanged since revision {result.revision_name}. Skipping.",
+            extra={"phase": "skip", "app": app.container_app},
+        )
+        if session.envelope_cache:
+            session.envelope_cache.save(
+                app.resource_group, app.container_app, stage, planned_envelope
+            )
+        return FleetAppResult(
+            container_app=app.container_app,
+            revision_name=result.revision_name,
+            revision_url=result.revision_url,
+            is_healthy=True,
+            skipped=True,
+        )
+
+    if app.custom_domains:
+        logger.critical(
+            f"[{app.container_app}] Binding SSL certificate...",
+            extra={"phase": "bind-certificate", "app": app.container_app},
+        )
+        bind_aca_managed_certificate(
+            client=session.client,
+            custom_domains=app.custom_domains,
+            container_app_name=app.container_app,
+            container_app_env_name=app.container_app_env,
+            resource_group=app.resource_group,
+            snapshot=snapshot,
+        )
+
+    if session.envelope_cache and result.is_healthy:
+        session.envelope_cache.save(app.resource_group, app.container_app, stage, planned_envelope)
+
+    return FleetAppResult(
+        container_app=app.container_app,
+        revision_name=result.revision_name,
+        revision_url=result.revision_url,
+        is_healthy=result.is_healthy,
+    )
+
+
+def deploy_fleet(
+    session: FleetDeploySession,
+    manifest: FleetManifest,
+    stage: str,
+    revision_suffix: str,
+    max_concurrency_per_env: int,
+) -> list[FleetAppResult]:
+    """
+    Deploy every app in a fleet manifest concurrently.
+
+    Apps in the same container app environment are limited to
+    ``max_concurrency_per_env`` concurrent deploys, each environment with its own
+    workers so a busy one never delays the others. A failing app does not stop the
+    others; its error is recorded in its result.
+
+    Args:
+        session: Shared clients and lookups
+        manifest: Fleet manifest to deploy
+        stage: Deployment stage label
+        revision_suffix: Revision suffix shared by all apps in this release
+        max_concurrency_per_env: Maximum concurrent deploys per environment
+
+    Returns:
+        One FleetAppResult per app, in manifest order
+    """
+    if max_concurrency_per_env < 1:
+        raise ValueError("max_concurrency_per_env must be at least 1")
+
+    env_apps: dict[tuple[str, str], list[tuple[int, FleetAppConfig]]] = defaultdict(list)
+    for index, app in enumerate(manifest.apps):
+        env_apps[(app.resource_group, app.container_app_env)].append((index, app))
+
+    def _run(app: FleetAppConfig) -> FleetAppResult:
+        start = time.monotonic()
+        try:
+            result = _deploy_fleet_app(session, app, stage, revision_suffix)
+        except Exception as e:
+            logger.error(
+                f"[{app.container_app}] Deployment failed: {e}",
+                exc_info=True,
+                extra={"phase": "done", "app": app.container_app, "duration_ms": elapsed_ms(start)},
+            )
+            return FleetAppResult(container_app=app.container_app, error=str(e))
+        event = {
+            "phase": "done",
+            "app": app.container_app,
+            "revision": result.revision_name,
+            "duration_ms": elapsed_ms(start),
+        }
+        if not result.is_healthy:
+            logger.error(
+                f"[{app.container_app}] Revision {result.revision_name} is not healthy", extra=event
+            )
+        elif not result.skipped:
+            logger.success(
+                f"[{app.container_app}] Deployed revision {result.revision_name}", extra=event
+            )
+        return result
+
+    # One pool per environment, so apps queued for a busy environment never hold a
+    # worker that an app of another environment could use
+    futures: dict[int, Future[FleetAppResult]] = {}
+    with ExitStack() as stack:
+        for apps in env_apps.values():
+            executor = stack.enter_context(
+                ThreadPoolExecutor(max_workers=min(max_concurrency_per_env, len(apps)))
+            )
+            for index, app in apps:
+                futures[index] = executor.submit(_run, app)
+    return [futures[index].result() for index in range(len(manifest.apps))]
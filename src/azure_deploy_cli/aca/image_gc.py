@@ -0,0 +1,231 @@
+"""Garbage collection of registry images no longer used by any container app."""
+
+import datetime
+import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from azure.mgmt.appcontainers import ContainerAppsAPIClient
+
+from ..utils.azure_cli import run_command
+from ..utils.logging import get_logger
+from .deploy_aca import delete_acr_image, get_revision_container_images, iter_active_revisions
+from .model import ImageGcResult
+
+logger = get_logger(__name__)
+
+DEFAULT_KEEP_LAST = 5
+DEFAULT_MAX_PARALLEL_DELETES = 8
+
+# Tags pushed by deploys are revision suffixes: '<stage>-<UTC timestamp>'
+_DEPLOY_TAG_PATTERN = re.compile(r"(?P<stage>.+)-(?P<timestamp>\d{14})")
+_DEPLOY_TAG_TIMESTAMP_FORMAT = "%Y%m%d%H%M%S"
+
+
+@dataclass(frozen=True)
+class RegistryTag:
+    """A tag in a registry repository and the manifest it points to."""
+
+    repository: str
+    name: str
+    digest: str
+
+
+def _split_reference(image: str) -> tuple[str, str | None, str | None]:
+    """Split 'registry/repository[:tag][@digest]' into (repository, tag, digest)."""
+    name, _, digest = image.partition("@")
+    path = name.partition("/")[2]
+    repository, sep, tag = path.rpartition(":")
+    if not sep:
+        return path, None, digest or None
+    return repository, tag, digest or None
+
+
+def get_referenced_images(
+    client: ContainerAppsAPIClient,
+    resource_group: str,
+    container_app_names: list[str],
+) -> set[str]:
+    """
+    Collect the images used by the active revisions of container apps.
+
+    Args:
+        client: Azure Container Apps API client
+        resource_group: Resource group name
+        container_app_names: Container apps to scan
+
+    Returns:
+        Image references as found on the revisions, possibly pinned by digest
+    """
+
+    def _app_images(container_app_name: str) -> set[str]:
+        return {
+            image
+            for revision in iter_active_revisions(client, resource_group, container_app_name)
+            if revision.active
+            for image in get_revision_container_images(revision)
+        }
+
+    images: set[str] = set()
+    with ThreadPoolExecutor(max_workers=max(1, len(container_app_names))) as executor:
+        for app_images in executor.map(_app_images, container_app_names):
+            images.update(app_images)
+    return images
+
+
+def list_repository_tags(registry_server: str, repository: str) -> list[RegistryTag]:
+    """List every tag of a registry repository with its manifest digest."""
+    tags = run_command(
+        [
+            "az",
+            "acr",
+            "repository",
+            "show-tags",
+            "--name",
+            registry_server.split(".")[0],
+            "--repository",
+            repository,
+            "--detail",
+            "--output",
+            "json",
+        ]
+    )
+    return [
+        RegistryTag(repository=repository, name=tag["name"], digest=tag["digest"])
+        for tag in tags or []
+    ]
+
+
+def select_tags_to_delete(
+    tags: list[RegistryTag],
+    referenced_images: set[str],
+    keep_last: int,
+    keep_days: int | None = None,
+    now: datetime.datetime | None = None,
+) -> list[RegistryTag]:
+    """
+    Pick the tags that no retention rule keeps.
+
+    A tag is kept if an active revision uses it (by tag or by digest), if it is one of
+    the newest ``keep_last`` deploy tags of its stage, if it is younger than
+    ``keep_days``, or if it is not a deploy tag ('<stage>-<timestamp>') at all.
+    Deleting a tag deletes its manifest, so tags sharing a manifest with a kept tag
+    are kept too.
+
+    Args:
+        tags: Tags of the repositories being collected
+        referenced_images: Image references used by active revisions
+        keep_last: Number of newest deploy tags to keep per stage
+        keep_days: If set, keep deploy tags pushed within this many days
+        now: Current time, for testing
+
+    Returns:
+        Tags to delete
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    referenced_tags: set[tuple[str, str]] = set()
+    referenced_digests: set[str] = set()
+    for image in referenced_images:
+        repository, tag_name, digest = _split_reference(image)
+        if tag_name:
+            referenced_tags.add((repository, tag_name))
+        if digest:
+            referenced_digests.add(digest)
+
+    stage_tags: dict[tuple[str, str], list[tuple[datetime.datetime, RegistryTag]]] = defaultdict(
+        list
+    )
+    kept_digests = set(referenced_digests)
+    for tag in tags:
+        match = _DEPLOY_TAG_PATTERN.fullmatch(tag.name)
+        if (tag.repository, tag.name) in referenced_tags or not match:
+            kept_digests.add(tag.digest)
+            continue
+        pushed_at = datetime.datetime.strptime(
+            match["timestamp"], _DEPLOY_TAG_TIMESTAMP_FORMAT
+        ).replace(tzinfo=datetime.timezone.utc)
+        stage_tags[(tag.repository, match["stage"])].append((pushed_at, tag))
+
+    candidates: list[RegistryTag] = []
+    for entries in stage_tags.values():
+        entries.sort(key=lambda entry: entry[0], reverse=True)
+        for index, (pushed_at, tag) in enumerate(entries):
+            if index < keep_last or (
+                keep_days is not None and now - pushed_at < datetime.timedelta(days=keep_days)
+            ):
+                kept_digests.add(tag.digest)
+            else:
+                candidates.append(tag)
+    return [tag for tag in candidates if tag.digest not in kept_digests]
+
+
+def gc_images(
+    client: ContainerAppsAPIClient,
+    resource_group: str,
+    container_app_names: list[str],
+    registry_server: str,
+    repositories: list[str] | None = None,
+    keep_last: int = DEFAULT_KEEP_LAST,
+    keep_days: int | None = None,
+    dry_run: bool = False,
+    max_parallel: int = DEFAULT_MAX_PARALLEL_DELETES,
+) -> ImageGcResult:
+    """
+    Delete registry images not used by any active revision of the given apps.
+
+    Each repository's tags are listed once, and unused manifests are deleted in
+    parallel, one deletion per manifest.
+
+    Args:
+        client: Azure Container Apps API client
+        resource_group: Resource group name
+        container_app_names: Container apps whose active revisions keep their images
+        registry_server: ACR server name (e.g., myregistry.azurecr.io)
+        repositories: Repositories to collect (default: those used by the apps)
+        keep_last: Number of newest deploy tags to keep per stage
+        keep_days: If set, keep deploy tags pushed within this many days
+        dry_run: If True, only report what would be deleted
+        max_parallel: Maximum concurrent deletions
+
+    Returns:
+        ImageGcResult with the deleted (or, in a dry run, deletable) images
+    """
+    if keep_last < 0:
+        raise ValueError(f"keep_last must not be negative, got {keep_last}")
+
+    logger.info(f"Collecting images used by {len(container_app_names)} container app(s)...")
+    referenced_images = {
+        image
+        for image in get_referenced_images(client, resource_group, container_app_names)
+        if image.startswith(f"{registry_server}/")
+    }
+    if repositories is None:
+        repositories = sorted({_split_reference(image)[0] for image in referenced_images})
+
+    logger.info(f"Listing tags of {len(repositories)} repository(ies)...")
+    with ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(repositories)))) as executor:
+        tags = [
+            tag
+            for repo_tags in executor.map(
+                lambda repository: list_repository_tags(registry_server, repository),
+                repositories,
+            )
+            for tag in repo_tags
+        ]
+
+    to_delete = select_tags_to_delete(tags, referenced_images, keep_last, keep_days)
+    # One deletion per manifest removes every tag pointing to it
+    images = sorted({f"{tag.repository}@{tag.digest}" for tag in to_delete})
+    kept_tag_count = len(tags) - len(to_delete)
+    if dry_run:
+        for image in images:
+            logger.info(f"Would delete ACR image '{image}'")
+        return ImageGcResult(deleted_images=images, kept_tag_count=kept_tag_count, dry_run=True)
+
+    logger.info(f"Deleting {len(images)} unused image(s)...")
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as executor:
+        deleted = executor.map(lambda image: delete_acr_image(registry_server, image), images)
+        deleted_images = [image for image, ok in zip(images, deleted, strict=True) if ok]
+    logger.success(f"Deleted {len(deleted_images)} of {len(images)} unused image(s)")
+    return ImageGcResult(deleted_images=deleted_images, kept_tag_count=kept_tag_count)
@@ -0,0 +1,141 @@
+"""On-disk journal of completed deploy steps, used to resume failed deploys."""
+
+import json
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any
+
+from ..utils.logging import get_logger
+from ..utils.paths import user_state_dir
+
+logger = get_logger(__name__)
+
+DEFAULT_JOURNAL_DIR = user_state_dir() / "journal"
+
+STEP_IDENTITY = "identity"
+STEP_ROLES = "roles"
+STEP_SECRETS = "secrets"
+STEP_IMAGES = "images"
+STEP_REVISION = "revision"
+
+_STATUS_IN_PROGRESS = "in_progress"
+_STATUS_COMPLETED = "completed"
+
+
+class DeployJournal:
+    """
+    Record of the steps a deploy has completed and their outputs.
+
+    A journal is keyed by container app and revision suffix and stored as JSON at
+    ``<journal_dir>/<container_app>/<revision_suffix>.json``. Every update is written
+    atomically, so a crash mid-write leaves the previous state intact.
+    """
+
+    def __init__(self, path: Path, data: dict[str, Any]):
+        self.path = path
+        self._data = data
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(
+        cls,
+        journal_dir: Path,
+        container_app_name: str,
+        revision_suffix: str,
+        resume: bool = False,
+    ) -> "DeployJournal":
+        """
+        Open the journal for a deploy.
+
+        Args:
+            journal_dir: Directory holding journals
+            container_app_name: Container app name
+            revision_suffix: Revision suffix of the deploy
+            resume: If True, keep steps recorded by a previous run; otherwise start fresh
+
+        Returns:
+            DeployJournal instance
+        """
+        path = journal_dir / container_app_name / f"{revision_suffix}.json"
+        if resume and path.exists():
+            with open(path) as f:
+                data = json.load(f)
+            logger.info(
+                f"Resuming deploy from journal '{path}' "
+                f"(completed steps: {', '.join(data['steps']) or 'none'})"
+            )
+        else:
+            data = {
+                "containerApp": container_app_name,
+                "revisionSuffix": revision_suffix,
+                "status": _STATUS_IN_PROGRESS,
+                "steps": {},
+            }
+        journal = cls(path, data)
+        journal._write()
+        return journal
+
+    @staticmethod
+    def find_latest_incomplete(
+        journal_dir: Path, container_app_name: str, stage: str
+    ) -> str | None:
+        """
+        Find the revision suffix of the newest unfinished deploy for an app and stage.
+
+        Returns:
+            The revision suffix, or None if there is no unfinished deploy
+        """
+        app_dir = journal_dir / container_app_name
+        if not app_dir.is_dir():
+            return None
+        # Suffixes are '<stage>-<timestamp>', so name order is chronological. The
+        # timestamp is matched exactly so 'prod' does not pick up 'prod-eu' journals.
+        suffix_pattern = re.compile(rf"{re.escape(stage)}-\d{{14}}\.json")
+        paths = [path for path in app_dir.iterdir() if suffix_pattern.fullmatch(path.name)]
+        for path in sorted(paths, reverse=True):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("status") != _STATUS_COMPLETED:
+                return str(data["revisionSuffix"])
+        return None
+
+    def get(self, step: str) -> Any | None:
+        """Return the recorded output of a step, or None if it has not completed."""
+        with self._lock:
+            return self._data["steps"].get(step)
+
+    def is_done(self, step: str) -> bool:
+        with self._lock:
+            return step in self._data["steps"]
+
+    def record(self, step: str, output: Any = True) -> None:
+        """Record a step as completed with its output."""
+        with self._lock:
+            self._data["steps"][step] = output
+            self._write()
+
+    def record_item(self, step: str, key: str, value: Any) -> None:
+        """Record one item of a step made of many items (e.g. one image per container)."""
+        with self._lock:
+            self._data["steps"].setdefault(step, {})[key] = value
+            self._write()
+
+    def complete(self) -> None:
+        """Mark the deploy as completed so it is not picked up for resume."""
+        with self._lock:
+            self._data["status"] = _STATUS_COMPLETED
+            self._write()
+
+    def _write(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self._data, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
@@ -1,11 +1,13 @@
-from dataclasses import dataclass
-from typing import Any
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Annotated, Any
 
 from azure.mgmt.appcontainers.models import ContainerAppProbe
 from azure.mgmt.keyvault import KeyVaultManagementClient
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, PlainSerializer, WithJsonSchema, field_validator
 
 from ..identity.models import ManagedIdentity
+from ..utils.docker import DEFAULT_PLATFORMS
 
 
 @dataclass
@@ -26,6 +28,8 @@ class RevisionDeploymentResult:
     provisioning_state: str
     running_state: str
     revision_url: str | None
+    # True if the deploy found this revision unchanged instead of creating one
+    skipped: bool = False
 
     @property
     def is_healthy(self) -> bool:
@@ -38,6 +42,88 @@ class RevisionDeploymentResult:
         )
 
 
+@dataclass
+class RolloutResult:
+    """Result of a progressive traffic rollout."""
+
+    from_revision_name: str
+    to_revision_name: str
+    to_weight: int
+
+
+@dataclass
+class ImageGcResult:
+    """Result of a registry image garbage collection."""
+
+    deleted_images: list[str]
+    kept_tag_count: int
+    dry_run: bool = False
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "deletedImages": self.deleted_images,
+            "keptTagCount": self.kept_tag_count,
+            "dryRun": self.dry_run,
+        }
+
+
+@dataclass
+class AppPlanResult:
+    """Planned change of one container app compared to its last deployed envelope."""
+
+    container_app: str
+    status: str
+    changes: list[str] = field(default_factory=list)
+    error: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "containerApp": self.container_app,
+            "status": self.status,
+            "changes": self.changes,
+            "error": self.error,
+        }
+
+
+@dataclass
+class FleetAppResult:
+    """Result of deploying one container app as part of a fleet."""
+
+    container_app: str
+    revision_name: str | None = None
+    revision_url: str | None = None
+    is_healthy: bool = False
+    error: str | None = None
+    skipped: bool = False
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "containerApp": self.container_app,
+            "revisionName": self.revision_name,
+            "revisionUrl": self.revision_url,
+            "healthy": self.is_healthy,
+            "error": self.error,
+            "skipped": self.skipped,
+        }
+
+
+def _probe_arguments(probe: ContainerAppProbe) -> dict[str, Any]:
+    """The arguments a probe was built from, which rebuild it when validated again."""
+    return {
+        name: value
+        for name, value in vars(probe).items()
+        if name != "additional_properties" and value is not None
+    }
+
+
+# Probes stay SDK models, and are dumped to JSON as the arguments they were built from
+ProbeField = Annotated[
+    ContainerAppProbe,
+    PlainSerializer(_probe_arguments, return_type=dict[str, Any], when_used="json"),
+    WithJsonSchema({"type": "object"}),
+]
+
+
 class ContainerConfig(BaseModel):
     """Configuration for a single container from YAML."""
 
@@ -48,7 +134,7 @@ class ContainerConfig(BaseModel):
     env_vars: list[str] = Field(
         default_factory=list, description="List of environment variable names to load"
     )
-    probes: list[ContainerAppProbe] | None = Field(
+    probes: list[ProbeField] | None = Field(
         default=None, description="List of probe configurations"
     )
     existing_image_tag: str | None = Field(default=None, description="Optional tag to retag from")
@@ -56,6 +142,11 @@ class ContainerConfig(BaseModel):
         default=None, description="Optional platform for existing image pull"
     )
     dockerfile: str | None = Field(default=None, description="Optional dockerfile path")
+    platforms: list[str] = Field(
+        default_factory=lambda: list(DEFAULT_PLATFORMS),
+        min_length=1,
+        description="Platforms to build for; more than one pushes a multi-arch manifest list",
+    )
     build_args: list[str] = Field(
         default_factory=list, description="Optional build arguments to pass to docker build"
     )
@@ -85,3 +176,102 @@ class ContainerAppConfig(BaseModel):
     containers: list[ContainerConfig] = Field(
         ..., min_length=1, description="List of container configurations"
     )
+    target_port: int | None = Field(default=None, description="Ingress target port")
+    ingress_external: bool | None = Field(
+        default=None, description="Whether ingress is external (default: True)"
+    )
+    ingress_transport: str | None = Field(
+        default=None, description="Ingress transport protocol (default: auto)"
+    )
+    min_replicas: int | None = Field(default=None, description="Minimum number of replicas")
+    max_replicas: int | None = Field(default=None, description="Maximum number of replicas")
+    allowed_ips: dict[str, list[str]] | None = Field(
+        default=None, description="Rule name to list of allowed CIDR ranges"
+    )
+
+
+_REQUIRED_APP_SETTINGS = ("target_port", "min_replicas", "max_replicas")
+
+
+@dataclass
+class AppSettings:
+    """Ingress and scale settings of a container app."""
+
+    target_port: int
+    min_replicas: int
+    max_replicas: int
+    ingress_external: bool = True
+    ingress_transport: str = "auto"
+    allowed_ips: dict[str, list[str]] = field(default_factory=dict)
+
+    @classmethod
+    def resolve(cls, app_config: ContainerAppConfig, **overrides: Any) -> "AppSettings":
+        """
+        Combine the settings of a container config with overrides, e.g. from the CLI.
+
+        Overrides that are None leave the config value in place.
+
+        Raises:
+            ValueError: If a required setting is set in neither place
+        """
+        values = {
+            name: getattr(app_config, name)
+            for name in (*_REQUIRED_APP_SETTINGS, "ingress_external", "ingress_transport")
+        }
+        values["allowed_ips"] = app_config.allowed_ips
+        values.update({name: value for name, value in overrides.items() if value is not None})
+        missing = [name for name in _REQUIRED_APP_SETTINGS if values[name] is None]
+        if missing:
+            raise ValueError(
+                f"Missing app settings: {', '.join(missing)}. "
+                "Set them in the container config or as arguments."
+            )
+        return cls(**{name: value for name, value in values.items() if value is not None})
+
+
+class FleetAppConfig(BaseModel):
+    """Deployment settings for one container app in a fleet manifest."""
+
+    container_app: str
+    container_config: Path = Field(..., description="Path to the app's container config YAML")
+    container_app_env: str
+    container_app_env_id: str | None = Field(
+        None, description="Resource ID of an existing environment; skips the lookup"
+    )
+    resource_group: str
+    location: str
+    logs_workspace_id: str
+    user_assigned_identity_name: str
+    registry_server: str
+    keyvault_name: str
+    # Ingress and scale settings override those of the container config when set
+    target_port: int | None = None
+    min_replicas: int | None = None
+    max_replicas: int | None = None
+    ingress_external: bool | None = None
+    ingress_transport: str | None = None
+    env_var_secrets: list[str] = Field(default_factory=list)
+    allowed_ips: dict[str, list[str]] | None = Field(
+        default=None, description="Rule name to list of allowed CIDR ranges"
+    )
+    custom_domains: list[str] = Field(default_factory=list)
+    role_config: Path | None = None
+    role_env_vars_files: list[Path] = Field(default_factory=list)
+
+    def resolve_settings(self, app_config: ContainerAppConfig) -> AppSettings:
+        """Resolve the app's settings, with those set in the manifest taking precedence."""
+        return AppSettings.resolve(
+            app_config,
+            target_port=self.target_port,
+            min_replicas=self.min_replicas,
+            max_replicas=self.max_replicas,
+            ingress_external=self.ingress_external,
+            ingress_transport=self.ingress_transport,
+            allowed_ips=self.allowed_ips,
+        )
+
+
+class FleetManifest(BaseModel):
+    apps: list[FleetAppConfig] = Field(
+        ..., min_length=1, description="List of container apps to deploy"
+    )
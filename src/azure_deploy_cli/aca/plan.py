@@ -0,0 +1,375 @@
+"""Offline planning of container app deploys against their last deployed envelopes."""
+
+import hashlib
+import json
+import os
+import tempfile
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+from typing import Any
+
+from azure.mgmt.appcontainers.models import (
+    Container,
+    ContainerResources,
+    EnvironmentVar,
+    Secret,
+)
+
+from ..utils.logging import get_logger
+from ..utils.paths import user_state_dir
+from .deploy_aca import (
+    build_container_app_envelope,
+    build_ip_rules,
+    get_aca_docker_image_name,
+    load_env_vars,
+    sanitize_secret_name,
+)
+from .model import (
+    AppPlanResult,
+    AppSettings,
+    ContainerAppConfig,
+    ContainerConfig,
+    FleetAppConfig,
+    FleetManifest,
+)
+from .yaml_loader import load_app_config_yaml
+
+logger = get_logger(__name__)
+
+DEFAULT_ENVELOPE_CACHE_DIR = user_state_dir() / "envelopes"
+
+PLAN_NEW = "new"
+PLAN_CHANGED = "changed"
+PLAN_UNCHANGED = "unchanged"
+PLAN_ERROR = "error"
+
+
+def _fingerprint(*parts: str | bytes) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode() if isinstance(part, str) else part)
+        digest.update(b"\0")
+    return f"sha256:{digest.hexdigest()}"
+
+
+def _build_context_parts(context_dir: Path) -> Iterator[str | bytes]:
+    """Yield the path and content of every file in a build context, in a stable order."""
+    for root, dirs, files in os.walk(context_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = Path(root) / name
+            yield path.relative_to(context_dir).as_posix()
+            yield path.read_bytes()
+
+
+def _planned_image(
+    container_config: ContainerConfig, registry_server: str, env_values: Mapping[str, str]
+) -> str | None:
+    if container_config.existing_image_tag:
+        return get_aca_docker_image_name(
+            registry_server, container_config.image_name, container_config.existing_image_tag
+        )
+    if container_config.dockerfile:
+        # Stands in for the digest of the image the deploy would build. The whole build
+        # context (the Dockerfile's directory) is included, .dockerignore'd files too,
+        # so no change that could reach the image goes unnoticed
+        dockerfile = Path(container_config.dockerfile)
+        build_fingerprint = _fingerprint(
+            dockerfile.name,
+            *_build_context_parts(dockerfile.parent),
+            *(f"{name}={env_values[name]}" for name in container_config.build_args),
+            *container_config.platforms,
+        )
+        return f"{registry_server}/{container_config.image_name}@build:{build_fingerprint}"
+    return None
+
+
+def _deployed_image(image: str) -> str:
+    """Drop the tag of a digest-pinned image; deploys tag each image with their suffix."""
+    name, sep, digest = image.partition("@")
+    if not sep:
+        return image
+    registry_and_path, colon, tag = name.rpartition(":")
+    repository = registry_and_path if colon and "/" not in tag else name
+    return f"{repository}@{digest}"
+
+
+def plan_container_app_envelope(
+    app_config: ContainerAppConfig,
+    settings: AppSettings,
+    location: str,
+    container_app_env: str,
+    user_assigned_identity_name: str,
+    registry_server: str,
+    registry_user: str,
+    registry_pass_env_name: str,
+    keyvault_name: str,
+    secret_names: list[str],
+    environ: Mapping[str, str] | None = None,
+    images: list[str] | None = None,
+) -> dict[str, Any]:
+    """
+    Compute the envelope a deploy would send, without any Azure or registry calls.
+
+    Values only known during a deploy are replaced by stable placeholders: resources
+    are named instead of referenced by ID, built images by a fingerprint of their
+    build context, Dockerfile, build arguments and platforms, and environment and
+    secret values by their SHA-256 fingerprint, so no secret ends up in the envelope.
+    The revision suffix and existing traffic are left out.
+
+    During a deploy, the images it built can be given instead; they appear pinned to
+    their digest, without the per-deploy tag.
+
+    Args:
+        app_config: Container app configuration
+        settings: Resolved ingress and scale settings
+        location: Azure location
+        container_app_env: Name of the container app environment
+        user_assigned_identity_name: Name of the user-assigned identity
+        registry_server: Container registry server URL
+        registry_user: Registry username
+        registry_pass_env_name: Name of the registry password environment variable
+        keyvault_name: Key Vault holding the secrets
+        secret_names: Environment variables stored as secrets
+        environ: Environment to read values from (default: os.environ)
+        images: Built images, in container order, to use instead of their stand-ins
+
+    Returns:
+        The serialized envelope
+
+    Raises:
+        ValueError: If environment variables used by the config are not set
+        OSError: If a build context cannot be read
+    """
+    secret_set = {*secret_names, registry_pass_env_name}
+    used_names = secret_set.union(
+        *(
+            {*container_config.env_vars, *container_config.build_args}
+            for container_config in app_config.containers
+        )
+    )
+    env_values = load_env_vars(sorted(used_names), environ)
+
+    secrets = [
+        Secret(
+            name=sanitize_secret_name(name),
+            key_vault_url=(
+                f"https://{keyvault_name}.vault.azure.net/secrets/"
+                f"{sanitize_secret_name(name)}#{_fingerprint(env_values[name])}"
+            ),
+            identity=user_assigned_identity_name,
+        )
+        for name in sorted(secret_set)
+    ]
+    planned_images = (
+        [_deployed_image(image) for image in images]
+        if images is not None
+        else [
+            _planned_image(container_config, registry_server, env_values)
+            for container_config in app_config.containers
+        ]
+    )
+    containers = [
+        Container(
+            image=image,
+            name=container_config.name,
+            env=[
+                EnvironmentVar(name=name, secret_ref=sanitize_secret_name(name))
+                if name in secret_set
+                else EnvironmentVar(name=name, value=_fingerprint(env_values[name]))
+                for name in container_config.env_vars
+            ],
+            resources=ContainerResources(cpu=container_config.cpu, memory=container_config.memory),
+            probes=container_config.probes,
+        )
+        for image, container_config in zip(planned_images, app_config.containers, strict=True)
+    ]
+    envelope = build_container_app_envelope(
+        location=location,
+        environment_id=container_app_env,
+        user_identity_resource_id=user_assigned_identity_name,
+        registry_server=registry_server,
+        registry_user=registry_user,
+        registry_pass_env_name=registry_pass_env_name,
+        secrets=secrets,
+        containers=containers,
+        target_port=settings.target_port,
+        ingress_external=settings.ingress_external,
+        ingress_transport=settings.ingress_transport,
+        min_replicas=settings.min_replicas,
+        max_replicas=settings.max_replicas,
+        ip_rules=build_ip_rules(list(settings.allowed_ips.items())),
+    )
+    return dict(envelope.serialize())
+
+
+def envelope_hash(envelope: dict[str, Any]) -> str:
+    """Hash a planned envelope in a canonical form, independent of key order."""
+    canonical = json.dumps(envelope, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def plan_fleet_app_envelope(
+    app: FleetAppConfig,
+    app_config: ContainerAppConfig,
+    registry_user: str,
+    registry_pass_env_name: str,
+    environ: Mapping[str, str] | None = None,
+    images: list[str] | None = None,
+) -> dict[str, Any]:
+    """Compute the planned envelope of one app in a fleet manifest."""
+    return plan_container_app_envelope(
+        app_config,
+        app.resolve_settings(app_config),
+        location=app.location,
+        container_app_env=app.container_app_env,
+        user_assigned_identity_name=app.user_assigned_identity_name,
+        registry_server=app.registry_server,
+        registry_user=registry_user,
+        registry_pass_env_name=registry_pass_env_name,
+        keyvault_name=app.keyvault_name,
+        secret_names=app.env_var_secrets,
+        environ=environ,
+        images=images,
+    )
+
+
+def diff_envelopes(old: Any, new: Any, path: str = "") -> list[str]:
+    """
+    List the paths at which two serialized envelopes differ.
+
+    Args:
+        old: Previously deployed envelope (or part of it)
+        new: Planned envelope (or part of it)
+        path: Path of the compared parts, for recursion
+
+    Returns:
+        Dotted paths of the differing values, e.g. 'properties.template.scale.maxReplicas'
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        return [
+            change
+            for key in sorted(old.keys() | new.keys())
+            for change in diff_envelopes(
+                old.get(key), new.get(key), f"{path}.{key}" if path else key
+            )
+        ]
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        return [
+            change
+            for index, (old_item, new_item) in enumerate(zip(old, new, strict=True))
+            for change in diff_envelopes(old_item, new_item, f"{path}[{index}]")
+        ]
+    return [] if old == new else [path]
+
+
+class EnvelopeCache:
+    """
+    Last deployed envelope of each container app and stage.
+
+    Envelopes are stored as JSON at
+    ``<cache_dir>/<resource_group>/<stage>/<container_app>.json`` and written
+    atomically. Stages are kept apart, since an envelope deployed to one stage says
+    nothing about the revisions of another.
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_ENVELOPE_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, resource_group: str, container_app_name: str, stage: str) -> Path:
+        return self.cache_dir / resource_group / stage / f"{container_app_name}.json"
+
+    def load(
+        self, resource_group: str, container_app_name: str, stage: str
+    ) -> dict[str, Any] | None:
+        """Return the last envelope deployed to a stage, or None if none was recorded."""
+        path = self._path(resource_group, container_app_name, stage)
+        try:
+            with open(path) as f:
+                envelope: dict[str, Any] = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable envelope cache '{path}': {e}")
+            return None
+        return envelope
+
+    def save(
+        self,
+        resource_group: str,
+        container_app_name: str,
+        stage: str,
+        envelope: dict[str, Any],
+    ) -> None:
+        """Record the envelope of a successful deploy to a stage."""
+        path = self._path(resource_group, container_app_name, stage)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(envelope, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+
+def plan_app(
+    container_app_name: str,
+    planned: dict[str, Any],
+    deployed: dict[str, Any] | None,
+) -> AppPlanResult:
+    """Compare a planned envelope with the last deployed one."""
+    if deployed is None:
+        return AppPlanResult(container_app=container_app_name, status=PLAN_NEW)
+    changes = diff_envelopes(deployed, planned)
+    return AppPlanResult(
+        container_app=container_app_name,
+        status=PLAN_CHANGED if changes else PLAN_UNCHANGED,
+        changes=changes,
+    )
+
+
+def plan_fleet(
+    manifest: FleetManifest,
+    stage: str,
+    registry_user: str,
+    registry_pass_env_name: str,
+    envelope_cache: EnvelopeCache,
+    environ: Mapping[str, str] | None = None,
+) -> list[AppPlanResult]:
+    """
+    Plan every app in a fleet manifest without any Azure or registry calls.
+
+    Args:
+        manifest: Fleet manifest to plan
+        stage: Deployment stage label, selects the container configs' stage overlays
+        registry_user: Registry username
+        registry_pass_env_name: Name of the registry password environment variable
+        envelope_cache: Last deployed envelopes
+        environ: Environment to read values from (default: os.environ)
+
+    Returns:
+        One AppPlanResult per app, in manifest order
+    """
+    results: list[AppPlanResult] = []
+    for app in manifest.apps:
+        try:
+            app_config = load_app_config_yaml(app.container_config, stage=stage)
+            planned = plan_fleet_app_envelope(
+                app, app_config, registry_user, registry_pass_env_name, environ
+            )
+        except (OSError, ValueError) as e:
+            logger.error(f"[{app.container_app}] Could not plan: {e}")
+            results.append(
+                AppPlanResult(container_app=app.container_app, status=PLAN_ERROR, error=str(e))
+            )
+            continue
+        result = plan_app(
+            app.container_app,
+            planned,
+            envelope_cache.load(app.resource_group, app.container_app, stage),
+        )
+        logger.info(f"[{app.container_app}] {result.status}")
+        results.append(result)
+    return results
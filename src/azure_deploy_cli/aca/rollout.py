@@ -0,0 +1,235 @@
+"""Progressive traffic rollout between two stage labels."""
+
+import time
+import urllib.request
+
+from azure.mgmt.appcontainers import ContainerAppsAPIClient
+from azure.mgmt.appcontainers.models import Revision, TrafficWeight
+
+from ..utils.logging import get_logger
+from .deploy_aca import (
+    get_active_revisions_by_label_group,
+    get_container_app_with_etag,
+    get_latest_revision_by_label,
+    is_revision_healthy,
+    patch_traffic_weights,
+)
+from .model import RolloutResult
+
+logger = get_logger(__name__)
+
+# Only the newest revisions of each label are needed to pick the rollout pair
+ROLLOUT_REVISIONS_PER_LABEL = 5
+HEALTH_CHECK_TIMEOUT_SECONDS = 10
+
+
+def validate_rollout_steps(steps: list[int]) -> None:
+    """
+    Validate that rollout steps are strictly increasing weights between 1 and 100.
+
+    Raises:
+        ValueError: If the steps are empty, out of range, or not increasing
+    """
+    if not steps:
+        raise ValueError("At least one rollout step is required")
+    for weight in steps:
+        if weight < 1 or weight > 100:
+            raise ValueError(f"Invalid rollout step {weight}. Steps must be between 1 and 100")
+    if any(later <= earlier for earlier, later in zip(steps, steps[1:], strict=False)):
+        raise ValueError(f"Rollout steps must be strictly increasing, got {steps}")
+
+
+def _rollout_traffic_weights(
+    existing_traffic: list[TrafficWeight],
+    from_label: str,
+    from_revision: str,
+    to_label: str,
+    to_revision: str,
+    to_weight: int,
+) -> list[TrafficWeight]:
+    """
+    Build the full traffic list for a rollout step.
+
+    The traffic patch replaces the whole list, so entries of other labels are kept
+    unchanged. The weight they do not hold is split between the two rollout labels,
+    with ``to_weight`` percent of it going to the target.
+    """
+    others = [t for t in existing_traffic if t.label not in (from_label, to_label)]
+    budget = 100 - sum(t.weight or 0 for t in others)
+    target_weight = budget * to_weight // 100
+    return [
+        *others,
+        TrafficWeight(
+            label=from_label,
+            weight=budget - target_weight,
+            revision_name=from_revision,
+            latest_revision=False,
+        ),
+        TrafficWeight(
+            label=to_label,
+            weight=target_weight,
+            revision_name=to_revision,
+            latest_revision=False,
+        ),
+    ]
+
+
+def _check_revision_http(revision: Revision, health_check_path: str) -> bool:
+    if not revision.fqdn:
+        logger.warning(f"Revision '{revision.name}' has no FQDN; cannot run HTTP check")
+        return False
+    url = f"https://{revision.fqdn}/{health_check_path.lstrip('/')}"
+    try:
+        with urllib.request.urlopen(url, timeout=HEALTH_CHECK_TIMEOUT_SECONDS) as response:
+            status = response.status
+    except OSError as e:
+        logger.warning(f"HTTP check against '{url}' failed: {e}")
+        return False
+    if not 200 <= status < 300:
+        logger.warning(f"HTTP check against '{url}' returned status {status}")
+        return False
+    return True
+
+
+def _is_rollout_step_healthy(
+    client: ContainerAppsAPIClient,
+    resource_group: str,
+    container_app_name: str,
+    revision_name: str,
+    health_check_path: str | None,
+) -> bool:
+    revision = client.container_apps_revisions.get_revision(
+        resource_group_name=resource_group,
+        container_app_name=container_app_name,
+        revision_name=revision_name,
+    )
+    if not is_revision_healthy(revision):
+        logger.warning(
+            f"Revision '{revision_name}' is not healthy: active={revision.active}, "
+            f"health={revision.health_state}, provisioning={revision.provisioning_state}, "
+            f"running={revision.running_state}"
+        )
+        return False
+    if health_check_path:
+        return _check_revision_http(revision, health_check_path)
+    return True
+
+
+def _resolve_rollout_revisions(
+    client: ContainerAppsAPIClient,
+    resource_group: str,
+    container_app_name: str,
+    from_label: str,
+    to_label: str,
+) -> tuple[str, str]:
+    label_revision_groups = get_active_revisions_by_label_group(
+        client,
+        resource_group,
+        container_app_name,
+        labels={from_label, to_label},
+        max_per_label=ROLLOUT_REVISIONS_PER_LABEL,
+    )
+    from_revision = get_latest_revision_by_label(label_revision_groups, from_label)
+    to_revision = get_latest_revision_by_label(label_revision_groups, to_label)
+    if not from_revision or not from_revision.name:
+        raise RuntimeError(f"No revision found for label '{from_label}'")
+    if not to_revision or not to_revision.name:
+        raise RuntimeError(f"No revision found for label '{to_label}'")
+    return from_revision.name, to_revision.name
+
+
+def rollout_traffic(
+    client: ContainerAppsAPIClient,
+    resource_group: str,
+    container_app_name: str,
+    from_label: str,
+    to_label: str,
+    steps: list[int],
+    step_interval_seconds: int,
+    health_check_path: str | None = None,
+) -> RolloutResult:
+    """
+    Shift traffic from one label to another in steps, rolling back on failure.
+
+    Revisions are listed once to pick the latest revision of each label. After each
+    step the target revision is fetched once and gated on its health and, if a path
+    is given, an HTTP check against the revision URL. A failed gate, or any error once
+    traffic has started to shift, moves all traffic back to the source revision. Other
+    labels keep their traffic entries, and every step is guarded by the ETag returned
+    from the previous update.
+
+    Args:
+        client: Azure Container Apps API client
+        resource_group: Resource group name
+        container_app_name: Container app name
+        from_label: Label currently receiving traffic
+        to_label: Label to shift traffic to
+        steps: Strictly increasing traffic weights for the target label (e.g. 5 25 50 100)
+        step_interval_seconds: Time to wait after each step before checking health
+        health_check_path: Optional HTTP path to check on the target revision
+
+    Returns:
+        RolloutResult describing the final traffic split
+
+    Raises:
+        ValueError: If steps or the interval are invalid, or the labels are the same
+        RuntimeError: If no revision is found for a label or the rollout was rolled back
+    """
+    validate_rollout_steps(steps)
+    if from_label == to_label:
+        raise ValueError("Rollout source and target labels must be different")
+    if step_interval_seconds < 0:
+        raise ValueError("Rollout step interval must not be negative")
+
+    from_revision_name, to_revision_name = _resolve_rollout_revisions(
+        client, resource_group, container_app_name, from_label, to_label
+    )
+
+    app, etag = get_container_app_with_etag(client, resource_group, container_app_name)
+    if not app:
+        raise RuntimeError(f"Container app '{container_app_name}' not found")
+    if not app.configuration or not app.configuration.ingress:
+        raise RuntimeError(f"Container app '{container_app_name}' has no ingress configuration")
+    existing_traffic = app.configuration.ingress.traffic or []
+
+    def _traffic(to_weight: int) -> list[TrafficWeight]:
+        return _rollout_traffic_weights(
+            existing_traffic, from_label, from_revision_name, to_label, to_revision_name, to_weight
+        )
+
+    logger.info(
+        f"Rolling out '{to_revision_name}' ({to_label}) over '{from_revision_name}' "
+        f"({from_label}) in steps {steps}"
+    )
+    current_weight = 0
+    try:
+        for step_number, weight in enumerate(steps, start=1):
+            logger.critical(f"Step {step_number}/{len(steps)}: shifting {weight}% to '{to_label}'")
+            # Each patch returns the new ETag, so every step is guarded against edits
+            # made by others since the previous one
+            etag = patch_traffic_weights(
+                client, resource_group, container_app_name, _traffic(weight), etag=etag
+            )
+            current_weight = weight
+
+            logger.info(f"Waiting {step_interval_seconds}s before checking revision health...")
+            time.sleep(step_interval_seconds)
+            if not _is_rollout_step_healthy(
+                client, resource_group, container_app_name, to_revision_name, health_check_path
+            ):
+                raise RuntimeError(
+                    f"Rollout of '{to_revision_name}' failed at {weight}% and was rolled back"
+                )
+            logger.success(f"Step {step_number}/{len(steps)} healthy at {weight}%")
+    except BaseException as e:
+        if current_weight:
+            logger.error(f"Rollout failed at {current_weight}%: {e}. Rolling back...")
+            patch_traffic_weights(client, resource_group, container_app_name, _traffic(0))
+            logger.warning(f"Rolled back all traffic to '{from_revision_name}' ({from_label})")
+        raise
+
+    return RolloutResult(
+        from_revision_name=from_revision_name,
+        to_revision_name=to_revision_name,
+        to_weight=current_weight,
+    )
@@ -0,0 +1,113 @@
+"""Per-deploy snapshot of the container app and environment read from Azure."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, cast
+
+from azure.core.exceptions import ResourceNotFoundError
+from azure.mgmt.appcontainers import ContainerAppsAPIClient
+from azure.mgmt.appcontainers.models import ContainerApp, ManagedEnvironment
+
+_CONTAINER_APP = "container_app"
+_MANAGED_ENVIRONMENT = "managed_environment"
+
+
+class ResourceSnapshot:
+    """
+    Container app and managed environment state shared by every phase of a deploy.
+
+    Each resource is read from Azure at most once. Phases that write a resource either
+    store the returned state with ``set_*`` or drop it with ``invalidate_*``, so the
+    snapshot only changes through our own writes. A resource that does not exist is
+    cached as None. The container app's ETag is kept so a later write can be guarded
+    against changes made by others since it was read.
+    """
+
+    def __init__(
+        self,
+        client: ContainerAppsAPIClient,
+        resource_group: str,
+        container_app_name: str,
+        container_app_env_name: str,
+    ):
+        self.client = client
+        self.resource_group = resource_group
+        self.container_app_name = container_app_name
+        self.container_app_env_name = container_app_env_name
+        self._cache: dict[str, tuple[Any, str | None]] = {}
+        self._lock = threading.Lock()
+
+    def prefetch(self) -> None:
+        """Read every resource not yet cached, in parallel."""
+        with self._lock:
+            missing = [
+                key for key in (_CONTAINER_APP, _MANAGED_ENVIRONMENT) if key not in self._cache
+            ]
+        if not missing:
+            return
+        with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+            list(executor.map(self._get, missing))
+
+    @property
+    def container_app(self) -> ContainerApp | None:
+        value: ContainerApp | None = self._get(_CONTAINER_APP)[0]
+        return value
+
+    @property
+    def container_app_etag(self) -> str | None:
+        """ETag of the cached container app, if it was read from Azure."""
+        etag: str | None = self._get(_CONTAINER_APP)[1]
+        return etag
+
+    @property
+    def managed_environment(self) -> ManagedEnvironment | None:
+        value: ManagedEnvironment | None = self._get(_MANAGED_ENVIRONMENT)[0]
+        return value
+
+    def set_container_app(
+        self, container_app: ContainerApp | None, etag: str | None = None
+    ) -> None:
+        """Store the container app returned by one of our writes."""
+        self._set(_CONTAINER_APP, (container_app, etag))
+
+    def set_managed_environment(self, managed_environment: ManagedEnvironment | None) -> None:
+        """Store the managed environment returned by one of our writes."""
+        self._set(_MANAGED_ENVIRONMENT, (managed_environment, None))
+
+    def invalidate_container_app(self) -> None:
+        """Drop the cached container app after a write that did not return it."""
+        with self._lock:
+            self._cache.pop(_CONTAINER_APP, None)
+
+    def _set(self, key: str, value: tuple[Any, str | None]) -> None:
+        with self._lock:
+            self._cache[key] = value
+
+    def _get(self, key: str) -> tuple[Any, str | None]:
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+        value = self._fetch(key)
+        with self._lock:
+            return self._cache.setdefault(key, value)
+
+    def _fetch(self, key: str) -> tuple[Any, str | None]:
+        try:
+            if key == _CONTAINER_APP:
+                return cast(
+                    tuple[ContainerApp, str | None],
+                    self.client.container_apps.get(
+                        resource_group_name=self.resource_group,
+                        container_app_name=self.container_app_name,
+                        cls=lambda pipeline_response, deserialized, _: (
+                            deserialized,
+                            pipeline_response.http_response.headers.get("ETag"),
+                        ),
+                    ),
+                )
+            env = self.client.managed_environments.get(
+                self.resource_group, self.container_app_env_name
+            )
+            return env, None
+        except ResourceNotFoundError:
+            return None, None
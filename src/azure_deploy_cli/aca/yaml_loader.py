@@ -1,12 +1,180 @@
+import copy
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
 import yaml
 
-from .model import ContainerAppConfig
+from ..utils.logging import get_logger
+from ..utils.paths import user_cache_dir
+from .model import ContainerAppConfig, FleetManifest
 
+logger = get_logger(__name__)
 
-def load_app_config_yaml(yaml_path: Path) -> ContainerAppConfig:
+DEFAULT_CONFIG_CACHE_DIR = user_cache_dir() / "container-config"
+
+# libyaml's C loader is several times faster; PyYAML may be built without it
+_YamlLoader: Any = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Keys naming the config files a config is layered on
+INCLUDE_KEYS = ("extends", "include")
+STAGES_KEY = "stages"
+
+_app_configs: dict[str, ContainerAppConfig] = {}
+_app_configs_lock = threading.Lock()
+# Resolved config files by path, so a fragment shared by many apps is read and parsed
+# once per process
+_fragments: dict[Path, "_ConfigFragment"] = {}
+_fragments_lock = threading.Lock()
+
+
+def _load_yaml(content: bytes | str) -> Any:
+    return yaml.load(content, Loader=_YamlLoader)
+
+
+def _is_named_list(value: Any) -> bool:
+    return (
+        isinstance(value, list)
+        and bool(value)
+        and all(isinstance(item, dict) and "name" in item for item in value)
+    )
+
+
+def _merge_config(base: Any, override: Any) -> Any:
+    """
+    Merge a config layer over another without changing either.
+
+    Mappings are merged key by key and lists of named items (such as ``containers``)
+    item by item, matched on ``name``. Any other value in ``override`` replaces the
+    one in ``base``.
+    """
+    if isinstance(base, dict) and isinstance(override, dict):
+        merged = dict(base)
+        for key, value in override.items():
+            merged[key] = _merge_config(base[key], value) if key in base else value
+        return merged
+    if _is_named_list(base) and _is_named_list(override):
+        items = {item["name"]: item for item in base}
+        for item in override:
+            name = item["name"]
+            items[name] = _merge_config(items[name], item) if name in items else item
+        return list(items.values())
+    return override
+
+
+def _include_paths(data: dict[str, Any], base_dir: Path) -> list[Path]:
+    paths: list[Path] = []
+    for key in INCLUDE_KEYS:
+        value = data.get(key)
+        if value is None:
+            continue
+        for entry in value if isinstance(value, list) else [value]:
+            path = Path(entry)
+            paths.append(path if path.is_absolute() else base_dir / path)
+    return paths
+
+
+@dataclass(frozen=True)
+class _ConfigFragment:
+    """A config file with everything it includes merged in."""
+
+    data: dict[str, Any]
+    # Digest of the file and all files it includes
+    digest: str
+    # (path, mtime, size) of every file it was built from
+    file_versions: tuple[tuple[Path, int, int], ...]
+
+    def is_current(self) -> bool:
+        try:
+            return all(_file_version(version[0]) == version for version in self.file_versions)
+        except OSError:
+            return False
+
+
+def _file_version(path: Path) -> tuple[Path, int, int]:
+    stat = path.stat()
+    return path, stat.st_mtime_ns, stat.st_size
+
+
+def _load_config_fragment(yaml_path: Path, chain: tuple[Path, ...] = ()) -> _ConfigFragment:
+    path = Path(yaml_path).resolve()
+    if path in chain:
+        cycle = " -> ".join(str(p) for p in (*chain, path))
+        raise ValueError(f"Config include cycle: {cycle}")
+    with _fragments_lock:
+        cached = _fragments.get(path)
+    if cached is not None and cached.is_current():
+        return cached
+
+    file_versions = [_file_version(path)]
+    content = path.read_bytes()
+    data = _load_yaml(content) or {}
+    if not isinstance(data, dict):
+        raise ValueError(f"Config file '{path}' must contain a mapping")
+    digest = hashlib.sha256(content)
+    merged: dict[str, Any] = {}
+    for include_path in _include_paths(data, path.parent):
+        included = _load_config_fragment(include_path, (*chain, path))
+        merged = _merge_config(merged, included.data)
+        digest.update(included.digest.encode())
+        file_versions.extend(included.file_versions)
+    own = {k: v for k, v in data.items() if k not in INCLUDE_KEYS}
+    fragment = _ConfigFragment(
+        data=_merge_config(merged, own),
+        digest=digest.hexdigest(),
+        file_versions=tuple(file_versions),
+    )
+    with _fragments_lock:
+        _fragments[path] = fragment
+    return fragment
+
+
+@functools.lru_cache(maxsize=1)
+def _config_schema_digest() -> str:
+    """Digest of ContainerAppConfig's JSON schema, so cached configs follow model changes."""
+    schema = json.dumps(ContainerAppConfig.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode()).hexdigest()[:16]
+
+
+def _read_cached_app_config(cache_dir: Path, key: str) -> ContainerAppConfig | None:
+    path = cache_dir / f"{key}.json"
+    try:
+        with open(path) as f:
+            return ContainerAppConfig.model_validate(json.load(f))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        # Unreadable or invalid entries are rebuilt
+        logger.debug(f"Ignoring cached container config '{path}': {e}")
+        return None
+
+
+def _write_cached_app_config(cache_dir: Path, key: str, app_config: ContainerAppConfig) -> None:
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(app_config.model_dump(mode="json"), f)
+            os.replace(tmp_path, cache_dir / f"{key}.json")
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+    except OSError as e:
+        logger.debug(f"Could not cache container config in '{cache_dir}': {e}")
+
+
+def load_app_config_yaml(
+    yaml_path: Path,
+    stage: str | None = None,
+    cache_dir: Path | None = DEFAULT_CONFIG_CACHE_DIR,
+) -> ContainerAppConfig:
     """
     Load container configurations from YAML file using Pydantic for validation.
 
@@ -31,8 +199,35 @@ def load_app_config_yaml(yaml_path: Path) -> ContainerAppConfig:
             period_seconds: 30
     ```
 
+    A config can be layered on shared fragments with ``extends:`` or ``include:`` (one
+    path or a list, relative to the including file), and can override any of their
+    keys; containers are matched by name. Overlays under ``stages:`` are applied on
+    top for the matching ``stage``:
+
+    ```yaml
+    include: [../shared/sidecars.yaml]
+    containers:
+      - name: my-app
+        image_name: my-image
+        cpu: 0.5
+        memory: "1.0Gi"
+    stages:
+      prod:
+        containers:
+          - name: my-app
+            cpu: 1.0
+    ```
+
+    Every file is parsed once per process. Configs are cached by the digest of all
+    files involved, the stage and the digest of the config model's JSON schema, in
+    memory and as JSON in ``cache_dir``, so a model change never reuses older
+    entries and a cache entry is only ever data.
+
     Args:
         yaml_path: Path to the YAML configuration file
+        stage: Deployment stage whose overlay under ``stages:`` is applied
+        cache_dir: Directory for validated configs shared across runs, or None to only
+            cache in memory
 
     Returns:
         List of ContainerConfig instances
@@ -40,14 +235,106 @@ def load_app_config_yaml(yaml_path: Path) -> ContainerAppConfig:
     Raises:
         ValueError: If YAML structure is invalid or validation fails
     """
-    with open(yaml_path) as f:
-        data: dict[str, Any] = yaml.safe_load(f)
+    fragment = _load_config_fragment(yaml_path)
+    key_digest = hashlib.sha256(f"{fragment.digest}\0{stage or ''}".encode()).hexdigest()
+    key = f"{key_digest}-{_config_schema_digest()}"
+    with _app_configs_lock:
+        app_config = _app_configs.get(key)
+    if app_config is None and cache_dir is not None:
+        app_config = _read_cached_app_config(cache_dir, key)
+    if app_config is None:
+        app_config = _validate_app_config(_apply_stage_overlay(fragment.data, stage))
+        if cache_dir is not None:
+            _write_cached_app_config(cache_dir, key, app_config)
+    with _app_configs_lock:
+        _app_configs[key] = app_config
+    # Callers get their own copy so the cached config cannot be changed through it
+    return app_config.model_copy(deep=True)
+
 
+def _apply_stage_overlay(data: dict[str, Any], stage: str | None) -> dict[str, Any]:
+    stages = data.get(STAGES_KEY) or {}
+    base = {k: v for k, v in data.items() if k != STAGES_KEY}
+    if stage and stage in stages:
+        base = _merge_config(base, stages[stage])
+    # Validation must not reach into the cached fragments
+    return copy.deepcopy(base)
+
+
+def _validate_app_config(data: dict[str, Any] | None) -> ContainerAppConfig:
     if not data:
         raise ValueError("YAML file is empty")
 
     try:
-        app_config = ContainerAppConfig(**data)
-        return app_config
+        return ContainerAppConfig(**data)
     except Exception as e:
         raise ValueError(f"Invalid YAML configuration: {e}") from e
+
+
+def _resolve_manifest_path(value: Any, base_dir: Path) -> Any:
+    if value is None:
+        return None
+    path = Path(value)
+    return path if path.is_absolute() else base_dir / path
+
+
+def load_fleet_manifest_yaml(yaml_path: Path) -> FleetManifest:
+    """
+    Load a fleet manifest describing many container apps to deploy together.
+
+    Keys under ``defaults`` apply to every app unless the app overrides them.
+    Relative paths are resolved against the manifest's directory.
+
+    ```yaml
+    defaults:
+      resource_group: my-rg
+      location: westus2
+      container_app_env: my-env
+      logs_workspace_id: <workspace-id>
+      user_assigned_identity_name: my-identity
+      registry_server: myregistry.azurecr.io
+      keyvault_name: my-keyvault
+      min_replicas: 1
+      max_replicas: 3
+    apps:
+      - container_app: api
+        container_config: ./api.yaml
+        target_port: 8080
+        allowed_ips:
+          office: ["1.2.3.4/32"]
+      - container_app: worker
+        container_config: ./worker.yaml
+        target_port: 8081
+    ```
+
+    Args:
+        yaml_path: Path to the fleet manifest YAML file
+
+    Returns:
+        FleetManifest instance
+
+    Raises:
+        ValueError: If YAML structure is invalid or validation fails
+    """
+    with open(yaml_path) as f:
+        data: dict[str, Any] = _load_yaml(f.read())
+
+    if not data:
+        raise ValueError("YAML file is empty")
+
+    base_dir = Path(yaml_path).parent
+    defaults: dict[str, Any] = data.get("defaults") or {}
+    apps: list[dict[str, Any]] = []
+    for app_data in data.get("apps") or []:
+        app = {**defaults, **app_data}
+        app["container_config"] = _resolve_manifest_path(app.get("container_config"), base_dir)
+        app["role_config"] = _resolve_manifest_path(app.get("role_config"), base_dir)
+        app["role_env_vars_files"] = [
+            _resolve_manifest_path(p, base_dir) for p in app.get("role_env_vars_files") or []
+        ]
+        apps.append(app)
+
+    try:
+        return FleetManifest.model_validate({"apps": apps})
+    except Exception as e:
+        raise ValueError(f"Invalid fleet manifest: {e}") from e
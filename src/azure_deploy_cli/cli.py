@@ -3,7 +3,7 @@ import sys
 
 from .aca import aca_cli
 from .identity import identity_cli
-from .utils.logging import configure_logging, get_logger
+from .utils.logging import LOG_FORMATS, configure_logging, get_logger
 
 
 def main() -> None:
@@ -32,6 +32,18 @@ Namespaces:
         default="info",
         help="Set the logging level.",
     )
+    parser.add_argument(
+        "--log-format",
+        choices=LOG_FORMATS,
+        default="text",
+        help="Format of the logs on stderr: coloured text, or one JSON object per line.",
+    )
+    parser.add_argument(
+        "--log-queue",
+        action="store_true",
+        help="Write log output from a background thread, so a slow terminal or pipe "
+        "does not stall builds streaming their output.",
+    )
 
     subparsers = parser.add_subparsers(dest="namespace", help="Tool namespace")
 
@@ -43,7 +55,7 @@ Namespaces:
 
     args = parser.parse_args()
 
-    configure_logging(level=args.log_level)
+    configure_logging(level=args.log_level, queue=args.log_queue, log_format=args.log_format)
     logger = get_logger(__name__)
 
     if not args.namespace:
@@ -1,7 +1,11 @@
+from collections.abc import Mapping
 from dataclasses import dataclass
+from string import Template
 from typing import Any
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, PrivateAttr, field_validator
+
+from ..utils.env import compile_template, template_placeholders
 
 
 @dataclass
@@ -94,6 +98,16 @@ class ManagedIdentity:
             raise ValueError("principalId cannot be empty")
 
 
+@dataclass(frozen=True)
+class RoleAssignmentPlan:
+    """A role definition with its scope and account resolved from env variables."""
+
+    type: str
+    role: str
+    scope: str
+    account: str | None = None
+
+
 class RoleDefinition(BaseModel):
     """Role definition for assignment to service principals."""
 
@@ -103,6 +117,8 @@ class RoleDefinition(BaseModel):
     scope: str  # Resource scope (for rbac) or '/' (for cosmos-db)
     description: str | None = None
 
+    _templates: dict[str, Template] = PrivateAttr(default_factory=dict)
+
     @field_validator("role")
     @classmethod
     def role_not_empty(cls, v: str) -> str:
@@ -132,6 +148,33 @@ class RoleDefinition(BaseModel):
         """Validate cosmos-db specific requirements after initialization"""
         if self.type == "cosmos-db" and not self.account:
             raise ValueError("Cosmos DB role configuration must include 'account' field")
+        # rbac roles substitute env variables into their scope, cosmos-db roles into
+        # their account; the other field is used as given
+        field = "account" if self.type == "cosmos-db" else "scope"
+        self._templates = {field: compile_template(getattr(self, field))}
+
+    def missing_placeholders(self, env_vars: Mapping[str, str]) -> dict[str, list[str]]:
+        """Map each templated field to the placeholders in it that env_vars lacks."""
+        return {
+            field: missing
+            for field, template in self._templates.items()
+            if (missing := [n for n in template_placeholders(template) if n not in env_vars])
+        }
+
+    def resolve(self, env_vars: Mapping[str, str]) -> RoleAssignmentPlan:
+        """
+        Substitute env variables into the templated field.
+
+        Raises:
+            KeyError: If a placeholder is not in env_vars
+        """
+        values = {field: t.substitute(env_vars) for field, t in self._templates.items()}
+        return RoleAssignmentPlan(
+            type=self.type,
+            role=self.role,
+            scope=values.get("scope", self.scope),
+            account=values.get("account", self.account),
+        )
 
     class Config:
         """Pydantic config"""
@@ -161,6 +204,30 @@ class RoleConfig(BaseModel):
             raise ValueError("Roles list cannot be empty")
         return v
 
+    def resolve(self, env_vars: Mapping[str, str]) -> list[RoleAssignmentPlan]:
+        """
+        Resolve every role, checking all placeholders before resolving any.
+
+        Args:
+            env_vars: Values for the ${VAR_NAME} placeholders
+
+        Returns:
+            One RoleAssignmentPlan per role, in config order
+
+        Raises:
+            ValueError: Listing every missing variable and where it is used
+        """
+        problems = [
+            f"roles[{index}] ({role_def.role}) {field}: {', '.join(missing)}"
+            for index, role_def in enumerate(self.roles)
+            for field, missing in role_def.missing_placeholders(env_vars).items()
+        ]
+        if problems:
+            raise ValueError(
+                "Missing environment variables in role config:\n  " + "\n  ".join(problems)
+            )
+        return [role_def.resolve(env_vars) for role_def in self.roles]
+
     class Config:
         """Pydantic config"""
 
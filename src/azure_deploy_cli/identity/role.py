@@ -3,6 +3,7 @@
 import json
 import subprocess
 import uuid
+from collections.abc import Mapping
 from pathlib import Path
 from typing import Any
 
@@ -12,9 +13,9 @@ from azure.mgmt.authorization.v2022_04_01.models import (
 )
 
 from ..utils.azure_cli import get_credential, get_subscription_and_tenant, run_command
-from ..utils.env import load_env_vars_from_files, substitute_env_vars
+from ..utils.env import load_env_vars_from_files
 from ..utils.logging import get_logger
-from .models import RoleConfig, RoleDefinition
+from .models import RoleAssignmentPlan, RoleConfig
 
 logger = get_logger(__name__)
 
@@ -57,10 +58,13 @@ def assign_role_by_files(
     if not subscription_id:
         raise ValueError("Subscription ID is required for role assignment")
 
-    env_vars["SUBSCRIPTION_ID"] = subscription_id
+    # The loaded mapping is shared through the env file cache, so extend a copy
+    role_env_vars = {**env_vars, "SUBSCRIPTION_ID": subscription_id}
 
     try:
-        assign_roles(object_id, subscription_id, role_config, env_vars, object_type=object_type)
+        assign_roles(
+            object_id, subscription_id, role_config, role_env_vars, object_type=object_type
+        )
     except Exception as e:
         logger.error(f"Failed to assign roles: {str(e)}")
         raise
@@ -72,12 +76,15 @@ def assign_roles(
     object_id: str,
     subscription_id: str,
     role_config: RoleConfig,
-    env_vars: dict[str, str] | None = None,
+    env_vars: Mapping[str, str] | None = None,
     object_type: str = "ServicePrincipal",
 ) -> None:
     """
     Assign roles to a service principal based on role configuration.
 
+    Every role's placeholders are checked before any role is assigned, so a config
+    with missing variables fails up front with all of them listed.
+
     Args:
         object_id: Object ID of the service principal
         subscription_id: Azure subscription ID
@@ -85,34 +92,22 @@ def assign_roles(
         env_vars: Dictionary of environment variables to substitute in scopes
 
     Raises:
-        ValueError: If any role configuration is invalid
+        ValueError: If any role configuration is invalid or variables are missing
     """
-    if env_vars is None:
-        env_vars = {}
-
     try:
         logger.info(f"Processing role config: {role_config.description}")
         logger.info(f"Validating {len(role_config.roles)} role definitions")
+        plans = role_config.resolve(env_vars or {})
 
-        for i, role_def in enumerate(role_config.roles):
-            logger.critical(f"Processing role {i + 1}/{len(role_config.roles)}: {role_def.role}")
-
-            if role_def.type == "cosmos-db":
-                assign_cosmos_db_role(
-                    object_id,
-                    role_def,
-                    env_vars,
-                )
-            elif role_def.type == "rbac":
-                assign_rbac_role(
-                    object_id,
-                    subscription_id,
-                    role_def,
-                    env_vars,
-                    object_type=object_type,
-                )
+        for i, plan in enumerate(plans):
+            logger.critical(f"Processing role {i + 1}/{len(plans)}: {plan.role}")
+
+            if plan.type == "cosmos-db":
+                assign_cosmos_db_role(object_id, plan)
+            elif plan.type == "rbac":
+                assign_rbac_role(object_id, subscription_id, plan, object_type=object_type)
             else:
-                logger.warning(f"Unknown role type: {role_def.type}")
+                logger.warning(f"Unknown role type: {plan.type}")
 
         logger.success("Role assignments completed")
 
@@ -191,26 +186,22 @@ def exists_cosmos_role_assignment(
 
 def assign_cosmos_db_role(
     object_id: str,
-    role_def: RoleDefinition,
-    env_vars: dict[str, str],
+    plan: RoleAssignmentPlan,
 ) -> None:
     """
     Assign a Cosmos DB role to a service principal via Azure CLI.
 
     Args:
-        cosmos_client: Cosmos DB management client
         object_id: Object ID of the service principal
-        role_def: Validated role definition with type='cosmos-db'
-        env_vars: Environment variables for substitution
+        plan: Resolved role assignment with type='cosmos-db'
 
     Raises:
-        KeyError: If required environment variables are missing
         subprocess.CalledProcessError: If role assignment fails
     """
     try:
-        account_name = substitute_env_vars(role_def.account or "", env_vars)
-        scope = role_def.scope
-        role_name = role_def.role
+        account_name = plan.account or ""
+        scope = plan.scope
+        role_name = plan.role
 
         logger.info(f"Assigning Cosmos DB role '{role_name}' to SP on account '{account_name}'")
 
@@ -258,9 +249,6 @@ def assign_cosmos_db_role(
         run_command(assign_cmd)
         logger.success(f"Cosmos DB role '{role_name}' assigned successfully")
 
-    except KeyError as e:
-        logger.error(f"Environment variable substitution failed for Cosmos DB role: {str(e)}")
-        raise
     except subprocess.CalledProcessError as e:
         logger.error(f"Failed to assign Cosmos DB role: {str(e)}")
         raise
@@ -272,8 +260,7 @@ def assign_cosmos_db_role(
 def assign_rbac_role(
     object_id: str,
     subscription_id: str,
-    role_def: RoleDefinition,
-    env_vars: dict[str, str],
+    plan: RoleAssignmentPlan,
     object_type: str = "ServicePrincipal",
 ) -> None:
     """
@@ -282,15 +269,14 @@ def assign_rbac_role(
     Args:
         object_id: Object ID of the service principal
         subscription_id: Azure subscription ID
-        role_def: Validated role definition
-        env_vars: Environment variables for substitution
+        plan: Resolved role assignment with type='rbac'
 
     Raises:
         Exception: If role assignment fails
     """
     try:
-        scope = substitute_env_vars(role_def.scope, env_vars)
-        role_name = role_def.role
+        scope = plan.scope
+        role_name = plan.role
 
         logger.info(f"Looking up role definition for '{role_name}' at scope '{scope}'")
 
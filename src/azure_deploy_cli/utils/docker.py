@@ -1,64 +1,87 @@
 """Docker utility functions for image operations."""
 
-import subprocess
+import json
+import re
+import tempfile
+import threading
 from pathlib import Path
 
 from .logging import get_logger
+from .process import run_process
 
 logger = get_logger(__name__)
 
+DEFAULT_PLATFORMS = ["linux/amd64"]
+BUILDX_BUILDER_NAME = "azd-builder"
 
-def _run_and_stream(cmd: list[str], show_output: bool = True) -> int:
-    """Run a command and stream output to stderr in real-time.
+_buildx_builders: set[str] = set()
+_buildx_builder_lock = threading.Lock()
+
+# `docker push` ends with "<tag>: digest: sha256:<hex> size: <bytes>"
+_PUSH_DIGEST_PATTERN = re.compile(r"digest: (sha256:[0-9a-f]{64})")
+
+
+def image_exists(full_image_name: str) -> bool:
+    """
+    Check if a Docker image exists locally.
 
     Args:
-        cmd: Command and arguments to run
-        show_output: Whether to display output to stderr
+        full_image_name: Full image name including registry, repository, and tag
 
     Returns:
-        The return code of the process
+        True if the image exists locally, False otherwise
     """
-    process = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
+    result = run_process(
+        ["docker", "image", "inspect", full_image_name], prefix=full_image_name, show_output=False
     )
-    if process.stdout is not None:
-        for line in iter(process.stdout.readline, ""):
-            if line and show_output:
-                logger.info(line.rstrip("\n"))
-        process.stdout.close()
-    return process.wait()
+    return result.returncode == 0
 
 
-def image_exists(full_image_name: str) -> bool:
+def pin_image_digest(full_image_name: str, digest: str | None) -> str:
     """
-    Check if a Docker image exists locally.
+    Pin an image reference to a manifest digest.
+
+    The tag is kept for readability; the runtime pulls by digest.
 
     Args:
         full_image_name: Full image name including registry, repository, and tag
+        digest: Manifest digest (sha256:...), or None if unknown
 
     Returns:
-        True if the image exists locally, False otherwise
+        '<full_image_name>@<digest>', or the image name unchanged if the digest is unknown
     """
-    returncode = _run_and_stream(["docker", "image", "inspect", full_image_name], show_output=False)
-    return returncode == 0
+    if not digest:
+        logger.warning(f"No digest reported for '{full_image_name}'. Deploying it by tag.")
+        return full_image_name
+    return f"{full_image_name}@{digest}"
+
 
+def strip_image_digest(image: str) -> str:
+    """Return an image reference without its '@sha256:...' digest, if any."""
+    return image.split("@", 1)[0]
 
-def push_image(full_image_name: str) -> None:
+
+def push_image(full_image_name: str) -> str | None:
     """
     Push a Docker image to the registry.
 
     Args:
         full_image_name: Full image name including registry, repository, and tag
 
+    Returns:
+        The digest of the pushed manifest, or None if docker did not report it
+
     Raises:
         RuntimeError: If the docker push command fails
     """
-    returncode = _run_and_stream(["docker", "push", full_image_name])
-    if returncode != 0:
-        raise RuntimeError("Docker push failed")
+    result = run_process(["docker", "push", full_image_name], prefix=full_image_name)
+    if result.returncode != 0:
+        raise RuntimeError(f"Docker push failed. Last output:\n{result.tail_text()}")
+    for line in reversed(result.tail):
+        match = _PUSH_DIGEST_PATTERN.search(line)
+        if match:
+            return match.group(1)
+    return None
 
 
 def pull_image(full_image_name: str, platform: str | None = None) -> None:
@@ -76,9 +99,9 @@ def pull_image(full_image_name: str, platform: str | None = None) -> None:
     if platform:
         cmd.extend(["--platform", platform])
     cmd.append(full_image_name)
-    returncode = _run_and_stream(cmd)
-    if returncode != 0:
-        raise RuntimeError("Docker pull failed")
+    result = run_process(cmd, prefix=full_image_name)
+    if result.returncode != 0:
+        raise RuntimeError(f"Docker pull failed. Last output:\n{result.tail_text()}")
 
 
 def tag_image(source_image: str, target_image: str) -> None:
@@ -92,16 +115,16 @@ def tag_image(source_image: str, target_image: str) -> None:
     Raises:
         RuntimeError: If the docker tag command fails
     """
-    returncode = _run_and_stream(["docker", "tag", source_image, target_image])
-    if returncode != 0:
-        raise RuntimeError("Docker tag failed")
+    result = run_process(["docker", "tag", source_image, target_image], prefix=target_image)
+    if result.returncode != 0:
+        raise RuntimeError(f"Docker tag failed. Last output:\n{result.tail_text()}")
 
 
 def pull_retag_and_push_image(
     source_full_image_name: str,
     target_full_image_name: str,
     platform: str | None = None,
-) -> None:
+) -> str | None:
     """
     Pull an existing image, retag it, and push to registry.
 
@@ -109,6 +132,9 @@ def pull_retag_and_push_image(
         source_full_image_name: Full name of the source image (registry/image:tag)
         target_full_image_name: Full name of the target image (registry/image:new_tag)
 
+    Returns:
+        The digest of the pushed manifest, or None if docker did not report it
+
     Raises:
         RuntimeError: If the source image doesn't exist or operations fail
     """
@@ -116,21 +142,98 @@ def pull_retag_and_push_image(
         pull_image(source_full_image_name, platform)
 
     tag_image(source_full_image_name, target_full_image_name)
-    push_image(target_full_image_name)
+    return push_image(target_full_image_name)
+
+
+def ensure_buildx_builder(name: str = BUILDX_BUILDER_NAME) -> str:
+    """
+    Make sure a persistent docker-container buildx builder exists, creating it if missing.
+
+    Builds that share the builder share its cache, across containers and deploys on
+    the same host. The check runs once per process.
+
+    Args:
+        name: Builder name
+
+    Returns:
+        The builder name
+
+    Raises:
+        RuntimeError: If the builder cannot be created
+    """
+    with _buildx_builder_lock:
+        if name in _buildx_builders:
+            return name
+        inspect = run_process(["docker", "buildx", "inspect", name], prefix=name, show_output=False)
+        if inspect.returncode != 0:
+            logger.info(f"Creating buildx builder '{name}'...")
+            result = run_process(
+                [
+                    "docker",
+                    "buildx",
+                    "create",
+                    "--name",
+                    name,
+                    "--driver",
+                    "docker-container",
+                    "--bootstrap",
+                ],
+                prefix=name,
+            )
+            if result.returncode != 0:
+                raise RuntimeError(
+                    f"Failed to create buildx builder '{name}'. Last output:\n{result.tail_text()}"
+                )
+        _buildx_builders.add(name)
+    return name
+
+
+def prune_buildx_builder(name: str, keep_storage: str) -> None:
+    """
+    Prune a buildx builder's cache down to a size, keeping the most recently used layers.
+
+    Only builders used by this process are pruned. Failures are logged, not raised, so
+    a prune never fails a deploy.
+
+    Args:
+        name: Builder name
+        keep_storage: Cache size to keep (e.g. "10gb")
+    """
+    with _buildx_builder_lock:
+        if name not in _buildx_builders:
+            logger.debug(f"Buildx builder '{name}' was not used. Skipping prune.")
+            return
+    logger.info(f"Pruning buildx builder '{name}' cache to {keep_storage}...")
+    result = run_process(
+        ["docker", "buildx", "prune", "--builder", name, "--keep-storage", keep_storage, "--force"],
+        prefix=name,
+    )
+    if result.returncode != 0:
+        logger.warning(f"Failed to prune buildx builder '{name}'")
 
 
 def build_and_push_image(
     dockerfile: str,
     full_image_name: str,
     build_args: dict[str, str] | None = None,
-) -> None:
+    platforms: list[str] | None = None,
+    builder: str | None = None,
+) -> str | None:
     """
     Build a Docker image using buildx and push to registry.
 
+    All platforms are built in parallel by one buildx build; with more than one, a
+    multi-arch manifest list is pushed.
+
     Args:
         dockerfile: Path to the Dockerfile
         full_image_name: Full image name including registry, repository, and tag
         build_args: Optional dictionary of build arguments to pass to docker build
+        platforms: Platforms to build for (default: linux/amd64)
+        builder: Optional buildx builder to use instead of the current one
+
+    Returns:
+        The digest of the pushed manifest, read from the buildx metadata file
 
     Raises:
         RuntimeError: If the docker build and push command fails
@@ -141,21 +244,31 @@ def build_and_push_image(
         "buildx",
         "build",
         "--platform",
-        "linux/amd64",
+        ",".join(platforms or DEFAULT_PLATFORMS),
         "-t",
         full_image_name,
         "-f",
         dockerfile,
     ]
 
+    if builder:
+        cmd.extend(["--builder", builder])
+
     # Add build args if provided
     if build_args:
         for key, value in build_args.items():
             cmd.extend(["--build-arg", f"{key}={value}"])
 
-    cmd.extend([src_folder, "--push"])
-
-    logger.info(f"Running command: {' '.join(cmd)}")
-    returncode = _run_and_stream(cmd)
-    if returncode != 0:
-        raise RuntimeError("Docker build and push failed")
+    with tempfile.TemporaryDirectory() as metadata_dir:
+        metadata_file = Path(metadata_dir) / "metadata.json"
+        cmd.extend(["--metadata-file", str(metadata_file), src_folder, "--push"])
+
+        logger.info(f"Running command: {' '.join(cmd)}")
+        result = run_process(cmd, prefix=full_image_name)
+        if result.returncode != 0:
+            raise RuntimeError(f"Docker build and push failed. Last output:\n{result.tail_text()}")
+        if not metadata_file.exists():
+            return None
+        metadata = json.loads(metadata_file.read_text())
+    digest: str | None = metadata.get("containerimage.digest")
+    return digest
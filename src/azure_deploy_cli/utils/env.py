@@ -1,16 +1,40 @@
 """Environment variable and credential file handling utilities."""
 
+import os
+import re
+import stat
+import tempfile
+import threading
+from collections.abc import Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 from string import Template
+from types import MappingProxyType
 
 from dotenv import dotenv_values
 
 from .logging import get_logger
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+
 logger = get_logger(__name__)
 
+# 'KEY=...' or 'export KEY=...', as accepted by python-dotenv
+_ASSIGNMENT_PATTERN = re.compile(r"\s*(?:export\s+)?(?P<key>[A-Za-z_][A-Za-z0-9_.-]*)\s*=")
+
+_EMPTY_ENV: Mapping[str, str] = MappingProxyType({})
+_env_cache_lock = threading.Lock()
+# Resolved path -> ((mtime_ns, size), parsed values)
+_parsed_env_files: dict[Path, tuple[tuple[int, int], Mapping[str, str | None]]] = {}
+# ((resolved path, (mtime_ns, size)), ...) -> merged values
+_merged_env_files: dict[tuple[tuple[Path, tuple[int, int] | None], ...], Mapping[str, str]] = {}
+
 
-def substitute_env_vars(value: str, env_vars: dict[str, str]) -> str:
+def substitute_env_vars(value: str, env_vars: Mapping[str, str]) -> str:
     """
     Substitute environment variables in a string using Template format.
 
@@ -41,43 +65,208 @@ def substitute_env_vars(value: str, env_vars: dict[str, str]) -> str:
         '/subscriptions/12345678-1234-1234-1234-123456789012/resourceGroups/\
         my-rg/providers/Microsoft.CognitiveServices/accounts/my-openai'
     """
-    template = Template(value)
-    result = template.substitute(env_vars)
-    return result
+    return compile_template(value).substitute(env_vars)
+
+
+@lru_cache(maxsize=1024)
+def compile_template(value: str) -> Template:
+    """Compile a ${VAR_NAME} template once per distinct string."""
+    return Template(value)
+
+
+def template_placeholders(template: Template) -> list[str]:
+    """
+    List the variable names a template refers to, in order of first use.
+
+    Raises:
+        ValueError: If the template contains an invalid placeholder
+    """
+    names: dict[str, None] = {}
+    for match in template.pattern.finditer(template.template):
+        name = match.group("named") or match.group("braced")
+        if name:
+            names[name] = None
+        elif match.group("invalid") is not None:
+            raise ValueError(
+                f"Invalid placeholder at position {match.start('invalid')} in '{template.template}'"
+            )
+    return list(names)
+
+
+def _file_version(path: Path) -> tuple[int, int] | None:
+    try:
+        file_stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return file_stat.st_mtime_ns, file_stat.st_size
+
+
+def _read_env_file(path: Path, version: tuple[int, int] | None) -> Mapping[str, str | None]:
+    if version is None:
+        # Missing files have always loaded as empty; they are not cached
+        return dotenv_values(path)
+    with _env_cache_lock:
+        cached = _parsed_env_files.get(path)
+    if cached and cached[0] == version:
+        return cached[1]
+    env_vars = MappingProxyType(dict(dotenv_values(path)))
+    logger.info(f"Loaded {len(env_vars)} variables from {path}")
+    with _env_cache_lock:
+        _parsed_env_files[path] = (version, env_vars)
+    return env_vars
 
 
 def load_env_vars_from_files(
-    env_file_paths: list[Path] | None,
-) -> dict[str, str]:
+    env_file_paths: Iterable[Path] | None,
+) -> Mapping[str, str]:
     """
     Load environment variables from multiple .env files using python-dotenv.
 
     Files are loaded in order and merged, with later files overriding earlier
-    ones.
+    ones. Parsed files and merged results are cached for the life of the process,
+    keyed by each file's path, modification time and size, so a file is parsed
+    again only after it changes.
 
     Args:
         env_file_paths: List of paths to .env files with KEY=VALUE format
 
     Returns:
-        Merged dictionary of environment variables
+        Read-only merged mapping of environment variables; copy it to change it
 
     Raises:
-        FileNotFoundError: If any file doesn't exist
         Exception: If file parsing fails
     """
     if not env_file_paths:
-        return {}
+        return _EMPTY_ENV
+    paths = [Path(path).resolve() for path in env_file_paths]
+    versions = [_file_version(path) for path in paths]
+    key = tuple(zip(paths, versions, strict=True))
+    with _env_cache_lock:
+        cached = _merged_env_files.get(key)
+    if cached is not None:
+        return cached
 
     merged_vars: dict[str, str | None] = {}
+    for path, version in zip(paths, versions, strict=True):
+        merged_vars.update(_read_env_file(path, version))
+    logger.info(f"Total merged: {len(merged_vars)} unique environment variables")
+    merged = MappingProxyType({k: v for k, v in merged_vars.items() if v is not None})
+    if None not in versions:
+        with _env_cache_lock:
+            _merged_env_files[key] = merged
+    return merged
 
-    for env_file_path in env_file_paths:
-        env_vars = dotenv_values(env_file_path)
-        merged_vars.update(env_vars)
-        logger.info(f"Loaded {len(env_vars)} variables from {env_file_path}")
 
-    logger.info(f"Total merged: {len(merged_vars)} unique environment variables")
-    merged_vars_cleaned: dict[str, str] = {k: v for k, v in merged_vars.items() if v is not None}
-    return merged_vars_cleaned
+def preload_env_vars_files(env_file_path_lists: Iterable[Iterable[Path] | None]) -> None:
+    """
+    Merge commonly used lists of env files ahead of time.
+
+    Later calls to load_env_vars_from_files with any of these lists are answered
+    from the cache while the files are unchanged.
+
+    Args:
+        env_file_path_lists: Lists of env files, each as passed to load_env_vars_from_files
+    """
+    for env_file_paths in {tuple(paths) for paths in env_file_path_lists if paths}:
+        load_env_vars_from_files(env_file_paths)
+
+
+class EnvFile:
+    """
+    Order-preserving model of an env file with an index of the line defining each key.
+
+    Comments, blank lines and lines that are not assignments are kept verbatim, so
+    only the lines of updated keys change when the file is written back.
+    """
+
+    def __init__(self, lines: list[str]):
+        self._lines: list[str | None] = list(lines)
+        self._index: dict[str, int] = {}
+        self._duplicates: dict[str, list[int]] = {}
+        for line_number, line in enumerate(lines):
+            match = _ASSIGNMENT_PATTERN.match(line)
+            if not match:
+                continue
+            key = match["key"]
+            if key in self._index:
+                self._duplicates.setdefault(key, []).append(line_number)
+            else:
+                self._index[key] = line_number
+
+    @classmethod
+    def read(cls, path: Path) -> "EnvFile":
+        """Parse an env file; a missing file is parsed as empty."""
+        try:
+            content = path.read_text()
+        except FileNotFoundError:
+            content = ""
+        return cls(content.splitlines())
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index
+
+    def update(self, env_var_map: Mapping[str, str]) -> None:
+        """
+        Set many variables in one pass.
+
+        Existing keys are updated where they are first defined, and later definitions
+        of them are dropped; new keys are appended in the given order.
+        """
+        for key, value in env_var_map.items():
+            line = f"{key}={value}"
+            line_number = self._index.get(key)
+            if line_number is None:
+                self._index[key] = len(self._lines)
+                self._lines.append(line)
+                continue
+            self._lines[line_number] = line
+            for duplicate in self._duplicates.pop(key, []):
+                self._lines[duplicate] = None
+
+    def render(self) -> str:
+        lines = [line for line in self._lines if line is not None]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def write(self, path: Path) -> None:
+        """
+        Write the file atomically, so readers never see a partial file.
+
+        The mode of an existing file is kept; new files are only readable by the owner,
+        as env files often hold credentials.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.render())
+            try:
+                os.chmod(tmp_path, stat.S_IMODE(path.stat().st_mode))
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """
+    Hold an advisory lock for updating a file.
+
+    The lock is taken on a separate '<name>.lock' file, because atomic writes replace
+    the file itself. Where fcntl is unavailable (Windows), no lock is taken.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(f"{path.name}.lock"), "a") as lock_file:
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
 
 
 def add_var_to_env_file(
@@ -85,24 +274,16 @@ def add_var_to_env_file(
     env_file_path: Path,
 ) -> None:
     """
-    Add or update in an environment file.
+    Add or update variables in an environment file.
+
+    All variables are applied in one read-modify-write under an advisory lock, and the
+    file is replaced atomically. Other lines keep their content and order.
 
     Args:
         env_var_map: Dictionary of environment variable key-value pairs
         env_file_path: Path to the environment file
     """
-    env_file_path.parent.mkdir(parents=True, exist_ok=True)
-    existing_content = ""
-    if env_file_path.exists():
-        with open(env_file_path) as f:
-            existing_content = f.read()
-    lines = [
-        line
-        for line in existing_content.split("\n")
-        if not any(line.startswith(f"{env_var_key}=") for env_var_key in env_var_map.keys())
-    ]
-    with open(env_file_path, "w") as f:
-        f.write("\n".join(lines).rstrip())
-        for env_var_key, env_var_value in env_var_map.items():
-            env_var_line = f"{env_var_key}={env_var_value}\n"
-            f.write("\n" + env_var_line)
+    with _locked(env_file_path):
+        env_file = EnvFile.read(env_file_path)
+        env_file.update(env_var_map)
+        env_file.write(env_file_path)
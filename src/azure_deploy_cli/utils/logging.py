@@ -1,6 +1,14 @@
+import atexit
+import copy
+import datetime
+import json
 import logging
+import re
 import sys
-from typing import cast
+import time
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from typing import Any, cast
 
 # Color codes for output
 RED = "\033[0;31m"
@@ -23,18 +31,75 @@ LEVEL_SYMBOLS = {
 SUCCESS_LEVEL = 25
 STDOUT_LEVEL = 26
 
+LOG_FORMATS = ("text", "json")
+
+# Optional event fields, set through ``extra=`` when logging
+EVENT_FIELDS = ("phase", "app", "revision", "duration_ms")
+
+_ANSI_ESCAPE_PATTERN = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+_json_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str)
+
 
 class ColoredFormatter(logging.Formatter):
-    """Custom formatter that adds colored symbols based on log level"""
+    """
+    Custom formatter that adds colored symbols based on log level.
+
+    The symbol is part of a per-level format string built once, so records are
+    never modified and formatting one twice gives the same output.
+    """
+
+    def __init__(self, fmt: str | None = None, datefmt: str | None = None) -> None:
+        super().__init__(fmt, datefmt)
+        message_fmt = fmt or "%(message)s"
+        self._level_formatters = {
+            level_name: logging.Formatter(
+                message_fmt.replace("%(message)s", f"{symbol} %(message)s"), datefmt
+            )
+            for level_name, symbol in LEVEL_SYMBOLS.items()
+        }
 
     def format(self, record: logging.LogRecord) -> str:
         # For stdout, don't add any symbols
         if record.levelno == STDOUT_LEVEL:
             return super().format(record)
 
-        symbol = LEVEL_SYMBOLS.get(record.levelname, "")
-        record.msg = f"{symbol} {record.msg}"
-        return super().format(record)
+        formatter = self._level_formatters.get(record.levelname)
+        if formatter is None:
+            return super().format(record)
+        return formatter.format(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats each record as one compact JSON object.
+
+    Every object has ``timestamp`` (UTC, ISO 8601), ``level``, ``logger`` and
+    ``message``; the event fields in EVENT_FIELDS are included when the record has
+    them, and ``exception`` when it carries exception info. Colour codes, such as
+    those in streamed build output, are stripped.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        event: dict[str, Any] = {
+            "timestamp": datetime.datetime.fromtimestamp(
+                record.created, datetime.timezone.utc
+            ).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": _ANSI_ESCAPE_PATTERN.sub("", record.getMessage()),
+        }
+        for name in EVENT_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                event[name] = value
+        if record.exc_info:
+            event["exception"] = self.formatException(record.exc_info)
+        return _json_encoder.encode(event)
+
+
+def elapsed_ms(start: float) -> int:
+    """Milliseconds since ``start``, a time.monotonic() reading, for ``duration_ms``."""
+    return round((time.monotonic() - start) * 1000)
 
 
 class CCLogger(logging.Logger):
@@ -42,27 +107,75 @@ class CCLogger(logging.Logger):
 
     def success(self, message: str, *args, **kwargs) -> None:
         """Log success message"""
-        self.log(SUCCESS_LEVEL, message, *args, **kwargs)
+        if self.isEnabledFor(SUCCESS_LEVEL):
+            self._log(SUCCESS_LEVEL, message, args, **kwargs)
 
     def stdout(self, message: str, *args, **kwargs) -> None:
         """Log a message to stdout"""
-        self.log(STDOUT_LEVEL, message, *args, **kwargs)
+        if self.isEnabledFor(STDOUT_LEVEL):
+            self._log(STDOUT_LEVEL, message, args, **kwargs)
+
+
+class LocalQueueHandler(QueueHandler):
+    """
+    Queues records for a listener in the same process.
+
+    Unlike QueueHandler, records keep their exception info instead of having it
+    rendered into the message, so every formatter sees the same record with or without
+    a queue. Only the message arguments are merged, as they could change before the
+    listener formats the record.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
 
 
 configured = False
 
+# Handlers installed on the root logger by configure_logging, and the listener
+# draining them when logging through a queue
+_handlers: list[logging.Handler] = []
+_listener: QueueListener | None = None
+
+
+def _stop_listener() -> None:
+    """Flush and stop the queue listener, if any."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
 
-def configure_logging(level: str = "info") -> None:
+atexit.register(_stop_listener)
+
+
+def configure_logging(level: str = "info", queue: bool = False, log_format: str = "text") -> None:
     """
     Configure root logger.
 
-    - All logs except STDOUT go to stderr.
+    - All logs except STDOUT go to stderr, as coloured text or one JSON object per line.
     - STDOUT level logs go to stdout.
     - Log level is configurable (debug, info, warning, error, critical, none).
+    - With ``queue``, records are put on a queue and written to the streams by a
+      background thread, so threads streaming build output never block on log I/O.
+
+    Calling it again replaces the handlers it installed before; a root logger
+    configured by someone else is left alone.
+
+    Args:
+        level: Log level name
+        queue: Whether to write log output from a background thread
+        log_format: Format of the stderr logs, one of LOG_FORMATS
+
+    Raises:
+        ValueError: If the log format is unknown
     """
-    global configured
-    if configured:
-        return
+    global configured, _listener
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format '{log_format}', expected one of {LOG_FORMATS}")
     # Set custom logger class
     logging.setLoggerClass(CCLogger)
 
@@ -75,8 +188,11 @@ def configure_logging(level: str = "info") -> None:
     root_logger = logging.getLogger()
 
     # Only configure if not already configured
-    if root_logger.handlers:
+    if any(handler not in _handlers for handler in root_logger.handlers):
         return
+    for handler in _handlers:
+        root_logger.removeHandler(handler)
+    _stop_listener()
 
     # Map string level to logging constant
     level_upper = level.upper()
@@ -88,8 +204,9 @@ def configure_logging(level: str = "info") -> None:
     stderr_handler = logging.StreamHandler(sys.stderr)
     stderr_handler.setLevel(log_level)
     stderr_handler.addFilter(lambda record: record.levelno != STDOUT_LEVEL)
-    stderr_handler.setFormatter(ColoredFormatter("%(asctime)s %(message)s"))
-    root_logger.addHandler(stderr_handler)
+    stderr_handler.setFormatter(
+        JsonFormatter() if log_format == "json" else ColoredFormatter("%(asctime)s %(message)s")
+    )
 
     # Handler for stdout (only for STDOUT level)
     stdout_handler = logging.StreamHandler(sys.stdout)
@@ -97,7 +214,16 @@ def configure_logging(level: str = "info") -> None:
     stdout_handler.addFilter(lambda record: record.levelno == STDOUT_LEVEL)
     # No formatter needed, just output the message
     stdout_handler.setFormatter(logging.Formatter("%(message)s"))
-    root_logger.addHandler(stdout_handler)
+
+    handlers: list[logging.Handler] = [stderr_handler, stdout_handler]
+    if queue:
+        queue_handler = LocalQueueHandler(SimpleQueue())
+        _listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        handlers = [queue_handler]
+    for handler in handlers:
+        root_logger.addHandler(handler)
+    _handlers[:] = handlers
 
     # Suppress noisy third-party logs
     logging.getLogger("azure.identity").setLevel(logging.WARNING)
@@ -121,5 +247,6 @@ def get_logger(name: str) -> CCLogger:
     Returns:
         CCLogger instance with success() method
     """
-    configure_logging()
+    if not configured:
+        configure_logging()
     return cast(CCLogger, logging.getLogger(name))
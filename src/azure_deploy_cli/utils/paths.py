@@ -0,0 +1,27 @@
+"""Per-user directories for state and caches, independent of the working directory."""
+
+import os
+import sys
+from pathlib import Path
+
+APP_DIR_NAME = "azure-deploy-cli"
+
+
+def _user_dir(xdg_env_name: str, xdg_default: Path) -> Path:
+    if sys.platform == "win32" and os.environ.get("LOCALAPPDATA"):
+        base = Path(os.environ["LOCALAPPDATA"])
+    elif os.environ.get(xdg_env_name):
+        base = Path(os.environ[xdg_env_name])
+    else:
+        base = xdg_default
+    return base / APP_DIR_NAME
+
+
+def user_state_dir() -> Path:
+    """State that must survive between runs: $XDG_STATE_HOME or ~/.local/state."""
+    return _user_dir("XDG_STATE_HOME", Path.home() / ".local" / "state")
+
+
+def user_cache_dir() -> Path:
+    """Data that can be recomputed: $XDG_CACHE_HOME or ~/.cache."""
+    return _user_dir("XDG_CACHE_HOME", Path.home() / ".cache")
@@ -0,0 +1,117 @@
+"""Run many subprocesses concurrently and multiplex their output to the log."""
+
+import asyncio
+import logging
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from .logging import get_logger
+
+logger = get_logger(__name__)
+
+OUTPUT_TAIL_LINES = 50
+PROGRESS_LOG_INTERVAL_SECONDS = 2.0
+_STREAM_LIMIT_BYTES = 1024 * 1024
+
+# Layer transfer progress from buildx (`#5 sha256:... 10MB / 30MB 0.8s`) and from
+# docker push/pull (`4f4fb700ef54: Pushing [==>   ]`)
+_PROGRESS_LINE_PATTERN = re.compile(
+    r"^(#\d+ sha256:[0-9a-f]+ .* / |[0-9a-f]{12}: "
+    r"(Preparing|Waiting|Pushing|Pulling fs layer|Downloading|Extracting|Verifying))"
+)
+
+
+@dataclass
+class ProcessResult:
+    """Exit status and last output lines of a finished process."""
+
+    returncode: int
+    tail: list[str] = field(default_factory=list)
+
+    def tail_text(self, lines: int = 20) -> str:
+        return "\n".join(self.tail[-lines:])
+
+
+class ProcessRunner:
+    """
+    Runs subprocesses on one background event loop.
+
+    Any thread can start a process; all running processes are read concurrently by the
+    same loop, and each output line is logged with the process prefix. Noisy transfer
+    progress lines are logged at most once per interval per process, and the last
+    lines of every process are kept for error reporting.
+    """
+
+    def __init__(self) -> None:
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+
+    def run(self, cmd: list[str], prefix: str, show_output: bool = True) -> ProcessResult:
+        """
+        Run a command to completion, streaming its output.
+
+        Args:
+            cmd: Command and arguments to run
+            prefix: Label prepended to each logged line
+            show_output: Whether to log the output
+
+        Returns:
+            ProcessResult with the return code and the last output lines
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._run(cmd, prefix, show_output), self._get_loop()
+        )
+        return future.result()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="process-runner", daemon=True
+                ).start()
+            return self._loop
+
+    async def _run(self, cmd: list[str], prefix: str, show_output: bool) -> ProcessResult:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            limit=_STREAM_LIMIT_BYTES,
+        )
+        tail: deque[str] = deque(maxlen=OUTPUT_TAIL_LINES)
+        # Checked once per process rather than for each of its output lines
+        show_output = show_output and logger.isEnabledFor(logging.INFO)
+        suppressed = 0
+        last_progress_at = 0.0
+        if process.stdout is None:
+            return ProcessResult(returncode=await process.wait())
+        while line_bytes := await process.stdout.readline():
+            line = line_bytes.decode(errors="replace").rstrip("\n")
+            tail.append(line)
+            if not show_output or not line:
+                continue
+            if _PROGRESS_LINE_PATTERN.match(line):
+                now = time.monotonic()
+                if now - last_progress_at < PROGRESS_LOG_INTERVAL_SECONDS:
+                    suppressed += 1
+                    continue
+                last_progress_at = now
+                if suppressed:
+                    line = f"{line} (+{suppressed} progress lines)"
+                    suppressed = 0
+            logger.info("[%s] %s", prefix, line)
+        if suppressed:
+            logger.info("[%s] (%d progress lines not shown)", prefix, suppressed)
+        return ProcessResult(returncode=await process.wait(), tail=list(tail))
+
+
+_runner = ProcessRunner()
+
+
+def run_process(cmd: list[str], prefix: str, show_output: bool = True) -> ProcessResult:
+    """Run a command on the shared process runner. See ProcessRunner.run."""
+    return _runner.run(cmd, prefix, show_output)
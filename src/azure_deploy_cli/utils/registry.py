@@ -0,0 +1,154 @@
+"""Container registry lookups over the registry v2 API."""
+
+import json
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from .azure_cli import run_command
+from .logging import get_logger
+
+logger = get_logger(__name__)
+
+REGISTRY_TIMEOUT_SECONDS = 10
+KNOWN_TAG_TTL_SECONDS = 300.0
+# ACR refresh tokens are valid for 3 hours; renew well before that
+REFRESH_TOKEN_TTL_SECONDS = 3600.0
+
+_MANIFEST_MEDIA_TYPES = ", ".join(
+    [
+        "application/vnd.oci.image.index.v1+json",
+        "application/vnd.oci.image.manifest.v1+json",
+        "application/vnd.docker.distribution.manifest.list.v2+json",
+        "application/vnd.docker.distribution.manifest.v2+json",
+    ]
+)
+
+_lock = threading.Lock()
+_refresh_tokens: dict[str, tuple[str, float]] = {}
+_known_tags: dict[str, tuple[str, float]] = {}
+
+
+def split_image_name(full_image_name: str) -> tuple[str, str, str]:
+    """
+    Split an image reference into registry server, repository and tag.
+
+    Args:
+        full_image_name: Image reference as 'registry/repository:tag', optionally
+            followed by '@sha256:...'
+
+    Returns:
+        Tuple of (registry_server, repository, tag)
+
+    Raises:
+        ValueError: If the reference has no registry or no tag
+    """
+    name = full_image_name.split("@", 1)[0]
+    registry_server, sep, repository_and_tag = name.partition("/")
+    repository, tag_sep, tag = repository_and_tag.rpartition(":")
+    if not sep or not tag_sep or not repository or not tag:
+        raise ValueError(f"Expected 'registry/repository:tag', got '{full_image_name}'")
+    return registry_server, repository, tag
+
+
+def remember_image_digest(full_image_name: str, digest: str | None) -> None:
+    """Record that an image tag exists in its registry, e.g. right after pushing it."""
+    if not digest:
+        return
+    with _lock:
+        _known_tags[full_image_name] = (digest, time.monotonic() + KNOWN_TAG_TTL_SECONDS)
+
+
+def get_remote_image_digest(full_image_name: str) -> str | None:
+    """
+    Look up the manifest digest of an image tag in its Azure Container Registry.
+
+    Tags seen recently by this process are answered from a short-lived cache; other
+    tags are checked with a manifest HEAD request authenticated with an ACR token.
+    Lookup failures are logged and reported as a missing image, so the caller falls
+    back to building or pushing it.
+
+    Args:
+        full_image_name: Image reference as 'registry/repository:tag'
+
+    Returns:
+        The manifest digest (sha256:...), or None if the tag does not exist or the
+        registry could not be queried
+    """
+    now = time.monotonic()
+    with _lock:
+        known = _known_tags.get(full_image_name)
+    if known and known[1] > now:
+        return known[0]
+
+    registry_server, repository, tag = split_image_name(full_image_name)
+    try:
+        access_token = _get_access_token(registry_server, repository)
+        digest = _head_manifest(registry_server, repository, tag, access_token)
+    except (OSError, ValueError, KeyError, subprocess.CalledProcessError) as e:
+        logger.warning(f"Could not check registry for '{full_image_name}': {e}")
+        return None
+    remember_image_digest(full_image_name, digest)
+    return digest
+
+
+def _get_refresh_token(registry_server: str) -> str:
+    now = time.monotonic()
+    with _lock:
+        cached = _refresh_tokens.get(registry_server)
+        if cached and cached[1] > now:
+            return cached[0]
+    result = run_command(
+        [
+            "az",
+            "acr",
+            "login",
+            "--name",
+            registry_server.split(".")[0],
+            "--expose-token",
+            "--output",
+            "json",
+        ]
+    )
+    refresh_token: str = result["accessToken"]
+    with _lock:
+        _refresh_tokens[registry_server] = (refresh_token, now + REFRESH_TOKEN_TTL_SECONDS)
+    return refresh_token
+
+
+def _get_access_token(registry_server: str, repository: str) -> str:
+    body = urllib.parse.urlencode(
+        {
+            "grant_type": "refresh_token",
+            "service": registry_server,
+            "scope": f"repository:{repository}:pull",
+            "refresh_token": _get_refresh_token(registry_server),
+        }
+    ).encode()
+    request = urllib.request.Request(
+        f"https://{registry_server}/oauth2/token", data=body, method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=REGISTRY_TIMEOUT_SECONDS) as response:
+        access_token: str = json.load(response)["access_token"]
+    return access_token
+
+
+def _head_manifest(
+    registry_server: str, repository: str, tag: str, access_token: str
+) -> str | None:
+    request = urllib.request.Request(
+        f"https://{registry_server}/v2/{repository}/manifests/{tag}",
+        method="HEAD",
+        headers={"Authorization": f"Bearer {access_token}", "Accept": _MANIFEST_MEDIA_TYPES},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=REGISTRY_TIMEOUT_SECONDS) as response:
+            digest: str | None = response.headers.get("Docker-Content-Digest")
+            return digest
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            return None
+        raise
@@ -3,6 +3,7 @@ import pytest
 from azure_deploy_cli.identity.models import (
     AzureGroup,
     ManagedIdentity,
+    RoleAssignmentPlan,
     RoleConfig,
     RoleDefinition,
     SPAuthCredentials,
@@ -247,3 +248,41 @@ class TestRoleConfig:
                 description="Test config",
                 roles=[],
             )
+
+    def test_resolve_substitutes_rbac_scope_and_cosmos_account(self):
+        config = RoleConfig(
+            description="Test config",
+            roles=[
+                RoleDefinition(role="Reader", scope="/subscriptions/${SUBSCRIPTION_ID}"),
+                RoleDefinition(
+                    type="cosmos-db", role="Data Contributor", scope="/", account="${COSMOS}"
+                ),
+            ],
+        )
+
+        plans = config.resolve({"SUBSCRIPTION_ID": "sub-id", "COSMOS": "my-cosmos"})
+
+        assert plans == [
+            RoleAssignmentPlan(type="rbac", role="Reader", scope="/subscriptions/sub-id"),
+            RoleAssignmentPlan(
+                type="cosmos-db", role="Data Contributor", scope="/", account="my-cosmos"
+            ),
+        ]
+
+    def test_resolve_reports_every_missing_variable(self):
+        config = RoleConfig(
+            description="Test config",
+            roles=[
+                RoleDefinition(role="Reader", scope="/subscriptions/${SUB}/rg/${RG}"),
+                RoleDefinition(
+                    type="cosmos-db", role="Data Contributor", scope="/", account="${COSMOS}"
+                ),
+            ],
+        )
+
+        with pytest.raises(ValueError) as exc_info:
+            config.resolve({"SUB": "sub-id"})
+
+        message = str(exc_info.value)
+        assert "roles[0] (Reader) scope: RG" in message
+        assert "roles[1] (Data Contributor) account: COSMOS" in message
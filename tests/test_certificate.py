@@ -0,0 +1,180 @@
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+from azure.mgmt.appcontainers.models import (
+    CustomDomain,
+    ManagedCertificate,
+    ManagedCertificateProperties,
+)
+
+from azure_deploy_cli.aca.certificate import (
+    _managed_certificate_name,
+    _poll_with_backoff,
+    bind_aca_managed_certificate,
+)
+from azure_deploy_cli.aca.snapshot import ResourceSnapshot
+
+ENV_ID = "/subscriptions/sub/resourceGroups/rg/providers/Microsoft.App/managedEnvironments/env"
+
+
+def create_certificate(domain, state="Succeeded"):
+    cert = ManagedCertificate(
+        location="westeurope",
+        properties=ManagedCertificateProperties(subject_name=domain),
+    )
+    cert.id = f"{ENV_ID}/managedCertificates/{_managed_certificate_name(domain)}"
+    cert.properties.provisioning_state = state
+    return cert
+
+
+def create_mock_client(custom_domains=None, certificates=None):
+    mock_client = Mock()
+    mock_app = Mock()
+    mock_app.configuration.ingress.custom_domains = custom_domains or []
+    mock_client.container_apps.get.return_value = (mock_app, 'W/"etag-1"')
+    mock_client.managed_environments.get.return_value = Mock(location="westeurope")
+    analysis = Mock(is_hostname_already_verified=False, custom_domain_verification_test="Passed")
+    mock_client.container_apps.list_custom_host_name_analysis.return_value = analysis
+    mock_client.managed_certificates.list.return_value = certificates or []
+    return mock_client
+
+
+def patched_custom_domains(mock_client) -> list[list[dict]]:
+    patches = []
+    for call in mock_client.container_apps.begin_update.call_args_list:
+        body = json.loads(call.kwargs["container_app_envelope"].getvalue())
+        patches.append(body["properties"]["configuration"]["ingress"]["customDomains"])
+    return patches
+
+
+class TestPollWithBackoff:
+    """Tests for _poll_with_backoff function."""
+
+    @patch("azure_deploy_cli.aca.certificate.time.sleep")
+    def test_checks_only_pending_items(self, mock_sleep):
+        check = Mock(side_effect=[{"a.example.com"}, {"b.example.com"}])
+
+        _poll_with_backoff({"a.example.com", "b.example.com"}, check, "test", 60)
+
+        assert check.call_args_list[1].args[0] == {"b.example.com"}
+        mock_sleep.assert_called_once()
+
+    @patch("azure_deploy_cli.aca.certificate.time.sleep")
+    def test_backs_off_exponentially(self, mock_sleep):
+        check = Mock(side_effect=[set()] * 5 + [{"a.example.com"}])
+
+        _poll_with_backoff({"a.example.com"}, check, "test", 600)
+
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [5, 10, 20, 30, 30]
+
+    @patch("azure_deploy_cli.aca.certificate.time.sleep")
+    def test_raises_on_timeout(self, mock_sleep):
+        with pytest.raises(RuntimeError, match="Timeout reached .* a.example.com"):
+            _poll_with_backoff({"a.example.com"}, lambda pending: set(), "test", 0)
+
+        mock_sleep.assert_not_called()
+
+
+class TestManagedCertificateName:
+    """Tests for _managed_certificate_name function."""
+
+    def test_sanitizes_domain(self):
+        assert _managed_certificate_name("API.Example.com") == "mc-api-example-com"
+
+    def test_truncates_long_domain(self):
+        assert len(_managed_certificate_name("a" * 100 + ".example.com")) <= 60
+
+
+class TestBindAcaManagedCertificate:
+    """Tests for bind_aca_managed_certificate function."""
+
+    @patch("azure_deploy_cli.aca.certificate.time.sleep")
+    def test_adds_creates_and_binds_all_domains(self, mock_sleep):
+        domains = ["a.example.com", "b.example.com"]
+        mock_client = create_mock_client()
+        mock_client.managed_certificates.list.side_effect = [
+            [],
+            [create_certificate(d) for d in domains],
+        ]
+
+        bind_aca_managed_certificate(mock_client, domains, "app", "env", "rg")
+
+        assert mock_client.managed_certificates.begin_create_or_update.call_count == 2
+        patches = patched_custom_domains(mock_client)
+        assert len(patches) == 2
+        assert {d["bindingType"] for d in patches[0]} == {"Disabled"}
+        assert [d["name"] for d in patches[1]] == domains
+        assert {d["bindingType"] for d in patches[1]} == {"SniEnabled"}
+        assert patches[1][0]["certificateId"] == create_certificate("a.example.com").id
+        mock_sleep.assert_not_called()
+
+    def test_already_bound_domains_are_not_patched(self):
+        cert = create_certificate("a.example.com")
+        mock_client = create_mock_client(
+            custom_domains=[
+                CustomDomain(
+                    name="a.example.com", binding_type="SniEnabled", certificate_id=cert.id
+                )
+            ],
+            certificates=[cert],
+        )
+
+        bind_aca_managed_certificate(mock_client, ["a.example.com"], "app", "env", "rg")
+
+        mock_client.managed_certificates.begin_create_or_update.assert_not_called()
+        mock_client.container_apps.begin_update.assert_not_called()
+
+    def test_failed_certificate_raises_error(self):
+        mock_client = create_mock_client(
+            certificates=[create_certificate("a.example.com", state="Failed")]
+        )
+
+        with pytest.raises(RuntimeError, match="provisioning Failed"):
+            bind_aca_managed_certificate(mock_client, ["a.example.com"], "app", "env", "rg")
+
+    def test_missing_ingress_raises_error(self):
+        mock_client = create_mock_client()
+        mock_client.container_apps.get.return_value[0].configuration.ingress = None
+
+        with pytest.raises(RuntimeError, match="no ingress"):
+            bind_aca_managed_certificate(mock_client, ["a.example.com"], "app", "env", "rg")
+
+    def test_bound_domains_in_snapshot_are_skipped_without_api_calls(self):
+        mock_client = Mock()
+        snapshot = ResourceSnapshot(mock_client, "rg", "app", "env")
+        mock_app = Mock()
+        mock_app.configuration.ingress.custom_domains = [
+            CustomDomain(name="a.example.com", binding_type="SniEnabled", certificate_id="cert-a")
+        ]
+        snapshot.set_container_app(mock_app)
+
+        bind_aca_managed_certificate(
+            mock_client, ["a.example.com"], "app", "env", "rg", snapshot=snapshot
+        )
+
+        assert mock_client.mock_calls == []
+
+    def test_only_unbound_domains_are_processed(self):
+        mock_client = create_mock_client(
+            custom_domains=[
+                CustomDomain(
+                    name="a.example.com", binding_type="SniEnabled", certificate_id="cert-a"
+                ),
+                CustomDomain(name="b.example.com", binding_type="Disabled"),
+            ],
+            certificates=[create_certificate("b.example.com")],
+        )
+
+        bind_aca_managed_certificate(
+            mock_client, ["a.example.com", "b.example.com"], "app", "env", "rg"
+        )
+
+        analysis = mock_client.container_apps.list_custom_host_name_analysis
+        assert [c.kwargs["custom_hostname"] for c in analysis.call_args_list] == ["b.example.com"]
+        patched = patched_custom_domains(mock_client)
+        assert len(patched) == 1
+        assert {d["name"]: d.get("certificateId") for d in patched[0]} == {
+            "a.example.com": "cert-a",
+            "b.example.com": create_certificate("b.example.com").id,
+        }
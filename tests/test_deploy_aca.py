@@ -1,11 +1,26 @@
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
+
+import pytest
+from azure.core.exceptions import HttpResponseError
+from azure.mgmt.appcontainers.models import ContainerApp
 
 from azure_deploy_cli.aca.deploy_aca import (
-    _get_active_revisions_by_label_group,
+    ACTIVE_REVISIONS_FILTER,
+    ENVELOPE_HASH_TAG,
+    _begin_container_app_deploy,
     _get_container_app,
-    _get_latest_revision_by_label,
+    _login_to_acr,
+    _prepare_secrets_and_env_vars,
+    build_acr_image,
+    build_container_app_envelope,
+    create_container_app_env,
     deactivate_unused_revisions,
     generate_revision_name,
+    get_active_revisions_by_label_group,
+    get_latest_revision_by_label,
+    get_unchanged_revision,
+    load_env_vars,
+    patch_traffic_weights,
 )
 
 
@@ -46,7 +61,7 @@ def create_mock_revisions(names: list[str]):
 
 
 class TestGetLatestRevisionByLabel:
-    """Tests for _get_latest_revision_by_label function."""
+    """Tests for get_latest_revision_by_label function."""
 
     def test_returns_latest_revision(self):
         """Test that the latest (last in sorted list) revision is returned."""
@@ -54,27 +69,27 @@ class TestGetLatestRevisionByLabel:
             "prod": create_mock_revisions(["app--prod-20231214120000", "app--prod-20231215120000"]),
             "staging": create_mock_revision(["app--staging-20231215120000"]),
         }
-        result = _get_latest_revision_by_label(label_revision_groups, "prod")
+        result = get_latest_revision_by_label(label_revision_groups, "prod")
         assert result is not None
         assert result.name == "app--prod-20231215120000"
 
     def test_returns_single_revision(self):
         """Test with only one revision for a label."""
         label_revision_groups = {"staging": create_mock_revisions(["app--staging-20231215120000"])}
-        result = _get_latest_revision_by_label(label_revision_groups, "staging")
+        result = get_latest_revision_by_label(label_revision_groups, "staging")
         assert result is not None
         assert result.name == "app--staging-20231215120000"
 
     def test_returns_none_when_label_not_found(self):
         """Test that None is returned when label doesn't exist."""
         label_revision_groups = {"prod": create_mock_revisions(["app--prod-20231215120000"])}
-        result = _get_latest_revision_by_label(label_revision_groups, "staging")
+        result = get_latest_revision_by_label(label_revision_groups, "staging")
         assert result is None
 
     def test_returns_none_when_empty_revisions_list(self):
         """Test that None is returned when revisions list is empty."""
         label_revision_groups: dict[str, list] = {"prod": []}
-        result = _get_latest_revision_by_label(label_revision_groups, "prod")
+        result = get_latest_revision_by_label(label_revision_groups, "prod")
         assert result is None
 
 
@@ -105,7 +120,7 @@ class TestGetRevisionsByLabelGroup:
         ]
         mock_client.container_apps_revisions.list_revisions.return_value = mock_revisions
 
-        result = _get_active_revisions_by_label_group(
+        result = get_active_revisions_by_label_group(
             mock_client, "rg", "app", labels={"prod", "staging"}
         )
 
@@ -138,12 +153,63 @@ class TestGetRevisionsByLabelGroup:
         ]
         mock_client.container_apps_revisions.list_revisions.return_value = mock_revisions
 
-        result = _get_active_revisions_by_label_group(mock_client, "rg", "app", labels={"prod"})
+        result = get_active_revisions_by_label_group(mock_client, "rg", "app", labels={"prod"})
 
         assert "prod" in result
         assert "dev" not in result
         assert len(result["prod"]) == 1
 
+    def test_lists_with_active_filter(self):
+        """Test that revisions are listed with the server-side active filter."""
+        mock_client = Mock()
+        mock_client.container_apps_revisions.list_revisions.return_value = []
+
+        get_active_revisions_by_label_group(mock_client, "rg", "app", labels={"prod"})
+
+        mock_client.container_apps_revisions.list_revisions.assert_called_once_with(
+            resource_group_name="rg",
+            container_app_name="app",
+            filter=ACTIVE_REVISIONS_FILTER,
+        )
+
+    def test_falls_back_when_filter_rejected(self):
+        """Test that an unsupported filter falls back to an unfiltered listing."""
+        from azure.core.exceptions import HttpResponseError
+
+        mock_client = Mock()
+        error = HttpResponseError("Bad filter")
+        error.status_code = 400
+        mock_client.container_apps_revisions.list_revisions.side_effect = [
+            error,
+            create_mock_revisions(["app--prod-20231215120000"]),
+        ]
+
+        result = get_active_revisions_by_label_group(mock_client, "rg", "app", labels={"prod"})
+
+        assert get_revision_names(result["prod"]) == ["app--prod-20231215120000"]
+        assert mock_client.container_apps_revisions.list_revisions.call_count == 2
+
+    def test_keeps_newest_revisions_per_label(self):
+        """Test that max_per_label keeps only the newest revisions, oldest first."""
+        mock_client = Mock()
+        mock_client.container_apps_revisions.list_revisions.return_value = create_mock_revisions(
+            [
+                "app--prod-20231213120000",
+                "app--prod-20231216120000",
+                "app--prod-20231214120000",
+                "app--prod-20231215120000",
+            ]
+        )
+
+        result = get_active_revisions_by_label_group(
+            mock_client, "rg", "app", labels={"prod"}, max_per_label=2
+        )
+
+        assert get_revision_names(result["prod"]) == [
+            "app--prod-20231215120000",
+            "app--prod-20231216120000",
+        ]
+
 
 class TestGetContainerApp:
     """Tests for _get_container_app function."""
@@ -170,6 +236,106 @@ class TestGetContainerApp:
         assert result is None
 
 
+class TestBeginContainerAppDeploy:
+    """Tests for _begin_container_app_deploy function."""
+
+    def create_snapshot(self, mock_client):
+        from azure_deploy_cli.aca.snapshot import ResourceSnapshot
+
+        return ResourceSnapshot(mock_client, "rg", "app", "env")
+
+    def test_deploys_with_snapshot_etag(self):
+        mock_client = Mock()
+        snapshot = self.create_snapshot(mock_client)
+        cached_app = Mock()
+        snapshot.set_container_app(cached_app, 'W/"etag-1"')
+        begin_deploy = Mock()
+
+        result = _begin_container_app_deploy(mock_client, "rg", "app", snapshot, begin_deploy)
+
+        assert result is begin_deploy.return_value
+        begin_deploy.assert_called_once_with(cached_app, 'W/"etag-1"')
+        mock_client.container_apps.get.assert_not_called()
+
+    def test_rereads_app_and_retries_on_precondition_failed(self):
+        mock_client = Mock()
+        fresh_app = Mock()
+        mock_client.container_apps.get.return_value = (fresh_app, 'W/"etag-2"')
+        snapshot = self.create_snapshot(mock_client)
+        snapshot.set_container_app(Mock(), 'W/"etag-1"')
+        conflict = HttpResponseError("precondition failed")
+        conflict.status_code = 412
+        begin_deploy = Mock(side_effect=[conflict, Mock()])
+
+        _begin_container_app_deploy(mock_client, "rg", "app", snapshot, begin_deploy)
+
+        assert begin_deploy.call_args.args == (fresh_app, 'W/"etag-2"')
+        mock_client.container_apps.get.assert_called_once()
+
+    def test_other_errors_are_not_retried(self):
+        mock_client = Mock()
+        snapshot = self.create_snapshot(mock_client)
+        snapshot.set_container_app(Mock(), 'W/"etag-1"')
+        error = HttpResponseError("bad request")
+        error.status_code = 400
+        begin_deploy = Mock(side_effect=error)
+
+        with pytest.raises(HttpResponseError):
+            _begin_container_app_deploy(mock_client, "rg", "app", snapshot, begin_deploy)
+
+        begin_deploy.assert_called_once()
+
+
+class TestCreateContainerAppEnv:
+    """Tests for create_container_app_env function."""
+
+    def test_returns_existing_env_from_single_get(self):
+        mock_client = Mock()
+
+        result = create_container_app_env(mock_client, "rg", "env", "westus2", "workspace")
+
+        assert result is mock_client.managed_environments.get.return_value
+        mock_client.managed_environments.get.assert_called_once_with("rg", "env")
+        mock_client.managed_environments.begin_create_or_update.assert_not_called()
+
+    def test_returns_created_env_from_poller(self):
+        from azure.core.exceptions import ResourceNotFoundError
+
+        mock_client = Mock()
+        mock_client.managed_environments.get.side_effect = ResourceNotFoundError("Not found")
+        poller = mock_client.managed_environments.begin_create_or_update.return_value
+
+        result = create_container_app_env(mock_client, "rg", "env", "westus2", "workspace")
+
+        assert result is poller.result.return_value
+        mock_client.managed_environments.get.assert_called_once()
+
+    def test_known_missing_env_is_created_without_lookup(self):
+        mock_client = Mock()
+        poller = mock_client.managed_environments.begin_create_or_update.return_value
+
+        result = create_container_app_env(
+            mock_client, "rg", "env", "westus2", "workspace", known_missing=True
+        )
+
+        assert result is poller.result.return_value
+        mock_client.managed_environments.get.assert_not_called()
+
+    def test_known_env_id_skips_lookup(self):
+        mock_client = Mock()
+        env_id = (
+            "/subscriptions/sub/resourceGroups/rg/providers/Microsoft.App/managedEnvironments/env"
+        )
+
+        result = create_container_app_env(
+            mock_client, "rg", "env", "westus2", "workspace", container_app_env_id=env_id
+        )
+
+        assert result.id == env_id
+        assert result.location == "westus2"
+        assert mock_client.mock_calls == []
+
+
 class TestDeactivateUnusedRevisions:
     """Tests for deactivate_unused_revisions function."""
 
@@ -232,3 +398,259 @@ class TestDeactivateUnusedRevisions:
 
         # Both deactivations should have been attempted
         assert mock_client.container_apps_revisions.deactivate_revision.call_count == 2
+
+
+class TestPatchTrafficWeights:
+    """Tests for patch_traffic_weights function."""
+
+    def _traffic_weights(self):
+        from azure.mgmt.appcontainers.models import TrafficWeight
+
+        return [
+            TrafficWeight(
+                label="prod",
+                weight=100,
+                revision_name="app--prod-20231215120000",
+                latest_revision=False,
+            )
+        ]
+
+    def test_sends_traffic_only_body_with_if_match(self):
+        """Test that only ingress traffic is sent, guarded by the ETag."""
+        import json
+
+        mock_client = Mock()
+
+        patch_traffic_weights(mock_client, "rg", "app", self._traffic_weights(), etag='W/"etag-1"')
+
+        kwargs = mock_client.container_apps.begin_update.call_args.kwargs
+        body = json.loads(kwargs["container_app_envelope"].getvalue())
+        assert body == {
+            "properties": {
+                "configuration": {
+                    "ingress": {
+                        "traffic": [
+                            {
+                                "revisionName": "app--prod-20231215120000",
+                                "weight": 100,
+                                "latestRevision": False,
+                                "label": "prod",
+                            }
+                        ]
+                    }
+                }
+            }
+        }
+        assert kwargs["headers"] == {"If-Match": 'W/"etag-1"'}
+        assert kwargs["polling"] is True
+        mock_client.container_apps.begin_update.return_value.result.assert_called_once()
+
+    def test_no_wait_returns_without_polling(self):
+        """Test that wait=False does not block on the long-running operation."""
+        mock_client = Mock()
+
+        patch_traffic_weights(mock_client, "rg", "app", self._traffic_weights(), wait=False)
+
+        kwargs = mock_client.container_apps.begin_update.call_args.kwargs
+        assert kwargs["headers"] == {}
+        assert kwargs["polling"] is False
+        mock_client.container_apps.begin_update.return_value.result.assert_not_called()
+
+    def test_precondition_failure_raises(self):
+        """Test that a concurrent modification surfaces as a RuntimeError."""
+        from azure.core.exceptions import HttpResponseError
+
+        mock_client = Mock()
+        error = HttpResponseError("Precondition failed")
+        error.status_code = 412
+        mock_client.container_apps.begin_update.side_effect = error
+
+        with pytest.raises(RuntimeError, match="modified concurrently"):
+            patch_traffic_weights(
+                mock_client, "rg", "app", self._traffic_weights(), etag='W/"etag-1"'
+            )
+
+
+class TestLoginToAcr:
+    """Tests for _login_to_acr function."""
+
+    def test_concurrent_logins_to_same_registry_run_once(self):
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from unittest.mock import patch
+
+        calls = []
+        lock = threading.Lock()
+
+        def run(*args, **kwargs):
+            with lock:
+                calls.append(args)
+            time.sleep(0.05)
+            return Mock(returncode=0)
+
+        with (
+            patch("azure_deploy_cli.aca.deploy_aca._acr_logins", new=set()),
+            patch("azure_deploy_cli.aca.deploy_aca.subprocess.run", side_effect=run),
+        ):
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(lambda _: _login_to_acr("myacr.azurecr.io"), range(4)))
+
+        assert len(calls) == 1
+
+
+class TestBuildAcrImage:
+    """Tests for build_acr_image function."""
+
+    @patch("azure_deploy_cli.aca.deploy_aca._login_to_acr")
+    @patch("azure_deploy_cli.aca.deploy_aca.docker")
+    @patch("azure_deploy_cli.aca.deploy_aca.registry.get_remote_image_digest")
+    def test_image_in_registry_is_not_built_or_pushed(
+        self, mock_get_remote_image_digest, mock_docker, mock_login
+    ):
+        mock_get_remote_image_digest.return_value = "sha256:" + "a" * 64
+
+        digest = build_acr_image("Dockerfile", "myacr.azurecr.io/web:v1", "myacr.azurecr.io")
+
+        assert digest == "sha256:" + "a" * 64
+        mock_login.assert_not_called()
+        mock_docker.image_exists.assert_not_called()
+        mock_docker.build_and_push_image.assert_not_called()
+
+    @patch("azure_deploy_cli.aca.deploy_aca._login_to_acr")
+    @patch("azure_deploy_cli.aca.deploy_aca.docker")
+    @patch("azure_deploy_cli.aca.deploy_aca.registry")
+    def test_built_image_is_remembered(self, mock_registry, mock_docker, mock_login):
+        mock_registry.get_remote_image_digest.return_value = None
+        mock_docker.image_exists.return_value = False
+        mock_docker.build_and_push_image.return_value = "sha256:" + "b" * 64
+
+        build_acr_image("Dockerfile", "myacr.azurecr.io/web:v1", "myacr.azurecr.io")
+
+        mock_registry.remember_image_digest.assert_called_once_with(
+            "myacr.azurecr.io/web:v1", "sha256:" + "b" * 64
+        )
+
+
+class TestBuildContainerAppEnvelope:
+    """Tests for build_container_app_envelope function."""
+
+    def test_keeps_existing_tags(self):
+        existing_app = ContainerApp(
+            location="westus2", tags={"team": "web", ENVELOPE_HASH_TAG: "old"}
+        )
+
+        envelope = build_container_app_envelope(
+            location="westus2",
+            environment_id="env-id",
+            user_identity_resource_id="identity-id",
+            registry_server="myregistry.azurecr.io",
+            registry_user="user",
+            registry_pass_env_name="PASS",
+            secrets=[],
+            containers=[],
+            target_port=8080,
+            ingress_external=True,
+            ingress_transport="auto",
+            min_replicas=1,
+            max_replicas=3,
+            ip_rules=[],
+            existing_app=existing_app,
+            tags={ENVELOPE_HASH_TAG: "new"},
+        )
+
+        assert envelope.tags == {"team": "web", ENVELOPE_HASH_TAG: "new"}
+
+
+class TestGetUnchangedRevision:
+    """Tests for get_unchanged_revision function."""
+
+    def create_app(self, envelope_hash):
+        return ContainerApp(location="westus2", tags={ENVELOPE_HASH_TAG: envelope_hash})
+
+    def test_returns_latest_revision_with_matching_hash(self):
+        mock_client = Mock()
+        app = self.create_app("abc")
+        app.latest_revision_name = "myapp--prod-20231215120000"
+        revision = create_mock_revision("myapp--prod-20231215120000")
+        mock_client.container_apps_revisions.get_revision.return_value = revision
+
+        result = get_unchanged_revision(mock_client, "rg", "myapp", app, "abc", "prod")
+
+        assert result is not None
+        assert result.skipped
+        assert result.revision_name == "myapp--prod-20231215120000"
+        mock_client.container_apps_revisions.get_revision.assert_called_once_with(
+            resource_group_name="rg",
+            container_app_name="myapp",
+            revision_name="myapp--prod-20231215120000",
+        )
+
+    def test_returns_none_for_different_hash(self):
+        mock_client = Mock()
+        app = self.create_app("abc")
+        app.latest_revision_name = "myapp--prod-20231215120000"
+
+        assert get_unchanged_revision(mock_client, "rg", "myapp", app, "def", "prod") is None
+        mock_client.container_apps_revisions.get_revision.assert_not_called()
+
+    def test_returns_none_for_unhealthy_revision(self):
+        mock_client = Mock()
+        app = self.create_app("abc")
+        app.latest_revision_name = "myapp--prod-20231215120000"
+        revision = create_mock_revision("myapp--prod-20231215120000")
+        revision.health_state = "Unhealthy"
+        mock_client.container_apps_revisions.get_revision.return_value = revision
+
+        assert get_unchanged_revision(mock_client, "rg", "myapp", app, "abc", "prod") is None
+
+    def test_returns_none_for_revision_of_another_stage(self):
+        mock_client = Mock()
+        app = self.create_app("abc")
+        app.latest_revision_name = "myapp--staging-20231215120000"
+
+        assert get_unchanged_revision(mock_client, "rg", "myapp", app, "abc", "prod") is None
+        mock_client.container_apps_revisions.get_revision.assert_not_called()
+
+    def test_returns_none_for_missing_app(self):
+        assert get_unchanged_revision(Mock(), "rg", "myapp", None, "abc", "prod") is None
+
+
+class TestLoadEnvVars:
+    """Tests for load_env_vars function."""
+
+    def test_reports_all_missing_variables_at_once(self):
+        with pytest.raises(ValueError, match="not set in the environment: B, C"):
+            load_env_vars(["A", "B", "A", "C"], {"A": "1"})
+
+    def test_deduplicates_names(self):
+        assert load_env_vars(["A", "B", "A"], {"A": "1", "B": "2"}) == {"A": "1", "B": "2"}
+
+
+class TestPrepareSecretsAndEnvVars:
+    """Tests for _prepare_secrets_and_env_vars function."""
+
+    def test_builds_one_entry_per_variable(self):
+        secret_config = Mock(
+            key_vault_name="kv",
+            secret_names=["API_KEY", "API_KEY"],
+            user_identity=Mock(resourceId="identity-id"),
+        )
+        secret_config.key_vault_client.secrets.create_or_update.return_value = Mock(
+            properties=Mock(secret_uri="https://kv.vault.azure.net/secrets/api-key")
+        )
+
+        secrets, env_table = _prepare_secrets_and_env_vars(
+            secret_config=secret_config,
+            subscription_id="sub-id",
+            env_var_names=["LOG_LEVEL", "API_KEY", "LOG_LEVEL"],
+            env_values={"LOG_LEVEL": "info", "API_KEY": "s3cret"},
+            resource_group="rg",
+        )
+
+        assert [secret.name for secret in secrets] == ["api-key"]
+        secret_config.key_vault_client.secrets.create_or_update.assert_called_once()
+        assert env_table["API_KEY"].secret_ref == "api-key"
+        assert env_table["API_KEY"].value is None
+        assert env_table["LOG_LEVEL"].value == "info"
+        assert list(env_table) == ["API_KEY", "LOG_LEVEL"]
@@ -1,12 +1,18 @@
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
+from azure_deploy_cli.utils import env
 from azure_deploy_cli.utils.env import (
     add_var_to_env_file,
+    compile_template,
     load_env_vars_from_files,
+    preload_env_vars_files,
     substitute_env_vars,
+    template_placeholders,
 )
 
 
@@ -46,6 +52,19 @@ class TestSubstituteEnvVars:
             substitute_env_vars("Hello ${VAR1} and ${MISSING}", env_vars)
 
 
+class TestTemplatePlaceholders:
+    def test_lists_names_in_order_of_first_use(self):
+        template = compile_template("$A/${B}/$$literal/${A}")
+        assert template_placeholders(template) == ["A", "B"]
+
+    def test_invalid_placeholder_raises_error(self):
+        with pytest.raises(ValueError, match="Invalid placeholder"):
+            template_placeholders(compile_template("/subscriptions/${"))
+
+    def test_templates_are_compiled_once(self):
+        assert compile_template("${A}") is compile_template("${A}")
+
+
 class TestLoadEnvVarsFromFiles:
     def test_load_single_file(self):
         with tempfile.NamedTemporaryFile(mode="w", suffix=".env", delete=False) as f:
@@ -78,6 +97,60 @@ class TestLoadEnvVarsFromFiles:
         assert result == {}
 
 
+class TestEnvFileCache:
+    """Tests for the env file cache of load_env_vars_from_files."""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        env._parsed_env_files.clear()
+        env._merged_env_files.clear()
+
+    def test_unchanged_files_are_parsed_once(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            env_path = Path(tmpdir) / ".env"
+            env_path.write_text("KEY=value\n")
+            with patch.object(env, "dotenv_values", wraps=env.dotenv_values) as mock_dotenv:
+                first = load_env_vars_from_files([env_path])
+                second = load_env_vars_from_files([env_path])
+
+            assert second is first
+            mock_dotenv.assert_called_once()
+
+    def test_changed_file_is_parsed_again(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            env_path = Path(tmpdir) / ".env"
+            env_path.write_text("KEY=value\n")
+            load_env_vars_from_files([env_path])
+            env_path.write_text("KEY=new_value\n")
+
+            assert load_env_vars_from_files([env_path]) == {"KEY": "new_value"}
+
+    def test_parsed_files_are_shared_between_lists(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            common, stage = Path(tmpdir) / "common.env", Path(tmpdir) / "stage.env"
+            common.write_text("A=1\n")
+            stage.write_text("B=2\n")
+            with patch.object(env, "dotenv_values", wraps=env.dotenv_values) as mock_dotenv:
+                preload_env_vars_files([[common], [common, stage], None])
+                result = load_env_vars_from_files([common, stage])
+
+            assert result == {"A": "1", "B": "2"}
+            assert mock_dotenv.call_count == 2
+
+    def test_result_is_read_only(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            env_path = Path(tmpdir) / ".env"
+            env_path.write_text("KEY=value\n")
+            result = load_env_vars_from_files([env_path])
+
+            with pytest.raises(TypeError):
+                result["KEY"] = "changed"  # type: ignore[index]
+
+    def test_missing_file_loads_as_empty(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            assert load_env_vars_from_files([Path(tmpdir) / "missing.env"]) == {}
+
+
 class TestAddVarToEnvFile:
     def test_add_to_new_file(self):
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -111,3 +184,37 @@ class TestAddVarToEnvFile:
             content = env_path.read_text()
             assert "KEY1=value1" in content
             assert "KEY2=value2" in content
+
+    def test_keeps_order_and_comments(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            env_path = Path(tmpdir) / ".env"
+            env_path.write_text("# credentials\nA=1\n\nexport B=2\nC=3\n")
+            add_var_to_env_file({"B": "20", "D": "4"}, env_path)
+            assert env_path.read_text() == "# credentials\nA=1\n\nB=20\nC=3\nD=4\n"
+
+    def test_drops_duplicate_definitions_of_updated_key(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            env_path = Path(tmpdir) / ".env"
+            env_path.write_text("KEY=1\nOTHER=2\nKEY=3\n")
+            add_var_to_env_file({"KEY": "4"}, env_path)
+            assert env_path.read_text() == "KEY=4\nOTHER=2\n"
+
+    def test_replaces_file_atomically_keeping_its_mode(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            env_path = Path(tmpdir) / ".env"
+            env_path.write_text("KEY=1\n")
+            env_path.chmod(0o640)
+            add_var_to_env_file({"KEY": "2"}, env_path)
+            assert env_path.stat().st_mode & 0o777 == 0o640
+            assert sorted(p.name for p in Path(tmpdir).iterdir()) == [".env", ".env.lock"]
+
+    def test_concurrent_updates_are_not_lost(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            env_path = Path(tmpdir) / ".env"
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(
+                    executor.map(
+                        lambda i: add_var_to_env_file({f"KEY{i}": str(i)}, env_path), range(20)
+                    )
+                )
+            assert load_env_vars_from_files([env_path]) == {f"KEY{i}": str(i) for i in range(20)}
@@ -0,0 +1,220 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from azure_deploy_cli.aca.fleet import FleetDeploySession, _deploy_fleet_app, deploy_fleet
+from azure_deploy_cli.aca.model import FleetAppResult
+from azure_deploy_cli.aca.yaml_loader import load_fleet_manifest_yaml
+
+MANIFEST_YAML = """
+defaults:
+  resource_group: my-rg
+  location: westus2
+  container_app_env: my-env
+  logs_workspace_id: workspace-id
+  user_assigned_identity_name: my-identity
+  registry_server: myregistry.azurecr.io
+  keyvault_name: my-keyvault
+  min_replicas: 1
+  max_replicas: 3
+apps:
+  - container_app: api
+    container_config: ./api.yaml
+    target_port: 8080
+    allowed_ips:
+      office: ["1.2.3.4/32"]
+  - container_app: worker
+    container_config: /abs/worker.yaml
+    target_port: 8081
+    max_replicas: 10
+"""
+
+
+def load_manifest(yaml_content: str):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        manifest_path = Path(tmpdir) / "fleet.yaml"
+        manifest_path.write_text(yaml_content)
+        return load_fleet_manifest_yaml(manifest_path), Path(tmpdir)
+
+
+class TestLoadFleetManifest:
+    """Tests for load_fleet_manifest_yaml function."""
+
+    def test_applies_defaults_and_overrides(self):
+        manifest, _ = load_manifest(MANIFEST_YAML)
+
+        api, worker = manifest.apps
+        assert api.resource_group == "my-rg"
+        assert api.max_replicas == 3
+        assert api.allowed_ips == {"office": ["1.2.3.4/32"]}
+        assert worker.max_replicas == 10
+
+    def test_resolves_relative_paths_against_manifest(self):
+        manifest, manifest_dir = load_manifest(MANIFEST_YAML)
+
+        assert manifest.apps[0].container_config == manifest_dir / "api.yaml"
+        assert manifest.apps[1].container_config == Path("/abs/worker.yaml")
+
+    def test_missing_required_field_raises_error(self):
+        with pytest.raises(ValueError, match="Invalid fleet manifest"):
+            load_manifest("apps:\n  - container_app: api\n")
+
+    def test_empty_apps_raises_error(self):
+        with pytest.raises(ValueError, match="Invalid fleet manifest"):
+            load_manifest("apps: []\n")
+
+
+def create_session() -> FleetDeploySession:
+    return FleetDeploySession(
+        subscription_id="sub-id",
+        client=Mock(),
+        key_vault_client=Mock(),
+        registry_user="user",
+        registry_pass_env_name="PASS",
+    )
+
+
+class TestFleetDeploySession:
+    """Tests for FleetDeploySession shared lookups."""
+
+    @patch("azure_deploy_cli.aca.fleet.create_container_app_env")
+    def test_environment_resolved_once(self, mock_create_env):
+        manifest, _ = load_manifest(MANIFEST_YAML)
+        session = create_session()
+
+        for app in manifest.apps:
+            session.get_container_app_env(app)
+
+        mock_create_env.assert_called_once()
+
+    @patch("azure_deploy_cli.aca.fleet.create_or_get_user_identity")
+    def test_identity_resolved_once(self, mock_get_identity):
+        manifest, _ = load_manifest(MANIFEST_YAML)
+        session = create_session()
+
+        for app in manifest.apps:
+            session.get_user_identity(app)
+
+        mock_get_identity.assert_called_once_with("my-identity", "my-rg", "westus2")
+
+
+class TestDeployFleet:
+    """Tests for deploy_fleet function."""
+
+    @patch("azure_deploy_cli.aca.fleet._deploy_fleet_app")
+    def test_failure_is_isolated_per_app(self, mock_deploy_app):
+        manifest, _ = load_manifest(MANIFEST_YAML)
+
+        def deploy_app(session, app, stage, revision_suffix):
+            if app.container_app == "api":
+                raise RuntimeError("build failed")
+            return FleetAppResult(
+                container_app=app.container_app,
+                revision_name=f"{app.container_app}--{revision_suffix}",
+                is_healthy=True,
+            )
+
+        mock_deploy_app.side_effect = deploy_app
+
+        results = deploy_fleet(
+            create_session(),
+            manifest,
+            stage="prod",
+            revision_suffix="prod-20231215120000",
+            max_concurrency_per_env=2,
+        )
+
+        assert [r.container_app for r in results] == ["api", "worker"]
+        assert results[0].error == "build failed"
+        assert results[1].revision_name == "worker--prod-20231215120000"
+        assert results[1].error is None
+
+    @patch("azure_deploy_cli.aca.fleet._deploy_fleet_app")
+    def test_concurrency_limited_per_environment(self, mock_deploy_app):
+        manifest, _ = load_manifest(MANIFEST_YAML)
+        running = 0
+        max_running = 0
+        lock = threading.Lock()
+
+        def deploy_app(session, app, stage, revision_suffix):
+            nonlocal running, max_running
+            with lock:
+                running += 1
+                max_running = max(max_running, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+            return FleetAppResult(container_app=app.container_app, is_healthy=True)
+
+        mock_deploy_app.side_effect = deploy_app
+
+        deploy_fleet(
+            create_session(),
+            manifest,
+            stage="prod",
+            revision_suffix="prod-20231215120000",
+            max_concurrency_per_env=1,
+        )
+
+        assert max_running == 1
+
+    @patch("azure_deploy_cli.aca.fleet._deploy_fleet_app")
+    def test_busy_environment_does_not_delay_others(self, mock_deploy_app):
+        apps = "".join(
+            f"  - container_app: a{i}\n    container_config: ./a.yaml\n    target_port: 80\n"
+            for i in range(4)
+        )
+        manifest, _ = load_manifest(
+            MANIFEST_YAML.split("apps:")[0]
+            + "apps:\n"
+            + apps
+            + "  - container_app: b\n    container_config: ./b.yaml\n    target_port: 80\n"
+            + "    container_app_env: other-env\n"
+        )
+        started: dict[str, float] = {}
+
+        def deploy_app(session, app, stage, revision_suffix):
+            started[app.container_app] = time.monotonic()
+            time.sleep(0.1)
+            return FleetAppResult(container_app=app.container_app, is_healthy=True)
+
+        mock_deploy_app.side_effect = deploy_app
+        start = time.monotonic()
+
+        results = deploy_fleet(
+            create_session(),
+            manifest,
+            stage="prod",
+            revision_suffix="prod-20231215120000",
+            max_concurrency_per_env=1,
+        )
+
+        assert [r.container_app for r in results] == ["a0", "a1", "a2", "a3", "b"]
+        assert started["b"] - start < 0.1
+
+
+class TestDeployFleetApp:
+    """Tests for _deploy_fleet_app function."""
+
+    @patch("azure_deploy_cli.aca.fleet.deploy_revision")
+    @patch("azure_deploy_cli.aca.fleet.plan_fleet_app_envelope", return_value={"planned": 1})
+    @patch("azure_deploy_cli.aca.fleet.load_app_config_yaml")
+    def test_skips_app_unchanged_since_last_deploy(
+        self, mock_load_config, mock_plan, mock_deploy_revision
+    ):
+        manifest, _ = load_manifest(MANIFEST_YAML)
+        session = create_session()
+        session.envelope_cache = Mock()
+        session.envelope_cache.load.return_value = {"planned": 1}
+        session.skip_unchanged = True
+
+        result = _deploy_fleet_app(session, manifest.apps[0], "prod", "prod-20231215120000")
+
+        assert result.skipped
+        assert result.is_healthy
+        session.envelope_cache.load.assert_called_once_with("my-rg", "api", "prod")
+        mock_deploy_revision.assert_not_called()
@@ -0,0 +1,120 @@
+import datetime
+from unittest.mock import Mock, patch
+
+from azure_deploy_cli.aca.image_gc import RegistryTag, gc_images, select_tags_to_delete
+
+NOW = datetime.datetime(2023, 12, 20, tzinfo=datetime.timezone.utc)
+REGISTRY = "myacr.azurecr.io"
+
+
+def digest(char):
+    return "sha256:" + char * 64
+
+
+def create_tags(*names):
+    return [RegistryTag("web", name, digest(chr(ord("a") + i))) for i, name in enumerate(names)]
+
+
+def tag_names(tags):
+    return [tag.name for tag in tags]
+
+
+class TestSelectTagsToDelete:
+    """Tests for select_tags_to_delete function."""
+
+    def test_keeps_newest_tags_per_stage(self):
+        tags = create_tags(
+            "prod-20231210120000",
+            "prod-20231211120000",
+            "prod-20231212120000",
+            "staging-20231201120000",
+        )
+
+        result = select_tags_to_delete(tags, set(), keep_last=2, now=NOW)
+
+        assert tag_names(result) == ["prod-20231210120000"]
+
+    def test_keeps_referenced_tags(self):
+        tags = create_tags("prod-20231210120000", "prod-20231211120000")
+
+        result = select_tags_to_delete(
+            tags, {f"{REGISTRY}/web:prod-20231210120000"}, keep_last=0, now=NOW
+        )
+
+        assert tag_names(result) == ["prod-20231211120000"]
+
+    def test_keeps_tags_sharing_a_manifest_with_a_referenced_digest(self):
+        tags = [
+            RegistryTag("web", "prod-20231210120000", digest("a")),
+            RegistryTag("web", "prod-20231211120000", digest("b")),
+        ]
+
+        result = select_tags_to_delete(
+            tags, {f"{REGISTRY}/web:prod-20231219120000@{digest('a')}"}, keep_last=0, now=NOW
+        )
+
+        assert tag_names(result) == ["prod-20231211120000"]
+
+    def test_keeps_tags_newer_than_keep_days(self):
+        tags = create_tags("prod-20231201120000", "prod-20231218120000")
+
+        result = select_tags_to_delete(tags, set(), keep_last=0, keep_days=7, now=NOW)
+
+        assert tag_names(result) == ["prod-20231201120000"]
+
+    def test_keeps_tags_not_created_by_deploys(self):
+        tags = create_tags("latest", "v1.0.0", "prod-20231201120000")
+
+        result = select_tags_to_delete(tags, set(), keep_last=0, now=NOW)
+
+        assert tag_names(result) == ["prod-20231201120000"]
+
+
+@patch("azure_deploy_cli.aca.image_gc.delete_acr_image", return_value=True)
+@patch("azure_deploy_cli.aca.image_gc.list_repository_tags")
+@patch("azure_deploy_cli.aca.image_gc.get_referenced_images")
+class TestGcImages:
+    """Tests for gc_images function."""
+
+    def test_deletes_each_unused_manifest_once(
+        self, mock_get_referenced_images, mock_list_repository_tags, mock_delete_acr_image
+    ):
+        mock_get_referenced_images.return_value = {f"{REGISTRY}/web:prod-20231212120000"}
+        mock_list_repository_tags.return_value = [
+            RegistryTag("web", "prod-20231210120000", digest("a")),
+            RegistryTag("web", "staging-20231210120000", digest("a")),
+            RegistryTag("web", "prod-20231212120000", digest("b")),
+        ]
+
+        result = gc_images(Mock(), "rg", ["app"], REGISTRY, keep_last=0)
+
+        mock_list_repository_tags.assert_called_once_with(REGISTRY, "web")
+        mock_delete_acr_image.assert_called_once_with(REGISTRY, f"web@{digest('a')}")
+        assert result.deleted_images == [f"web@{digest('a')}"]
+        assert result.kept_tag_count == 1
+
+    def test_dry_run_deletes_nothing(
+        self, mock_get_referenced_images, mock_list_repository_tags, mock_delete_acr_image
+    ):
+        mock_get_referenced_images.return_value = set()
+        mock_list_repository_tags.return_value = [
+            RegistryTag("web", "prod-20231210120000", digest("a"))
+        ]
+
+        result = gc_images(
+            Mock(), "rg", ["app"], REGISTRY, repositories=["web"], dry_run=True, keep_last=0
+        )
+
+        mock_delete_acr_image.assert_not_called()
+        assert result.dry_run
+        assert result.deleted_images == [f"web@{digest('a')}"]
+
+    def test_ignores_images_from_other_registries(
+        self, mock_get_referenced_images, mock_list_repository_tags, mock_delete_acr_image
+    ):
+        mock_get_referenced_images.return_value = {"docker.io/library/nginx:latest"}
+
+        result = gc_images(Mock(), "rg", ["app"], REGISTRY)
+
+        mock_list_repository_tags.assert_not_called()
+        assert result.deleted_images == []
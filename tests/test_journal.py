@@ -0,0 +1,83 @@
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from azure_deploy_cli.aca.deploy_aca import build_container_images
+from azure_deploy_cli.aca.journal import STEP_IDENTITY, STEP_IMAGES, DeployJournal
+from azure_deploy_cli.aca.model import ContainerConfig
+
+
+class TestDeployJournal:
+    """Tests for DeployJournal."""
+
+    def test_records_persist_across_resume(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            journal = DeployJournal.open(Path(tmpdir), "app", "prod-20231215120000")
+            journal.record(STEP_IDENTITY, {"resourceId": "id", "principalId": "pid"})
+            journal.record_item(STEP_IMAGES, "web", "registry.io/web:prod-20231215120000")
+
+            resumed = DeployJournal.open(Path(tmpdir), "app", "prod-20231215120000", resume=True)
+
+            assert resumed.get(STEP_IDENTITY) == {"resourceId": "id", "principalId": "pid"}
+            assert resumed.get(STEP_IMAGES) == {"web": "registry.io/web:prod-20231215120000"}
+
+    def test_open_without_resume_starts_fresh(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            journal = DeployJournal.open(Path(tmpdir), "app", "prod-20231215120000")
+            journal.record(STEP_IDENTITY, {"resourceId": "id", "principalId": "pid"})
+
+            fresh = DeployJournal.open(Path(tmpdir), "app", "prod-20231215120000")
+
+            assert not fresh.is_done(STEP_IDENTITY)
+
+    def test_find_latest_incomplete(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            DeployJournal.open(Path(tmpdir), "app", "prod-20231214120000")
+            DeployJournal.open(Path(tmpdir), "app", "prod-20231215120000").complete()
+            DeployJournal.open(Path(tmpdir), "app", "staging-20231216120000")
+
+            result = DeployJournal.find_latest_incomplete(Path(tmpdir), "app", "prod")
+
+            assert result == "prod-20231214120000"
+
+    def test_find_latest_incomplete_ignores_stages_sharing_a_prefix(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            DeployJournal.open(Path(tmpdir), "app", "prod-20231214120000")
+            DeployJournal.open(Path(tmpdir), "app", "prod-eu-20231216120000")
+
+            result = DeployJournal.find_latest_incomplete(Path(tmpdir), "app", "prod")
+
+            assert result == "prod-20231214120000"
+
+    def test_find_latest_incomplete_without_journals(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            assert DeployJournal.find_latest_incomplete(Path(tmpdir), "app", "prod") is None
+
+
+class TestBuildContainerImagesWithJournal:
+    """Tests for build_container_images skipping journaled images."""
+
+    @patch("azure_deploy_cli.aca.deploy_aca.build_acr_image")
+    def test_skips_images_already_built(self, mock_build_acr_image):
+        mock_build_acr_image.return_value = "sha256:" + "a" * 64
+        container_configs = [
+            ContainerConfig(name="web", image_name="web", cpu=0.5, memory="1Gi", dockerfile="D"),
+            ContainerConfig(name="api", image_name="api", cpu=0.5, memory="1Gi", dockerfile="D"),
+        ]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            journal = DeployJournal.open(Path(tmpdir), "app", "prod-20231215120000")
+            journal.record_item(STEP_IMAGES, "web", "registry.io/web:prod-20231215120000")
+
+            result = build_container_images(
+                container_configs, "registry.io", "prod-20231215120000", journal=journal
+            )
+
+            assert result == [
+                "registry.io/web:prod-20231215120000",
+                "registry.io/api:prod-20231215120000@sha256:" + "a" * 64,
+            ]
+            mock_build_acr_image.assert_called_once()
+            assert journal.get(STEP_IMAGES) == {
+                "web": "registry.io/web:prod-20231215120000",
+                "api": "registry.io/api:prod-20231215120000@sha256:" + "a" * 64,
+            }
@@ -0,0 +1,155 @@
+import json
+import logging
+from unittest.mock import patch
+
+import pytest
+
+from azure_deploy_cli.utils import logging as log_utils
+from azure_deploy_cli.utils.logging import (
+    LEVEL_SYMBOLS,
+    STDOUT_LEVEL,
+    ColoredFormatter,
+    JsonFormatter,
+    configure_logging,
+    get_logger,
+)
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    saved_level = root.level
+    with patch.object(root, "handlers", []), patch.object(log_utils, "_handlers", []):
+        yield root
+        log_utils._stop_listener()
+    root.setLevel(saved_level)
+
+
+def create_record(msg, *args, level=logging.INFO):
+    return logging.LogRecord("test", level, __file__, 1, msg, args, None)
+
+
+class TestColoredFormatter:
+    """Tests for ColoredFormatter."""
+
+    def test_formatting_twice_does_not_repeat_symbol(self):
+        formatter = ColoredFormatter("%(message)s")
+        record = create_record("Deployed %s", "web")
+
+        first = formatter.format(record)
+
+        assert first == f"{LEVEL_SYMBOLS['INFO']} Deployed web"
+        assert formatter.format(record) == first
+        assert record.msg == "Deployed %s"
+
+    def test_stdout_records_have_no_symbol(self):
+        formatter = ColoredFormatter("%(message)s")
+        record = create_record('{"ok": true}', level=STDOUT_LEVEL)
+        record.levelname = "STDOUT"
+
+        assert formatter.format(record) == '{"ok": true}'
+
+
+class TestJsonFormatter:
+    """Tests for JsonFormatter."""
+
+    def test_formats_event_as_compact_json(self):
+        record = create_record("Deployed %s", "web", level=logging.ERROR)
+        record.created = 0
+        record.app = "web"
+        record.revision = "web--prod-1"
+        record.duration_ms = 1500
+
+        formatted = JsonFormatter().format(record)
+
+        assert "\n" not in formatted
+        assert ", " not in formatted
+        assert json.loads(formatted) == {
+            "timestamp": "1970-01-01T00:00:00.000+00:00",
+            "level": "ERROR",
+            "logger": "test",
+            "message": "Deployed web",
+            "app": "web",
+            "revision": "web--prod-1",
+            "duration_ms": 1500,
+        }
+
+    def test_strips_colour_codes(self):
+        record = create_record("\x1b[0;32m#5 DONE 0.1s\x1b[0m")
+
+        formatted = JsonFormatter().format(record)
+
+        assert "\x1b" not in formatted
+        assert "\\u001b" not in formatted
+        assert json.loads(formatted)["message"] == "#5 DONE 0.1s"
+
+
+class TestConfigureLogging:
+    """Tests for configure_logging function."""
+
+    def test_reconfiguring_replaces_handlers_and_level(self, root_logger, capsys):
+        root_logger.handlers.clear()
+        configure_logging("info")
+        configure_logging("debug")
+
+        get_logger("test").debug("Checking %s", "web")
+
+        assert len(root_logger.handlers) == 2
+        assert "Checking web" in capsys.readouterr().err
+
+    def test_queue_writes_from_listener(self, root_logger, capsys):
+        root_logger.handlers.clear()
+        configure_logging("info", queue=True)
+        logger = get_logger("test")
+
+        logger.success("Deployed %s", "web")
+        logger.stdout('{"app": "web"}')
+        log_utils._stop_listener()
+
+        assert isinstance(root_logger.handlers[0], logging.handlers.QueueHandler)
+        captured = capsys.readouterr()
+        assert f"{LEVEL_SYMBOLS['SUCCESS']} Deployed web" in captured.err
+        assert captured.out == '{"app": "web"}\n'
+
+    def test_leaves_foreign_handlers_alone(self, root_logger):
+        root_logger.handlers.clear()
+        foreign = logging.NullHandler()
+        root_logger.addHandler(foreign)
+
+        configure_logging("debug")
+
+        assert root_logger.handlers == [foreign]
+
+    def test_json_format_writes_one_object_per_line(self, root_logger, capsys):
+        root_logger.handlers.clear()
+        configure_logging("info", log_format="json")
+        logger = get_logger("test")
+
+        logger.critical("Deploying...", extra={"phase": "deploy", "app": "web"})
+        logger.stdout('{"app": "web"}')
+
+        captured = capsys.readouterr()
+        event = json.loads(captured.err)
+        assert event["level"] == "CRITICAL"
+        assert (event["phase"], event["app"]) == ("deploy", "web")
+        assert "\x1b" not in captured.err
+        assert captured.out == '{"app": "web"}\n'
+
+    @pytest.mark.parametrize("queue", [False, True])
+    def test_json_exception_has_the_same_schema_with_a_queue(self, root_logger, capsys, queue):
+        root_logger.handlers.clear()
+        configure_logging("info", queue=queue, log_format="json")
+
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            get_logger("test").error("Deploy of %s failed", "web", exc_info=True)
+        log_utils._stop_listener()
+
+        event = json.loads(capsys.readouterr().err)
+        assert event["message"] == "Deploy of web failed"
+        assert "RuntimeError: boom" in event["exception"]
+
+    def test_rejects_unknown_format(self, root_logger):
+        with pytest.raises(ValueError, match="Unknown log format 'xml'"):
+            configure_logging("info", log_format="xml")
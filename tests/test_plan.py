@@ -0,0 +1,229 @@
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from azure_deploy_cli.aca.model import AppSettings, ContainerAppConfig
+from azure_deploy_cli.aca.plan import (
+    PLAN_CHANGED,
+    PLAN_ERROR,
+    PLAN_NEW,
+    PLAN_UNCHANGED,
+    EnvelopeCache,
+    diff_envelopes,
+    envelope_hash,
+    plan_container_app_envelope,
+    plan_fleet,
+    plan_fleet_app_envelope,
+)
+from azure_deploy_cli.aca.yaml_loader import load_app_config_yaml, load_fleet_manifest_yaml
+
+CONTAINER_CONFIG_YAML = """
+target_port: 8080
+min_replicas: 1
+max_replicas: 3
+allowed_ips:
+  office: ["1.2.3.4/32"]
+containers:
+  - name: web
+    image_name: web
+    cpu: 0.5
+    memory: "1.0Gi"
+    existing_image_tag: v1
+    env_vars: [LOG_LEVEL, API_KEY]
+"""
+
+MANIFEST_YAML = """
+defaults:
+  resource_group: my-rg
+  location: westus2
+  container_app_env: my-env
+  logs_workspace_id: workspace-id
+  user_assigned_identity_name: my-identity
+  registry_server: myregistry.azurecr.io
+  keyvault_name: my-keyvault
+  env_var_secrets: [API_KEY]
+apps:
+  - container_app: web
+    container_config: ./web.yaml
+"""
+
+ENVIRON = {"LOG_LEVEL": "info", "API_KEY": "s3cret", "ACA_REGISTRY_PASS": "pass"}
+
+
+def create_app_config(**overrides):
+    container = {"name": "web", "image_name": "web", "cpu": 0.5, "memory": "1.0Gi"}
+    return ContainerAppConfig(
+        containers=[{**container, "existing_image_tag": "v1", **overrides}],
+        target_port=8080,
+        min_replicas=1,
+        max_replicas=3,
+    )
+
+
+def plan(app_config, environ=None, **settings):
+    return plan_container_app_envelope(
+        app_config,
+        AppSettings.resolve(app_config, **settings),
+        location="westus2",
+        container_app_env="my-env",
+        user_assigned_identity_name="my-identity",
+        registry_server="myregistry.azurecr.io",
+        registry_user="user",
+        registry_pass_env_name="ACA_REGISTRY_PASS",
+        keyvault_name="my-keyvault",
+        secret_names=["API_KEY"],
+        environ=ENVIRON if environ is None else environ,
+    )
+
+
+class TestAppSettings:
+    """Tests for AppSettings.resolve."""
+
+    def test_overrides_take_precedence(self):
+        settings = AppSettings.resolve(create_app_config(), max_replicas=10, target_port=None)
+
+        assert settings.target_port == 8080
+        assert settings.max_replicas == 10
+        assert settings.ingress_transport == "auto"
+        assert settings.allowed_ips == {}
+
+    def test_missing_settings_are_reported_together(self):
+        app_config = ContainerAppConfig(
+            containers=[
+                {
+                    "name": "web",
+                    "image_name": "web",
+                    "cpu": 0.5,
+                    "memory": "1.0Gi",
+                    "existing_image_tag": "v1",
+                }
+            ]
+        )
+
+        with pytest.raises(ValueError, match="target_port, min_replicas, max_replicas"):
+            AppSettings.resolve(app_config, max_replicas=None)
+
+
+class TestPlanContainerAppEnvelope:
+    """Tests for plan_container_app_envelope function."""
+
+    def test_values_are_fingerprinted(self):
+        envelope = plan(create_app_config(env_vars=["LOG_LEVEL", "API_KEY"]))
+
+        assert "s3cret" not in str(envelope)
+        assert "info" not in str(envelope)
+        container = envelope["properties"]["template"]["containers"][0]
+        assert container["image"] == "myregistry.azurecr.io/web:v1"
+        assert container["env"][1] == {"name": "API_KEY", "secretRef": "api-key"}
+        assert "revisionSuffix" not in envelope["properties"]["template"]
+
+    def test_is_stable(self):
+        assert plan(create_app_config()) == plan(create_app_config())
+
+    def test_changed_value_changes_envelope(self):
+        app_config = create_app_config(env_vars=["LOG_LEVEL"])
+
+        changed = plan(app_config, environ={**ENVIRON, "LOG_LEVEL": "debug"})
+
+        assert diff_envelopes(plan(app_config), changed) == [
+            "properties.template.containers[0].env[0].value"
+        ]
+
+    def test_dockerfile_content_changes_image(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dockerfile = Path(tmpdir) / "Dockerfile"
+            dockerfile.write_text("FROM python:3.12\n")
+            app_config = create_app_config(existing_image_tag=None, dockerfile=str(dockerfile))
+            before = plan(app_config)
+            dockerfile.write_text("FROM python:3.13\n")
+
+            after = plan(app_config)
+
+        assert diff_envelopes(before, after) == ["properties.template.containers[0].image"]
+
+    def test_build_context_changes_image(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dockerfile = Path(tmpdir) / "Dockerfile"
+            dockerfile.write_text("FROM python:3.12\nCOPY . /app\n")
+            (Path(tmpdir) / "src").mkdir()
+            source = Path(tmpdir) / "src" / "app.py"
+            source.write_text("print('v1')\n")
+            app_config = create_app_config(existing_image_tag=None, dockerfile=str(dockerfile))
+            before = plan(app_config)
+            source.write_text("print('v2')\n")
+
+            after = plan(app_config)
+
+        assert diff_envelopes(before, after) == ["properties.template.containers[0].image"]
+
+    def test_built_images_are_pinned_without_tag(self):
+        digest = "sha256:" + "a" * 64
+        app_config = create_app_config(existing_image_tag=None, dockerfile="Dockerfile")
+
+        envelopes = [
+            plan_container_app_envelope(
+                app_config,
+                AppSettings.resolve(app_config),
+                location="westus2",
+                container_app_env="my-env",
+                user_assigned_identity_name="my-identity",
+                registry_server="myregistry.azurecr.io",
+                registry_user="user",
+                registry_pass_env_name="ACA_REGISTRY_PASS",
+                keyvault_name="my-keyvault",
+                secret_names=[],
+                environ=ENVIRON,
+                images=[f"myregistry.azurecr.io/web:{suffix}@{digest}"],
+            )
+            for suffix in ("prod-20231215120000", "prod-20231216120000")
+        ]
+
+        assert envelopes[0] == envelopes[1]
+        container = envelopes[0]["properties"]["template"]["containers"][0]
+        assert container["image"] == f"myregistry.azurecr.io/web@{digest}"
+
+    def test_hash_ignores_key_order(self):
+        envelope = plan(create_app_config())
+        reordered = dict(reversed(list(envelope.items())))
+
+        assert envelope_hash(reordered) == envelope_hash(envelope)
+        assert envelope_hash(plan(create_app_config(cpu=1.0))) != envelope_hash(envelope)
+
+    def test_missing_env_vars_are_reported_together(self):
+        with pytest.raises(ValueError, match="API_KEY, LOG_LEVEL"):
+            plan(create_app_config(env_vars=["LOG_LEVEL"]), environ={"ACA_REGISTRY_PASS": "p"})
+
+
+class TestPlanFleet:
+    """Tests for plan_fleet function."""
+
+    def test_reports_new_changed_and_unchanged_apps(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp_path = Path(tmpdir)
+            (tmp_path / "web.yaml").write_text(CONTAINER_CONFIG_YAML)
+            (tmp_path / "fleet.yaml").write_text(MANIFEST_YAML)
+            manifest = load_fleet_manifest_yaml(tmp_path / "fleet.yaml")
+            cache = EnvelopeCache(tmp_path / "envelopes")
+
+            def plan_web(environ=ENVIRON):
+                return plan_fleet(manifest, "prod", "user", "ACA_REGISTRY_PASS", cache, environ)[0]
+
+            assert plan_web().status == PLAN_NEW
+            app = manifest.apps[0]
+            envelope = plan_fleet_app_envelope(
+                app,
+                load_app_config_yaml(app.container_config, stage="prod"),
+                "user",
+                "ACA_REGISTRY_PASS",
+                ENVIRON,
+            )
+            cache.save("my-rg", "web", "staging", envelope)
+            assert plan_web().status == PLAN_NEW
+            cache.save("my-rg", "web", "prod", envelope)
+
+            assert plan_web().status == PLAN_UNCHANGED
+            changed = plan_web({**ENVIRON, "API_KEY": "rotated"})
+            assert changed.status == PLAN_CHANGED
+            assert changed.changes == ["properties.configuration.secrets[1].keyVaultUrl"]
+            assert plan_web({}).status == PLAN_ERROR
@@ -1,8 +1,11 @@
+import json
 import tempfile
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
+from azure_deploy_cli.aca import yaml_loader
 from azure_deploy_cli.aca.yaml_loader import load_app_config_yaml
 
 
@@ -163,3 +166,214 @@ containers:
             assert containers[0].env_vars == []
         finally:
             temp_path.unlink()
+
+
+PROBE_CONFIG_YAML = """
+containers:
+  - name: my-app
+    image_name: my-image
+    cpu: 0.5
+    memory: "1.0Gi"
+    dockerfile: ./Dockerfile
+    probes:
+      - type: Liveness
+        http_get:
+          path: /health
+          port: 8080
+"""
+
+
+class TestAppConfigCache:
+    """Tests for caching of validated container configs."""
+
+    @pytest.fixture(autouse=True)
+    def clear_memory_cache(self):
+        yaml_loader._app_configs.clear()
+        yaml_loader._fragments.clear()
+        yield
+        yaml_loader._app_configs.clear()
+        yaml_loader._fragments.clear()
+
+    def test_warm_load_skips_parsing(self, tmp_path):
+        config_path = tmp_path / "app.yaml"
+        config_path.write_text(PROBE_CONFIG_YAML)
+        load_app_config_yaml(config_path, cache_dir=None)
+
+        with patch.object(yaml_loader, "_load_yaml") as mock_load_yaml:
+            app = load_app_config_yaml(config_path, cache_dir=None)
+
+        mock_load_yaml.assert_not_called()
+        assert app.containers[0].probes[0].http_get["path"] == "/health"
+
+    def test_disk_cache_is_used_by_a_new_process(self, tmp_path):
+        config_path = tmp_path / "app.yaml"
+        config_path.write_text(PROBE_CONFIG_YAML)
+        cache_dir = tmp_path / "cache"
+        load_app_config_yaml(config_path, cache_dir=cache_dir)
+        yaml_loader._app_configs.clear()
+        yaml_loader._fragments.clear()
+
+        with patch.object(yaml_loader, "_validate_app_config") as mock_validate:
+            app = load_app_config_yaml(config_path, cache_dir=cache_dir)
+
+        mock_validate.assert_not_called()
+        assert app.containers[0].probes[0].http_get["port"] == 8080
+
+    def test_changed_file_is_loaded_again(self, tmp_path):
+        config_path = tmp_path / "app.yaml"
+        config_path.write_text(PROBE_CONFIG_YAML)
+        load_app_config_yaml(config_path, cache_dir=None)
+
+        config_path.write_text(PROBE_CONFIG_YAML.replace("my-image", "other-image"))
+        app = load_app_config_yaml(config_path, cache_dir=None)
+
+        assert app.containers[0].image_name == "other-image"
+
+    def test_corrupt_cache_entry_is_rebuilt(self, tmp_path):
+        config_path = tmp_path / "app.yaml"
+        config_path.write_text(PROBE_CONFIG_YAML)
+        cache_dir = tmp_path / "cache"
+        load_app_config_yaml(config_path, cache_dir=cache_dir)
+        yaml_loader._app_configs.clear()
+        yaml_loader._fragments.clear()
+        for entry in cache_dir.iterdir():
+            entry.write_text("not json")
+
+        app = load_app_config_yaml(config_path, cache_dir=cache_dir)
+
+        assert app.containers[0].name == "my-app"
+
+    def test_disk_cache_stores_json(self, tmp_path):
+        config_path = tmp_path / "app.yaml"
+        config_path.write_text(PROBE_CONFIG_YAML)
+        cache_dir = tmp_path / "cache"
+
+        load_app_config_yaml(config_path, cache_dir=cache_dir)
+
+        (entry,) = cache_dir.iterdir()
+        assert entry.name.endswith(f"-{yaml_loader._config_schema_digest()}.json")
+        cached = json.loads(entry.read_text())
+        assert cached["containers"][0]["probes"][0]["http_get"]["path"] == "/health"
+
+    def test_model_change_invalidates_disk_cache(self, tmp_path):
+        config_path = tmp_path / "app.yaml"
+        config_path.write_text(PROBE_CONFIG_YAML)
+        cache_dir = tmp_path / "cache"
+        with patch.object(yaml_loader, "_config_schema_digest", return_value="old"):
+            load_app_config_yaml(config_path, cache_dir=cache_dir)
+        yaml_loader._app_configs.clear()
+
+        with patch.object(
+            yaml_loader, "_validate_app_config", wraps=yaml_loader._validate_app_config
+        ) as mock_validate:
+            load_app_config_yaml(config_path, cache_dir=cache_dir)
+
+        mock_validate.assert_called_once()
+
+    def test_entry_written_before_app_settings_loads_with_defaults(self, tmp_path):
+        config_path = tmp_path / "app.yaml"
+        config_path.write_text(PROBE_CONFIG_YAML)
+        cache_dir = tmp_path / "cache"
+        load_app_config_yaml(config_path, cache_dir=cache_dir)
+        yaml_loader._app_configs.clear()
+        (entry,) = cache_dir.iterdir()
+        cached = json.loads(entry.read_text())
+        entry.write_text(json.dumps({"containers": cached["containers"]}))
+
+        app = load_app_config_yaml(config_path, cache_dir=cache_dir)
+
+        assert app.target_port is None
+        assert app.allowed_ips is None
+
+    def test_returned_configs_do_not_share_state(self, tmp_path):
+        config_path = tmp_path / "app.yaml"
+        config_path.write_text(PROBE_CONFIG_YAML)
+
+        first = load_app_config_yaml(config_path, cache_dir=None)
+        first.containers[0].env_vars.append("CHANGED")
+        second = load_app_config_yaml(config_path, cache_dir=None)
+
+        assert second.containers[0].env_vars == []
+
+
+SIDECAR_FRAGMENT_YAML = """
+containers:
+  - name: sidecar
+    image_name: sidecar-image
+    cpu: 0.25
+    memory: "0.5Gi"
+    existing_image_tag: v1.0.0
+"""
+
+
+class TestLayeredAppConfig:
+    """Tests for includes and stage overlays in container configs."""
+
+    @pytest.fixture(autouse=True)
+    def clear_memory_cache(self):
+        yaml_loader._app_configs.clear()
+        yaml_loader._fragments.clear()
+        yield
+        yaml_loader._app_configs.clear()
+        yaml_loader._fragments.clear()
+
+    def test_include_merges_containers_by_name(self, tmp_path):
+        (tmp_path / "shared").mkdir()
+        (tmp_path / "shared" / "sidecars.yaml").write_text(SIDECAR_FRAGMENT_YAML)
+        config_path = tmp_path / "app.yaml"
+        config_path.write_text(
+            "include: [shared/sidecars.yaml]\n"
+            + PROBE_CONFIG_YAML
+            + "  - name: sidecar\n    cpu: 0.5\n"
+        )
+
+        app = load_app_config_yaml(config_path, cache_dir=None)
+
+        assert [c.name for c in app.containers] == ["sidecar", "my-app"]
+        assert app.containers[0].cpu == 0.5
+        assert app.containers[0].image_name == "sidecar-image"
+
+    def test_stage_overlay_is_applied(self, tmp_path):
+        config_path = tmp_path / "app.yaml"
+        config_path.write_text(
+            PROBE_CONFIG_YAML + "stages:\n  prod:\n    containers:\n"
+            "      - name: my-app\n        cpu: 2.0\n"
+        )
+
+        prod = load_app_config_yaml(config_path, stage="prod", cache_dir=None)
+        staging = load_app_config_yaml(config_path, stage="staging", cache_dir=None)
+
+        assert prod.containers[0].cpu == 2.0
+        assert staging.containers[0].cpu == 0.5
+
+    def test_shared_fragment_is_parsed_once(self, tmp_path):
+        (tmp_path / "sidecars.yaml").write_text(SIDECAR_FRAGMENT_YAML)
+        for name in ("a", "b"):
+            (tmp_path / f"{name}.yaml").write_text("extends: sidecars.yaml\n" + PROBE_CONFIG_YAML)
+
+        with patch.object(
+            yaml_loader, "_load_yaml", side_effect=yaml_loader._load_yaml
+        ) as mock_load_yaml:
+            load_app_config_yaml(tmp_path / "a.yaml", cache_dir=None)
+            load_app_config_yaml(tmp_path / "b.yaml", cache_dir=None)
+
+        assert mock_load_yaml.call_count == 3
+
+    def test_changed_fragment_is_loaded_again(self, tmp_path):
+        fragment_path = tmp_path / "sidecars.yaml"
+        fragment_path.write_text(SIDECAR_FRAGMENT_YAML)
+        config_path = tmp_path / "app.yaml"
+        config_path.write_text("extends: sidecars.yaml\n" + PROBE_CONFIG_YAML)
+        load_app_config_yaml(config_path, cache_dir=None)
+
+        fragment_path.write_text(SIDECAR_FRAGMENT_YAML.replace("0.25", "0.125"))
+        app = load_app_config_yaml(config_path, cache_dir=None)
+
+        assert app.containers[0].cpu == 0.125
+
+    def test_include_cycle_raises_error(self, tmp_path):
+        (tmp_path / "a.yaml").write_text("include: b.yaml\n")
+        (tmp_path / "b.yaml").write_text("include: a.yaml\n")
+
+        with pytest.raises(ValueError, match="include cycle"):
+            load_app_config_yaml(tmp_path / "a.yaml", cache_dir=None)
@@ -0,0 +1,74 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from azure_deploy_cli.utils.process import OUTPUT_TAIL_LINES, run_process
+
+
+def python_cmd(code: str) -> list[str]:
+    return [sys.executable, "-c", code]
+
+
+class TestRunProcess:
+    """Tests for run_process function."""
+
+    def test_returns_exit_code_and_output(self):
+        result = run_process(python_cmd("print('hello'); raise SystemExit(3)"), prefix="test")
+
+        assert result.returncode == 3
+        assert result.tail == ["hello"]
+
+    def test_output_tail_is_bounded(self):
+        result = run_process(
+            python_cmd(f"for i in range({OUTPUT_TAIL_LINES + 10}): print(i)"), prefix="test"
+        )
+
+        assert len(result.tail) == OUTPUT_TAIL_LINES
+        assert result.tail[0] == "10"
+        assert result.tail[-1] == str(OUTPUT_TAIL_LINES + 9)
+
+    def test_lines_are_logged_with_prefix(self):
+        with patch("azure_deploy_cli.utils.process.logger") as mock_logger:
+            run_process(python_cmd("print('hello')"), prefix="registry.io/app:tag")
+
+        mock_logger.info.assert_called_once_with("[%s] %s", "registry.io/app:tag", "hello")
+
+    def test_hidden_output_is_still_kept_in_tail(self):
+        with patch("azure_deploy_cli.utils.process.logger") as mock_logger:
+            result = run_process(python_cmd("print('hello')"), prefix="test", show_output=False)
+
+        mock_logger.info.assert_not_called()
+        assert result.tail == ["hello"]
+
+    def test_progress_lines_are_rate_limited(self):
+        code = "for i in range(100): print(f'4f4fb700ef54: Pushing [==>   ] {i}MB')"
+        with patch("azure_deploy_cli.utils.process.logger") as mock_logger:
+            result = run_process(python_cmd(code), prefix="test")
+
+        assert len(result.tail) == OUTPUT_TAIL_LINES
+        logged = [c.args[0] % c.args[1:] for c in mock_logger.info.call_args_list]
+        assert logged == [
+            "[test] 4f4fb700ef54: Pushing [==>   ] 0MB",
+            "[test] (99 progress lines not shown)",
+        ]
+
+    def test_concurrent_processes_share_the_runner(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(
+                executor.map(
+                    lambda i: run_process(
+                        python_cmd(f"import time; time.sleep(0.2); print({i})"), prefix=str(i)
+                    ),
+                    range(4),
+                )
+            )
+
+        assert [r.tail for r in results] == [["0"], ["1"], ["2"], ["3"]]
+
+    def test_disabled_level_skips_logging(self):
+        with patch("azure_deploy_cli.utils.process.logger") as mock_logger:
+            mock_logger.isEnabledFor.return_value = False
+            result = run_process(python_cmd("print('hello')"), prefix="test")
+
+        mock_logger.info.assert_not_called()
+        assert result.tail == ["hello"]
@@ -0,0 +1,100 @@
+import io
+import urllib.error
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from azure_deploy_cli.utils import registry
+
+IMAGE = "myacr.azurecr.io/team/web:prod-20231215120000"
+DIGEST = "sha256:" + "a" * 64
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    registry._known_tags.clear()
+    registry._refresh_tokens.clear()
+    yield
+    registry._known_tags.clear()
+    registry._refresh_tokens.clear()
+
+
+def create_response(body=b"", headers=None):
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.read.return_value = body
+    response.headers = headers or {}
+    return response
+
+
+def token_response():
+    return create_response(b'{"access_token": "access"}')
+
+
+class TestSplitImageName:
+    """Tests for split_image_name function."""
+
+    def test_splits_nested_repository(self):
+        assert registry.split_image_name(IMAGE) == (
+            "myacr.azurecr.io",
+            "team/web",
+            "prod-20231215120000",
+        )
+
+    def test_ignores_digest(self):
+        assert registry.split_image_name(f"{IMAGE}@{DIGEST}")[2] == "prod-20231215120000"
+
+    def test_rejects_image_without_tag(self):
+        with pytest.raises(ValueError, match="registry/repository:tag"):
+            registry.split_image_name("myacr.azurecr.io/web")
+
+
+@patch("azure_deploy_cli.utils.registry.run_command", return_value={"accessToken": "refresh"})
+@patch("azure_deploy_cli.utils.registry.urllib.request.urlopen")
+class TestGetRemoteImageDigest:
+    """Tests for get_remote_image_digest function."""
+
+    def test_returns_digest_of_existing_tag(self, mock_urlopen, mock_run_command):
+        mock_urlopen.side_effect = [
+            token_response(),
+            create_response(headers={"Docker-Content-Digest": DIGEST}),
+        ]
+
+        assert registry.get_remote_image_digest(IMAGE) == DIGEST
+
+        manifest_request = mock_urlopen.call_args.args[0]
+        assert manifest_request.get_method() == "HEAD"
+        assert manifest_request.full_url == (
+            "https://myacr.azurecr.io/v2/team/web/manifests/prod-20231215120000"
+        )
+        assert manifest_request.get_header("Authorization") == "Bearer access"
+
+    def test_returns_none_for_missing_tag(self, mock_urlopen, mock_run_command):
+        not_found = urllib.error.HTTPError(IMAGE, 404, "Not Found", {}, io.BytesIO())
+        mock_urlopen.side_effect = [token_response(), not_found]
+
+        assert registry.get_remote_image_digest(IMAGE) is None
+
+    def test_returns_none_when_registry_fails(self, mock_urlopen, mock_run_command):
+        mock_urlopen.side_effect = urllib.error.URLError("unreachable")
+
+        assert registry.get_remote_image_digest(IMAGE) is None
+
+    def test_known_tags_are_not_checked_again(self, mock_urlopen, mock_run_command):
+        registry.remember_image_digest(IMAGE, DIGEST)
+
+        assert registry.get_remote_image_digest(IMAGE) == DIGEST
+        mock_urlopen.assert_not_called()
+
+    def test_refresh_token_is_reused_across_repositories(self, mock_urlopen, mock_run_command):
+        mock_urlopen.side_effect = [
+            token_response(),
+            create_response(headers={"Docker-Content-Digest": DIGEST}),
+            token_response(),
+            create_response(headers={"Docker-Content-Digest": DIGEST}),
+        ]
+
+        registry.get_remote_image_digest(IMAGE)
+        registry.get_remote_image_digest("myacr.azurecr.io/api:prod-20231215120000")
+
+        mock_run_command.assert_called_once()
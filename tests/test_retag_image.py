@@ -1,71 +1,79 @@
+import json
+from pathlib import Path
 from unittest.mock import Mock, patch
 
 import pytest
+from azure.mgmt.appcontainers.models import ContainerApp
 
 from azure_deploy_cli.aca.deploy_aca import (
+    ENVELOPE_HASH_TAG,
     deploy_revision,
     get_aca_docker_image_name,
 )
-from azure_deploy_cli.utils.docker import pull_image, pull_retag_and_push_image, tag_image
+from azure_deploy_cli.utils.docker import (
+    build_and_push_image,
+    ensure_buildx_builder,
+    image_exists,
+    pin_image_digest,
+    prune_buildx_builder,
+    pull_image,
+    pull_retag_and_push_image,
+    push_image,
+    strip_image_digest,
+    tag_image,
+)
+from azure_deploy_cli.utils.process import ProcessResult
 
 
 class TestRetagImage:
     """Tests for image retagging functionality."""
 
-    @patch("azure_deploy_cli.utils.docker.subprocess.Popen")
-    def test_pull_image_success(self, mock_popen):
+    @patch("azure_deploy_cli.utils.docker.run_process")
+    def test_pull_image_success(self, mock_run):
         """Test successful image pull."""
-        mock_process = Mock()
-        mock_process.stdout.readline = Mock(side_effect=[""])  # EOF immediately
-        mock_process.wait.return_value = 0
-        mock_popen.return_value = mock_process
-
-        pull_image("registry.io/myapp:tag1")
-        mock_popen.assert_called_once_with(
-            ["docker", "pull", "registry.io/myapp:tag1"],
-            stdout=-1,
-            stderr=-2,
-            text=True,
+        mock_run.return_value = ProcessResult(returncode=0)
+
+        pull_image("registry.io/myapp:tag1", platform="linux/amd64")
+        mock_run.assert_called_once_with(
+            ["docker", "pull", "--platform", "linux/amd64", "registry.io/myapp:tag1"],
+            prefix="registry.io/myapp:tag1",
         )
 
-    @patch("azure_deploy_cli.utils.docker.subprocess.Popen")
-    def test_pull_image_failure(self, mock_popen):
+    @patch("azure_deploy_cli.utils.docker.run_process")
+    def test_pull_image_failure_includes_output_tail(self, mock_run):
         """Test image pull failure."""
-        mock_process = Mock()
-        mock_process.stdout.readline = Mock(side_effect=[""])  # EOF immediately
-        mock_process.wait.return_value = 1
-        mock_popen.return_value = mock_process
+        mock_run.return_value = ProcessResult(returncode=1, tail=["manifest unknown"])
 
-        with pytest.raises(RuntimeError, match="Docker pull failed"):
+        with pytest.raises(RuntimeError, match="Docker pull failed(.|\n)*manifest unknown"):
             pull_image("registry.io/myapp:nonexistent")
 
-    @patch("azure_deploy_cli.utils.docker.subprocess.Popen")
-    def test_tag_image_success(self, mock_popen):
+    @patch("azure_deploy_cli.utils.docker.run_process")
+    def test_tag_image_success(self, mock_run):
         """Test successful image tagging."""
-        mock_process = Mock()
-        mock_process.stdout.readline = Mock(side_effect=[""])  # EOF immediately
-        mock_process.wait.return_value = 0
-        mock_popen.return_value = mock_process
+        mock_run.return_value = ProcessResult(returncode=0)
 
         tag_image("registry.io/myapp:old", "registry.io/myapp:new")
-        mock_popen.assert_called_once_with(
+        mock_run.assert_called_once_with(
             ["docker", "tag", "registry.io/myapp:old", "registry.io/myapp:new"],
-            stdout=-1,
-            stderr=-2,
-            text=True,
+            prefix="registry.io/myapp:new",
         )
 
-    @patch("azure_deploy_cli.utils.docker.subprocess.Popen")
-    def test_tag_image_failure(self, mock_popen):
+    @patch("azure_deploy_cli.utils.docker.run_process")
+    def test_tag_image_failure(self, mock_run):
         """Test image tagging failure."""
-        mock_process = Mock()
-        mock_process.stdout.readline = Mock(side_effect=[""])  # EOF immediately
-        mock_process.wait.return_value = 1
-        mock_popen.return_value = mock_process
+        mock_run.return_value = ProcessResult(returncode=1)
 
         with pytest.raises(RuntimeError, match="Docker tag failed"):
             tag_image("registry.io/myapp:old", "registry.io/myapp:new")
 
+    @patch("azure_deploy_cli.utils.docker.run_process")
+    def test_image_exists_hides_output(self, mock_run):
+        """Test that inspecting a local image does not log its output."""
+        mock_run.return_value = ProcessResult(returncode=1)
+
+        assert not image_exists("registry.io/myapp:tag1")
+        assert mock_run.call_args.kwargs["show_output"] is False
+
     @patch("azure_deploy_cli.utils.docker.push_image")
     @patch("azure_deploy_cli.utils.docker.tag_image")
     @patch("azure_deploy_cli.utils.docker.pull_image")
@@ -111,6 +119,7 @@ class TestDeployRevisionWithRetag:
     @patch("azure_deploy_cli.aca.deploy_aca._get_container_app")
     @patch("azure_deploy_cli.aca.deploy_aca.build_container_images")
     @patch("azure_deploy_cli.aca.deploy_aca._prepare_secrets_and_env_vars")
+    @patch.dict("os.environ", {"PASS": "registry-pass"})
     def test_deploy_revision_with_existing_image_tag(
         self, mock_prepare_secrets, mockbuild_container_images, mock_get_app, mock_wait
     ):
@@ -145,6 +154,7 @@ class TestDeployRevisionWithRetag:
         container_config.name = "myapp"
         container_config.image_name = "myapp"
         container_config.env_vars = []
+        container_config.build_args = []
         container_config.existing_image_tag = "prod-20231214120000"
 
         # Call deploy_revision with container_configs
@@ -185,6 +195,66 @@ class TestDeployRevisionWithRetag:
     @patch("azure_deploy_cli.aca.deploy_aca._get_container_app")
     @patch("azure_deploy_cli.aca.deploy_aca.build_container_images")
     @patch("azure_deploy_cli.aca.deploy_aca._prepare_secrets_and_env_vars")
+    @patch.dict("os.environ", {"PASS": "registry-pass"})
+    def test_deploy_revision_skips_unchanged_envelope_after_building(
+        self, mock_prepare_secrets, mockbuild_container_images, mock_get_app
+    ):
+        """Test that the envelope hash covers the built images and skips the deploy."""
+        mock_client = Mock()
+        mock_prepare_secrets.return_value = ([], {})
+        image = f"registry.azurecr.io/myapp:prod-20231215120000@sha256:{'a' * 64}"
+        mockbuild_container_images.return_value = [image]
+        existing_app = ContainerApp(location="eastus", tags={ENVELOPE_HASH_TAG: "hash"})
+        existing_app.latest_revision_name = "myapp--prod-20231214120000"
+        mock_get_app.return_value = existing_app
+        mock_client.container_apps_revisions.get_revision.return_value = Mock(
+            active=True,
+            health_state="Healthy",
+            provisioning_state="Provisioned",
+            running_state="Running",
+            fqdn="myapp.azurecontainerapps.io",
+        )
+        mock_client.container_apps_revisions.get_revision.return_value.name = (
+            "myapp--prod-20231214120000"
+        )
+        hash_envelope = Mock(return_value="hash")
+        container_config = Mock(env_vars=[], build_args=[], probes=None, cpu=0.5, memory="1Gi")
+        container_config.name = "myapp"
+
+        result = deploy_revision(
+            client=mock_client,
+            subscription_id="sub-id",
+            resource_group="rg",
+            container_app_env=Mock(id="env-id"),
+            user_identity=Mock(resourceId="identity-id"),
+            container_app_name="myapp",
+            registry_server="registry.azurecr.io",
+            registry_user="user",
+            registry_pass_env_name="PASS",
+            revision_suffix="prod-20231215120000",
+            location="eastus",
+            stage="prod",
+            container_configs=[container_config],
+            target_port=8080,
+            ingress_external=True,
+            ingress_transport="auto",
+            min_replicas=1,
+            max_replicas=3,
+            secret_key_vault_config=Mock(secret_names=[]),
+            ip_rules=[],
+            hash_envelope=hash_envelope,
+            skip_if_unchanged=True,
+        )
+
+        hash_envelope.assert_called_once_with([image])
+        mock_client.container_apps.begin_create_or_update.assert_not_called()
+        assert result.skipped
+        assert result.revision_name == "myapp--prod-20231214120000"
+
+    @patch("azure_deploy_cli.aca.deploy_aca._get_container_app")
+    @patch("azure_deploy_cli.aca.deploy_aca.build_container_images")
+    @patch("azure_deploy_cli.aca.deploy_aca._prepare_secrets_and_env_vars")
+    @patch.dict("os.environ", {"PASS": "registry-pass"})
     def test_deploy_revision_with_nonexistent_image_tag(
         self, mock_prepare_secrets, mockbuild_container_images, mock_get_app
     ):
@@ -204,6 +274,7 @@ class TestDeployRevisionWithRetag:
         container_config.name = "myapp"
         container_config.image_name = "myapp"
         container_config.env_vars = []
+        container_config.build_args = []
         container_config.existing_image_tag = "nonexistent-tag"
 
         # Call deploy_revision - should fail during image building
@@ -235,6 +306,7 @@ class TestDeployRevisionWithRetag:
     @patch("azure_deploy_cli.aca.deploy_aca._get_container_app")
     @patch("azure_deploy_cli.aca.deploy_aca.build_container_images")
     @patch("azure_deploy_cli.aca.deploy_aca._prepare_secrets_and_env_vars")
+    @patch.dict("os.environ", {"PASS": "registry-pass"})
     def test_deploy_revision_without_existing_image_tag(
         self, mock_prepare_secrets, mockbuild_container_images, mock_get_app, mock_wait
     ):
@@ -269,6 +341,7 @@ class TestDeployRevisionWithRetag:
         container_config.name = "myapp"
         container_config.image_name = "myapp"
         container_config.env_vars = []
+        container_config.build_args = []
         container_config.existing_image_tag = None
         container_config.dockerfile = "Dockerfile"
 
@@ -311,3 +384,119 @@ class TestGetAcaDockerImageName:
         """Test constructing full image name."""
         result = get_aca_docker_image_name("registry.azurecr.io", "myapp", "prod-20231215120000")
         assert result == "registry.azurecr.io/myapp:prod-20231215120000"
+
+
+class TestImageDigest:
+    """Tests for capturing and pinning pushed image digests."""
+
+    @patch("azure_deploy_cli.utils.docker.run_process")
+    def test_push_image_returns_digest(self, mock_run):
+        """Test that the digest reported by docker push is returned."""
+        digest = "sha256:" + "b" * 64
+        mock_run.return_value = ProcessResult(
+            returncode=0, tail=["Pushed", f"tag1: digest: {digest} size: 1234"]
+        )
+
+        assert push_image("registry.io/myapp:tag1") == digest
+
+    @patch("azure_deploy_cli.utils.docker.run_process")
+    def test_push_image_failure_includes_output_tail(self, mock_run):
+        """Test that a failed push reports the last lines of its output."""
+        mock_run.return_value = ProcessResult(returncode=1, tail=["denied: access forbidden"])
+
+        with pytest.raises(RuntimeError, match="denied: access forbidden"):
+            push_image("registry.io/myapp:tag1")
+
+    @patch("azure_deploy_cli.utils.docker.run_process")
+    def test_build_and_push_image_returns_digest_from_metadata(self, mock_run):
+        """Test that the digest is read from the buildx metadata file."""
+        digest = "sha256:" + "d" * 64
+
+        def run(cmd, prefix):
+            metadata_file = Path(cmd[cmd.index("--metadata-file") + 1])
+            metadata_file.write_text(json.dumps({"containerimage.digest": digest}))
+            return ProcessResult(returncode=0)
+
+        mock_run.side_effect = run
+
+        assert build_and_push_image("app/Dockerfile", "registry.io/myapp:tag1") == digest
+
+    @patch("azure_deploy_cli.utils.docker.run_process")
+    def test_build_and_push_image_builds_all_platforms_in_one_build(self, mock_run):
+        """Test that all platforms go to one buildx build on the given builder."""
+        mock_run.return_value = ProcessResult(returncode=0)
+
+        build_and_push_image(
+            "app/Dockerfile",
+            "registry.io/myapp:tag1",
+            platforms=["linux/amd64", "linux/arm64"],
+            builder="azd-builder",
+        )
+
+        cmd = mock_run.call_args.args[0]
+        assert cmd[cmd.index("--platform") + 1] == "linux/amd64,linux/arm64"
+        assert cmd[cmd.index("--builder") + 1] == "azd-builder"
+
+    def test_pin_image_digest(self):
+        """Test pinning an image to a digest, keeping the tag."""
+        digest = "sha256:" + "c" * 64
+        pinned = pin_image_digest("registry.io/myapp:tag1", digest)
+
+        assert pinned == f"registry.io/myapp:tag1@{digest}"
+        assert strip_image_digest(pinned) == "registry.io/myapp:tag1"
+
+    def test_pin_image_digest_without_digest(self):
+        """Test that the tagged name is kept when no digest is known."""
+        assert pin_image_digest("registry.io/myapp:tag1", None) == "registry.io/myapp:tag1"
+
+
+class TestEnsureBuildxBuilder:
+    """Tests for ensure_buildx_builder function."""
+
+    @patch("azure_deploy_cli.utils.docker._buildx_builders", new_callable=set)
+    @patch("azure_deploy_cli.utils.docker.run_process")
+    def test_creates_missing_builder_once(self, mock_run, _):
+        """Test that a missing builder is created once and then reused."""
+        mock_run.side_effect = [ProcessResult(returncode=1), ProcessResult(returncode=0)]
+
+        assert ensure_buildx_builder("azd-builder") == "azd-builder"
+        assert ensure_buildx_builder("azd-builder") == "azd-builder"
+
+        assert mock_run.call_count == 2
+        assert mock_run.call_args_list[1].args[0][:4] == ["docker", "buildx", "create", "--name"]
+
+    @patch("azure_deploy_cli.utils.docker._buildx_builders", new_callable=set)
+    @patch("azure_deploy_cli.utils.docker.run_process")
+    def test_reuses_existing_builder(self, mock_run, _):
+        """Test that an existing builder is not recreated."""
+        mock_run.return_value = ProcessResult(returncode=0)
+
+        ensure_buildx_builder("azd-builder")
+
+        mock_run.assert_called_once_with(
+            ["docker", "buildx", "inspect", "azd-builder"], prefix="azd-builder", show_output=False
+        )
+
+
+class TestPruneBuildxBuilder:
+    """Tests for prune_buildx_builder function."""
+
+    @patch("azure_deploy_cli.utils.docker._buildx_builders", new={"azd-builder"})
+    @patch("azure_deploy_cli.utils.docker.run_process")
+    def test_prunes_used_builder(self, mock_run):
+        """Test that a builder used by this process is pruned to the given size."""
+        mock_run.return_value = ProcessResult(returncode=0)
+
+        prune_buildx_builder("azd-builder", "10gb")
+
+        cmd = mock_run.call_args.args[0]
+        assert cmd[:3] == ["docker", "buildx", "prune"]
+        assert cmd[cmd.index("--keep-storage") + 1] == "10gb"
+
+    @patch("azure_deploy_cli.utils.docker._buildx_builders", new=set())
+    @patch("azure_deploy_cli.utils.docker.run_process")
+    def test_skips_unused_builder(self, mock_run):
+        """Test that a builder not used by this process is left alone."""
+        prune_buildx_builder("azd-builder", "10gb")
+
+        mock_run.assert_not_called()
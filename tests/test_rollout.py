@@ -0,0 +1,183 @@
+import itertools
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+from azure.mgmt.appcontainers.models import TrafficWeight
+
+from azure_deploy_cli.aca.rollout import rollout_traffic, validate_rollout_steps
+
+
+def create_mock_revision(name, healthy=True):
+    mock_rev = Mock()
+    mock_rev.name = name
+    mock_rev.active = True
+    mock_rev.health_state = "Healthy" if healthy else "Unhealthy"
+    mock_rev.provisioning_state = "Provisioned"
+    mock_rev.running_state = "Running"
+    mock_rev.fqdn = f"{name}.example.com"
+    return mock_rev
+
+
+def create_mock_client(to_revision_healthy=True):
+    mock_client = Mock()
+    mock_client.container_apps_revisions.list_revisions.return_value = [
+        create_mock_revision("app--prod-20231214120000"),
+        create_mock_revision("app--staging-20231215120000"),
+    ]
+    mock_client.container_apps_revisions.get_revision.return_value = create_mock_revision(
+        "app--staging-20231215120000", healthy=to_revision_healthy
+    )
+    mock_app = Mock()
+    mock_app.configuration.ingress.traffic = [
+        TrafficWeight(label="prod", weight=100, revision_name="app--prod-20231214120000"),
+        TrafficWeight(label="dev", weight=0, revision_name="app--dev-20231213120000"),
+    ]
+    mock_client.container_apps.get.return_value = (mock_app, 'W/"etag-1"')
+    etags = (f'W/"etag-{i}"' for i in itertools.count(2))
+    mock_client.container_apps.begin_update.return_value.result.side_effect = lambda: next(etags)
+    return mock_client
+
+
+def patched_weights(mock_client) -> list[dict[str, int]]:
+    weights = []
+    for call in mock_client.container_apps.begin_update.call_args_list:
+        body = json.loads(call.kwargs["container_app_envelope"].getvalue())
+        traffic = body["properties"]["configuration"]["ingress"]["traffic"]
+        weights.append({t["label"]: t["weight"] for t in traffic if t["label"] != "dev"})
+    return weights
+
+
+class TestValidateRolloutSteps:
+    """Tests for validate_rollout_steps function."""
+
+    def test_valid_steps(self):
+        validate_rollout_steps([5, 25, 50, 100])
+
+    def test_empty_steps_raise_error(self):
+        with pytest.raises(ValueError, match="At least one rollout step"):
+            validate_rollout_steps([])
+
+    def test_out_of_range_step_raises_error(self):
+        with pytest.raises(ValueError, match="between 1 and 100"):
+            validate_rollout_steps([5, 150])
+
+    def test_non_increasing_steps_raise_error(self):
+        with pytest.raises(ValueError, match="strictly increasing"):
+            validate_rollout_steps([25, 25, 50])
+
+
+@patch("azure_deploy_cli.aca.rollout.time.sleep")
+class TestRolloutTraffic:
+    """Tests for rollout_traffic function."""
+
+    def test_steps_through_schedule(self, mock_sleep):
+        """Test that each step shifts traffic and checks health with one revision GET."""
+        mock_client = create_mock_client()
+
+        result = rollout_traffic(
+            mock_client, "rg", "app", "prod", "staging", [10, 50, 100], step_interval_seconds=30
+        )
+
+        assert result.to_revision_name == "app--staging-20231215120000"
+        assert result.to_weight == 100
+        assert patched_weights(mock_client) == [
+            {"prod": 90, "staging": 10},
+            {"prod": 50, "staging": 50},
+            {"prod": 0, "staging": 100},
+        ]
+        assert mock_client.container_apps_revisions.list_revisions.call_count == 1
+        assert mock_client.container_apps_revisions.get_revision.call_count == 3
+        headers = [
+            c.kwargs["headers"] for c in mock_client.container_apps.begin_update.call_args_list
+        ]
+        assert headers == [
+            {"If-Match": 'W/"etag-1"'},
+            {"If-Match": 'W/"etag-2"'},
+            {"If-Match": 'W/"etag-3"'},
+        ]
+
+    def test_other_labels_keep_their_traffic(self, mock_sleep):
+        """Test that labels outside the rollout stay in every traffic patch."""
+        mock_client = create_mock_client()
+
+        rollout_traffic(mock_client, "rg", "app", "prod", "staging", [50], step_interval_seconds=0)
+
+        body = json.loads(
+            mock_client.container_apps.begin_update.call_args.kwargs[
+                "container_app_envelope"
+            ].getvalue()
+        )
+        traffic = body["properties"]["configuration"]["ingress"]["traffic"]
+        assert {"label": "dev", "weight": 0, "revisionName": "app--dev-20231213120000"} in [
+            {k: t[k] for k in ("label", "weight", "revisionName")} for t in traffic
+        ]
+
+    def test_rolls_back_on_error_after_traffic_shift(self, mock_sleep):
+        """Test that an error during a step rolls traffic back and is re-raised."""
+        mock_client = create_mock_client()
+        mock_client.container_apps_revisions.get_revision.side_effect = ConnectionResetError()
+
+        with pytest.raises(ConnectionResetError):
+            rollout_traffic(
+                mock_client, "rg", "app", "prod", "staging", [10, 100], step_interval_seconds=0
+            )
+
+        assert patched_weights(mock_client) == [
+            {"prod": 90, "staging": 10},
+            {"prod": 100, "staging": 0},
+        ]
+
+    def test_negative_interval_raises_error(self, mock_sleep):
+        """Test that a negative step interval fails before changing traffic."""
+        mock_client = create_mock_client()
+
+        with pytest.raises(ValueError, match="must not be negative"):
+            rollout_traffic(
+                mock_client, "rg", "app", "prod", "staging", [100], step_interval_seconds=-1
+            )
+
+        mock_client.container_apps.begin_update.assert_not_called()
+
+    def test_rolls_back_on_unhealthy_revision(self, mock_sleep):
+        """Test that an unhealthy target revision rolls all traffic back."""
+        mock_client = create_mock_client(to_revision_healthy=False)
+
+        with pytest.raises(RuntimeError, match="rolled back"):
+            rollout_traffic(
+                mock_client, "rg", "app", "prod", "staging", [10, 100], step_interval_seconds=30
+            )
+
+        assert patched_weights(mock_client) == [
+            {"prod": 90, "staging": 10},
+            {"prod": 100, "staging": 0},
+        ]
+
+    @patch("azure_deploy_cli.aca.rollout._check_revision_http", return_value=False)
+    def test_rolls_back_on_failed_http_check(self, mock_http_check, mock_sleep):
+        """Test that a failed HTTP check rolls all traffic back."""
+        mock_client = create_mock_client()
+
+        with pytest.raises(RuntimeError, match="rolled back"):
+            rollout_traffic(
+                mock_client,
+                "rg",
+                "app",
+                "prod",
+                "staging",
+                [10, 100],
+                step_interval_seconds=30,
+                health_check_path="/health",
+            )
+
+        mock_http_check.assert_called_once()
+        assert patched_weights(mock_client)[-1] == {"prod": 100, "staging": 0}
+
+    def test_missing_label_raises_error(self, mock_sleep):
+        """Test that a label without revisions fails before changing traffic."""
+        mock_client = create_mock_client()
+
+        with pytest.raises(RuntimeError, match="No revision found for label 'dev'"):
+            rollout_traffic(mock_client, "rg", "app", "prod", "dev", [100], step_interval_seconds=0)
+
+        mock_client.container_apps.begin_update.assert_not_called()
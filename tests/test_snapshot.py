@@ -0,0 +1,57 @@
+from unittest.mock import Mock
+
+from azure.core.exceptions import ResourceNotFoundError
+
+from azure_deploy_cli.aca.snapshot import ResourceSnapshot
+
+
+def create_snapshot():
+    mock_client = Mock()
+    mock_client.container_apps.get.return_value = (Mock(), 'W/"etag-1"')
+    return mock_client, ResourceSnapshot(mock_client, "rg", "app", "env")
+
+
+class TestResourceSnapshot:
+    """Tests for ResourceSnapshot class."""
+
+    def test_prefetch_reads_each_resource_once(self):
+        mock_client, snapshot = create_snapshot()
+
+        snapshot.prefetch()
+        snapshot.prefetch()
+
+        assert snapshot.container_app is mock_client.container_apps.get.return_value[0]
+        assert snapshot.container_app_etag == 'W/"etag-1"'
+        assert snapshot.managed_environment is mock_client.managed_environments.get.return_value
+        mock_client.container_apps.get.assert_called_once()
+        assert mock_client.container_apps.get.call_args.kwargs["container_app_name"] == "app"
+        mock_client.managed_environments.get.assert_called_once_with("rg", "env")
+
+    def test_missing_resource_is_cached_as_none(self):
+        mock_client, snapshot = create_snapshot()
+        mock_client.container_apps.get.side_effect = ResourceNotFoundError("not found")
+
+        assert snapshot.container_app is None
+        assert snapshot.container_app is None
+        assert snapshot.container_app_etag is None
+        mock_client.container_apps.get.assert_called_once()
+
+    def test_set_replaces_cached_resource_without_reading(self):
+        mock_client, snapshot = create_snapshot()
+        deployed_app = Mock()
+
+        snapshot.set_container_app(deployed_app)
+
+        assert snapshot.container_app is deployed_app
+        assert snapshot.container_app_etag is None
+        mock_client.container_apps.get.assert_not_called()
+
+    def test_invalidate_forces_next_read(self):
+        mock_client, snapshot = create_snapshot()
+        snapshot.set_container_app(Mock())
+
+        snapshot.invalidate_container_app()
+
+        assert snapshot.container_app is mock_client.container_apps.get.return_value[0]
+        assert snapshot.container_app_etag == 'W/"etag-1"'
+        mock_client.container_apps.get.assert_called_once()